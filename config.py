@@ -1,7 +1,12 @@
 import os
+import logging
+from types import MappingProxyType
 from dotenv import load_dotenv
 
-load_dotenv()
+# start_bot.py loads .env before importing the bot; don't parse it a second time
+if os.getenv('DOTENV_LOADED') != '1':
+    load_dotenv()
+    os.environ['DOTENV_LOADED'] = '1'
 
 # =============================================================================
 # SLACK CONFIGURATION
@@ -15,6 +20,8 @@ SLACK_APP_TOKEN = os.getenv('SLACK_APP_TOKEN')  # TODO: Add your Slack App Token
 # =============================================================================
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')  # TODO: Add your OpenAI API Key
 OPENAI_MODEL = "gpt-4"  # or "gpt-3.5-turbo" based on your needs
+OPENAI_FAST_MODEL = os.getenv('OPENAI_FAST_MODEL', 'gpt-4o-mini')  # instructional replies that don't need the main model
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', '30'))  # seconds per API call
 
 # =============================================================================
 # DATABRICKS CONFIGURATION
@@ -23,6 +30,7 @@ DATABRICKS_HOST = os.getenv('DATABRICKS_HOST')  # TODO: Add your Databricks work
 DATABRICKS_TOKEN = os.getenv('DATABRICKS_TOKEN')  # TODO: Add your Databricks access token
 DATABRICKS_CATALOG = os.getenv('DATABRICKS_CATALOG', 'your_catalog_name')  # TODO: Specify your catalog name
 DATABRICKS_SCHEMA = os.getenv('DATABRICKS_SCHEMA', 'your_schema_name')  # TODO: Specify your schema name
+DATABRICKS_WAREHOUSE_ID = os.getenv('DATABRICKS_WAREHOUSE_ID')  # TODO: Add the SQL warehouse ID used to run queries
 
 # Databricks table names - TODO: Update with your actual table names
 DATABRICKS_TABLES = {
@@ -33,6 +41,12 @@ DATABRICKS_TABLES = {
     'ppap': os.getenv('DATABRICKS_TABLES_PPAP', 'your_ppap_table_name'),
 }
 
+# Fully-qualified table names, resolved once at import so queries don't rebuild them
+DATABRICKS_FQ_TABLES = MappingProxyType({
+    key: f"{DATABRICKS_CATALOG}.{DATABRICKS_SCHEMA}.{table}"
+    for key, table in DATABRICKS_TABLES.items()
+})
+
 # =============================================================================
 # GOOGLE SHEETS CONFIGURATION
 # =============================================================================
@@ -48,10 +62,15 @@ SMARTSHEET_API_TOKEN = os.getenv('SMARTSHEET_API_TOKEN')  # TODO: Add your Smart
 # APPLICATION SETTINGS
 # =============================================================================
 DEBUG_MODE = os.getenv('DEBUG_MODE', 'True').lower() == 'true'
-LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# Numeric level resolved once; unknown names fall back to INFO
+LOG_LEVEL_NUM = logging.getLevelName(LOG_LEVEL)
+if not isinstance(LOG_LEVEL_NUM, int):
+    LOG_LEVEL_NUM = logging.INFO
 
 # File upload settings
 ALLOWED_FILE_TYPES = ['.xlsx', '.xls', '.csv']
+ALLOWED_FILE_EXTENSIONS = frozenset(ALLOWED_FILE_TYPES)  # for O(1) membership checks
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
 # Dashboard template settings
@@ -1,52 +1,143 @@
+import copy
 import logging
 import json
-from datetime import datetime, timedelta
+import time
+import queue
+import threading
+import atexit
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
-from sqlalchemy import create_engine, Column, String, DateTime, Text, Integer, Boolean
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import create_engine, String, DateTime, Text, Integer, Boolean, JSON, Index, func, case, text, select, delete, update
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from contextlib import contextmanager
+from cachetools import TTLCache
 
 from production_config import ProductionConfig
 
 logger = logging.getLogger(__name__)
-Base = declarative_base()
+
+# Metrics write-behind buffer settings
+METRICS_QUEUE_SIZE = 10000
+METRICS_BATCH_SIZE = 500
+METRICS_FLUSH_INTERVAL = 1.0  # seconds
+
+# Active-session read cache settings
+SESSION_CACHE_SIZE = 10000
+SESSION_CACHE_TTL = 30  # seconds
+
+# Rows removed per transaction by the retention sweep
+CLEANUP_BATCH_SIZE = 10000
+CLEANUP_INTERVAL = 24 * 60 * 60  # seconds between retention sweeps
+
+# Successful health checks are reused for this long
+HEALTH_CHECK_CACHE_SECONDS = 5
+
+# Deactivates all but the newest active session per user, so the unique index over active sessions can be built
+DEDUPE_ACTIVE_SESSIONS_SQL = text("""
+    UPDATE user_sessions AS s SET is_active = FALSE
+    WHERE s.is_active AND EXISTS (
+        SELECT 1 FROM user_sessions AS newer
+        WHERE newer.user_id = s.user_id AND newer.is_active
+          AND (newer.created_at, newer.id) > (s.created_at, s.id)
+    )
+""")
+
+# Native JSONB on PostgreSQL, generic JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), 'postgresql')
+
+
+# Prefer orjson for session blobs; fall back to stdlib json if it isn't installed.
+# Used as the engine's JSON (de)serializer so blobs are encoded once at the driver level.
+def _json_default(obj: Any) -> Any:
+    """Encode parsed DataFrames in the compact 'split' orientation"""
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict(orient='split')
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+try:
+    import orjson
+
+    def _dumps(data: Any) -> str:
+        return orjson.dumps(data, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(data: Any) -> str:
+        return json.dumps(data, default=_json_default)
+
+    _loads = json.loads
+
+
+class Base(DeclarativeBase):
+    """Declarative base for all bot tables"""
+
 
 class UserSession(Base):
     """User session data for production"""
     __tablename__ = 'user_sessions'
+    __table_args__ = (
+        Index('ix_user_sessions_user_active', 'user_id', 'is_active'),
+        # At most one active session per user; lets store_user_session upsert on PostgreSQL
+        Index('ux_user_sessions_active_user', 'user_id', unique=True,
+              postgresql_where=text('is_active')).ddl_if(dialect='postgresql'),
+    )
     
-    id = Column(Integer, primary_key=True)
-    user_id = Column(String(50), nullable=False, index=True)
-    launch_date = Column(String(20), nullable=False)
-    databricks_data = Column(Text, nullable=True)  # JSON string
-    file_data = Column(Text, nullable=True)  # JSON string
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    is_active = Column(Boolean, default=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    launch_date: Mapped[str] = mapped_column(String(20), nullable=False)
+    databricks_data: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONType, nullable=True)
+    file_data: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONType, nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
 
 class BotMetrics(Base):
     """Bot usage metrics for monitoring"""
     __tablename__ = 'bot_metrics'
+    __table_args__ = (
+        # Leading created_at also serves the retention delete in cleanup_old_data
+        Index('ix_bot_metrics_created_success', 'created_at', 'success'),
+    )
     
-    id = Column(Integer, primary_key=True)
-    user_id = Column(String(50), nullable=False, index=True)
-    command = Column(String(50), nullable=False)
-    launch_date = Column(String(20), nullable=True)
-    response_time = Column(Integer, nullable=True)  # milliseconds
-    success = Column(Boolean, default=True)
-    error_message = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    command: Mapped[str] = mapped_column(String(50), nullable=False)
+    launch_date: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    response_time: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # milliseconds
+    success: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 class DatabaseManager:
     """Database manager for production data storage"""
     
+    # Session columns update_user_session is allowed to change
+    _UPDATABLE_SESSION_FIELDS = frozenset({'launch_date', 'databricks_data', 'file_data'})
+    
     def __init__(self):
         """Initialize database connection"""
         self.engine = None
         self.SessionLocal = None
+        self._metrics_queue = queue.Queue(maxsize=METRICS_QUEUE_SIZE)
+        self._metrics_thread = None
+        self._metrics_lock = threading.Lock()
+        self._session_cache = TTLCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_CACHE_TTL)
+        self._session_cache_lock = threading.Lock()
+        # Per-user write counter, so a read that overlapped a write doesn't cache the row it replaced
+        self._session_generations: Dict[str, int] = {}
+        self._last_healthy_at = 0.0
+        self._cleanup_timer = None
+        # Whether store_user_session can upsert against ux_user_sessions_active_user
+        self._session_upsert = False
         self._initialize_database()
+        
+        if self.SessionLocal:
+            self._metrics_thread = threading.Thread(target=self._metrics_writer, daemon=True)
+            self._metrics_thread.start()
+            atexit.register(self.flush_metrics)
     
     def _initialize_database(self):
         """Initialize database connection and create tables"""
@@ -57,8 +148,11 @@ class DatabaseManager:
                     poolclass=QueuePool,
                     pool_size=ProductionConfig.DATABASE_POOL_SIZE,
                     max_overflow=ProductionConfig.DATABASE_MAX_OVERFLOW,
+                    pool_timeout=ProductionConfig.DATABASE_POOL_TIMEOUT,
                     pool_pre_ping=True,
-                    pool_recycle=3600
+                    pool_recycle=ProductionConfig.DATABASE_POOL_RECYCLE,
+                    json_serializer=_dumps,
+                    json_deserializer=_loads
                 )
                 
                 self.SessionLocal = sessionmaker(
@@ -69,7 +163,9 @@ class DatabaseManager:
                 
                 # Create tables
                 Base.metadata.create_all(bind=self.engine)
-                logger.info("Database initialized successfully")
+                if self.engine.dialect.name == 'postgresql':
+                    self._session_upsert = self._ensure_active_session_index()
+                logger.info(f"Database initialized successfully - pool: {self.engine.pool.status()}")
             else:
                 logger.warning("No DATABASE_URL provided, using in-memory storage")
                 self.engine = None
@@ -80,6 +176,19 @@ class DatabaseManager:
             self.engine = None
             self.SessionLocal = None
     
+    def _ensure_active_session_index(self) -> bool:
+        """Build the one-active-session-per-user index on an existing table; returns whether it exists"""
+        # create_all only indexes tables it creates, and the index can't be built over duplicate active rows
+        index = next(index for index in UserSession.__table__.indexes if index.name == 'ux_user_sessions_active_user')
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(DEDUPE_ACTIVE_SESSIONS_SQL)
+                index.create(bind=connection, checkfirst=True)
+            return True
+        except Exception as e:
+            logger.error(f"Could not build {index.name}, storing sessions without upsert: {e}")
+            return False
+    
     @contextmanager
     def get_session(self):
         """Get database session with proper error handling"""
@@ -106,47 +215,87 @@ class DatabaseManager:
                 if session is None:
                     return
                 
-                # Deactivate existing sessions for this user
-                session.query(UserSession).filter(
-                    UserSession.user_id == user_id,
-                    UserSession.is_active == True
-                ).update({'is_active': False})
-                
-                # Create new session
-                new_session = UserSession(
-                    user_id=user_id,
-                    launch_date=launch_date,
-                    databricks_data=json.dumps(databricks_data) if databricks_data else None,
-                    file_data=json.dumps(file_data) if file_data else None,
-                    is_active=True
-                )
+                if self._session_upsert:
+                    # Replace the active session in place with one INSERT ... ON CONFLICT
+                    stmt = pg_insert(UserSession).values(
+                        user_id=user_id,
+                        launch_date=launch_date,
+                        databricks_data=databricks_data or None,
+                        file_data=file_data or None,
+                        is_active=True
+                    )
+                    session.execute(stmt.on_conflict_do_update(
+                        index_elements=['user_id'],
+                        index_where=UserSession.is_active == True,
+                        set_={
+                            'launch_date': stmt.excluded.launch_date,
+                            'databricks_data': stmt.excluded.databricks_data,
+                            'file_data': stmt.excluded.file_data,
+                            'created_at': func.now(),
+                            'updated_at': func.now()
+                        }
+                    ))
+                else:
+                    # Deactivate existing sessions for this user
+                    session.execute(
+                        update(UserSession).where(
+                            UserSession.user_id == user_id,
+                            UserSession.is_active == True
+                        ).values(is_active=False),
+                        execution_options={'synchronize_session': False}
+                    )
+                    
+                    # Create new session
+                    new_session = UserSession(
+                        user_id=user_id,
+                        launch_date=launch_date,
+                        databricks_data=databricks_data or None,
+                        file_data=file_data or None,
+                        is_active=True
+                    )
+                    
+                    session.add(new_session)
                 
-                session.add(new_session)
                 logger.info(f"Stored session for user {user_id}")
+            
+            self._invalidate_session_cache(user_id)
                 
         except Exception as e:
             logger.error(f"Error storing user session: {e}")
     
     def get_user_session(self, user_id: str) -> Optional[Dict]:
         """Retrieve user session data"""
+        with self._session_cache_lock:
+            cached = self._session_cache.get(user_id)
+            generation = self._session_generations.get(user_id, 0)
+        # Copies, so a caller editing its session can't change what other readers get from the cache
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
             with self.get_session() as session:
                 if session is None:
                     return None
                 
-                user_session = session.query(UserSession).filter(
-                    UserSession.user_id == user_id,
-                    UserSession.is_active == True
+                user_session = session.scalars(
+                    select(UserSession).where(
+                        UserSession.user_id == user_id,
+                        UserSession.is_active == True
+                    ).limit(1)
                 ).first()
                 
                 if user_session:
-                    return {
+                    session_data = {
                         'launch_date': user_session.launch_date,
-                        'databricks_data': json.loads(user_session.databricks_data) if user_session.databricks_data else {},
-                        'file_data': json.loads(user_session.file_data) if user_session.file_data else None,
+                        'databricks_data': user_session.databricks_data or {},
+                        'file_data': user_session.file_data or None,
                         'created_at': user_session.created_at,
                         'updated_at': user_session.updated_at
                     }
+                    with self._session_cache_lock:
+                        if self._session_generations.get(user_id, 0) == generation:
+                            self._session_cache[user_id] = session_data
+                    return copy.deepcopy(session_data)
                 
                 return None
                 
@@ -154,28 +303,40 @@ class DatabaseManager:
             logger.error(f"Error retrieving user session: {e}")
             return None
     
+    def _invalidate_session_cache(self, user_id: str):
+        """Drop a cached session after it has been written, and stop in-flight reads from caching the old row"""
+        with self._session_cache_lock:
+            self._session_cache.pop(user_id, None)
+            self._session_generations[user_id] = self._session_generations.get(user_id, 0) + 1
+    
     def update_user_session(self, user_id: str, **kwargs):
         """Update user session data"""
+        unknown = kwargs.keys() - self._UPDATABLE_SESSION_FIELDS
+        if unknown:
+            raise TypeError(f"update_user_session() got unexpected session fields: {', '.join(sorted(unknown))}")
+        if not kwargs:
+            return
+        
         try:
             with self.get_session() as session:
                 if session is None:
                     return
                 
-                user_session = session.query(UserSession).filter(
-                    UserSession.user_id == user_id,
-                    UserSession.is_active == True
-                ).first()
+                values = dict(kwargs, updated_at=func.now())
                 
-                if user_session:
-                    for key, value in kwargs.items():
-                        if hasattr(user_session, key):
-                            if isinstance(value, dict):
-                                setattr(user_session, key, json.dumps(value))
-                            else:
-                                setattr(user_session, key, value)
-                    
-                    user_session.updated_at = datetime.utcnow()
+                # Single UPDATE ... WHERE, no need to load the row first
+                result = session.execute(
+                    update(UserSession).where(
+                        UserSession.user_id == user_id,
+                        UserSession.is_active == True
+                    ).values(**values),
+                    execution_options={'synchronize_session': False}
+                )
+                
+                if result.rowcount:
                     logger.info(f"Updated session for user {user_id}")
+            
+            self._invalidate_session_cache(user_id)
                 
         except Exception as e:
             logger.error(f"Error updating user session: {e}")
@@ -183,27 +344,68 @@ class DatabaseManager:
     def store_metrics(self, user_id: str, command: str, launch_date: Optional[str] = None, 
                      response_time: Optional[int] = None, success: bool = True, 
                      error_message: Optional[str] = None):
-        """Store bot usage metrics"""
+        """Queue bot usage metrics for a batched background insert"""
+        if not self.SessionLocal:
+            return
+        
         try:
-            with self.get_session() as session:
+            self._metrics_queue.put_nowait({
+                'user_id': user_id,
+                'command': command,
+                'launch_date': launch_date,
+                'response_time': response_time,
+                'success': success,
+                'error_message': error_message
+            })
+        except queue.Full:
+            logger.warning(f"Metrics queue full, dropping metric for command {command}")
+    
+    def _metrics_writer(self):
+        """Background loop that drains the metrics queue in batches"""
+        while True:
+            try:
+                first = self._metrics_queue.get(timeout=METRICS_FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+            
+            batch = [first]
+            while len(batch) < METRICS_BATCH_SIZE:
+                try:
+                    batch.append(self._metrics_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            self._write_metrics_batch(batch)
+    
+    def _write_metrics_batch(self, batch: List[Dict[str, Any]]):
+        """Insert a batch of queued metrics in a single transaction"""
+        try:
+            with self._metrics_lock, self.get_session() as session:
                 if session is None:
                     return
                 
-                metric = BotMetrics(
-                    user_id=user_id,
-                    command=command,
-                    launch_date=launch_date,
-                    response_time=response_time,
-                    success=success,
-                    error_message=error_message
-                )
-                
-                session.add(metric)
-                logger.debug(f"Stored metric for user {user_id}, command {command}")
+                session.bulk_insert_mappings(BotMetrics, batch)
+                logger.debug(f"Stored {len(batch)} metrics")
                 
         except Exception as e:
             logger.error(f"Error storing metrics: {e}")
     
+    def flush_metrics(self):
+        """Write any queued metrics immediately (used on shutdown)"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._metrics_queue.get_nowait())
+            except queue.Empty:
+                break
+            
+            if len(batch) >= METRICS_BATCH_SIZE:
+                self._write_metrics_batch(batch)
+                batch = []
+        
+        if batch:
+            self._write_metrics_batch(batch)
+    
     def get_metrics_summary(self, days: int = 30) -> Dict[str, Any]:
         """Get metrics summary for monitoring"""
         try:
@@ -211,44 +413,32 @@ class DatabaseManager:
                 if session is None:
                     return {}
                 
-                cutoff_date = datetime.utcnow() - timedelta(days=days)
-                
-                # Total commands
-                total_commands = session.query(BotMetrics).filter(
-                    BotMetrics.created_at >= cutoff_date
-                ).count()
+                cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
                 
-                # Successful commands
-                successful_commands = session.query(BotMetrics).filter(
-                    BotMetrics.created_at >= cutoff_date,
-                    BotMetrics.success == True
-                ).count()
-                
-                # Command breakdown
-                command_breakdown = session.query(
-                    BotMetrics.command,
-                    session.query(BotMetrics).filter(
-                        BotMetrics.command == BotMetrics.command,
+                # Per-command counts, successes and average response time in one round-trip
+                rows = session.execute(
+                    select(
+                        BotMetrics.command,
+                        func.count(BotMetrics.id).label('total'),
+                        func.sum(case((BotMetrics.success == True, 1), else_=0)).label('successful'),
+                        func.sum(BotMetrics.response_time).label('response_time_sum'),
+                        func.count(BotMetrics.response_time).label('response_time_count')
+                    ).where(
                         BotMetrics.created_at >= cutoff_date
-                    ).count().label('count')
-                ).filter(
-                    BotMetrics.created_at >= cutoff_date
-                ).group_by(BotMetrics.command).all()
+                    ).group_by(BotMetrics.command)
+                ).all()
                 
-                # Average response time
-                avg_response_time = session.query(
-                    session.query(BotMetrics.response_time).filter(
-                        BotMetrics.created_at >= cutoff_date,
-                        BotMetrics.response_time.isnot(None)
-                    ).scalar()
-                ).scalar()
+                total_commands = sum(row.total for row in rows)
+                successful_commands = sum(row.successful or 0 for row in rows)
+                response_time_sum = sum(row.response_time_sum or 0 for row in rows)
+                response_time_count = sum(row.response_time_count for row in rows)
                 
                 return {
                     'total_commands': total_commands,
                     'successful_commands': successful_commands,
                     'success_rate': (successful_commands / total_commands * 100) if total_commands > 0 else 0,
-                    'command_breakdown': {cmd: count for cmd, count in command_breakdown},
-                    'avg_response_time': avg_response_time or 0,
+                    'command_breakdown': {row.command: row.total for row in rows},
+                    'avg_response_time': (response_time_sum / response_time_count) if response_time_count > 0 else 0,
                     'period_days': days
                 }
                 
@@ -259,42 +449,72 @@ class DatabaseManager:
     def cleanup_old_data(self):
         """Clean up old data based on retention policy"""
         try:
-            with self.get_session() as session:
-                if session is None:
-                    return
-                
-                # Clean up old sessions
-                retention_date = datetime.utcnow() - timedelta(days=ProductionConfig.DATA_RETENTION_DAYS)
-                deleted_sessions = session.query(UserSession).filter(
-                    UserSession.created_at < retention_date
-                ).delete()
-                
-                # Clean up old metrics
-                retention_date = datetime.utcnow() - timedelta(days=ProductionConfig.DATA_RETENTION_DAYS)
-                deleted_metrics = session.query(BotMetrics).filter(
-                    BotMetrics.created_at < retention_date
-                ).delete()
-                
-                logger.info(f"Cleaned up {deleted_sessions} old sessions and {deleted_metrics} old metrics")
+            if not self.SessionLocal:
+                return
+            
+            retention_date = datetime.now(timezone.utc) - timedelta(days=ProductionConfig.DATA_RETENTION_DAYS)
+            
+            deleted_sessions = self._delete_older_than(UserSession, retention_date)
+            deleted_metrics = self._delete_older_than(BotMetrics, retention_date)
+            
+            with self._session_cache_lock:
+                self._session_cache.clear()
+            
+            logger.info(f"Cleaned up {deleted_sessions} old sessions and {deleted_metrics} old metrics")
                 
         except Exception as e:
             logger.error(f"Error cleaning up old data: {e}")
     
+    def start_cleanup_scheduler(self, interval: float = CLEANUP_INTERVAL):
+        """Run the retention sweep on a background timer instead of on request"""
+        if not self.SessionLocal or self._cleanup_timer is not None:
+            return
+        
+        def run():
+            self.cleanup_old_data()
+            schedule()
+        
+        def schedule():
+            self._cleanup_timer = threading.Timer(interval, run)
+            self._cleanup_timer.daemon = True
+            self._cleanup_timer.start()
+        
+        schedule()
+        logger.info(f"Scheduled data cleanup every {interval}s")
+    
+    def _delete_older_than(self, model, cutoff: datetime) -> int:
+        """Delete rows created before cutoff server-side, one bounded transaction per batch"""
+        total_deleted = 0
+        while True:
+            batch_ids = select(model.id).where(model.created_at < cutoff).limit(CLEANUP_BATCH_SIZE)
+            with self.get_session() as session:
+                result = session.execute(
+                    delete(model).where(model.id.in_(batch_ids)),
+                    execution_options={'synchronize_session': False}
+                )
+            
+            total_deleted += result.rowcount
+            if result.rowcount < CLEANUP_BATCH_SIZE:
+                return total_deleted
+    
     def health_check(self) -> Dict[str, Any]:
         """Database health check"""
         try:
             if not self.engine:
                 return {'status': 'unavailable', 'message': 'Database not configured'}
             
-            with self.get_session() as session:
-                if session is None:
-                    return {'status': 'unavailable', 'message': 'Database session failed'}
-                
-                # Test query
-                session.execute("SELECT 1")
+            if time.monotonic() - self._last_healthy_at < HEALTH_CHECK_CACHE_SECONDS:
                 return {'status': 'healthy', 'message': 'Database connection successful'}
+            
+            # Ping on a raw pooled connection; no ORM session is needed for this
+            with self.engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+            
+            self._last_healthy_at = time.monotonic()
+            return {'status': 'healthy', 'message': 'Database connection successful'}
                 
         except Exception as e:
+            self._last_healthy_at = 0.0
             return {'status': 'unhealthy', 'message': f'Database error: {str(e)}'}
 
 # Global database manager instance
@@ -1,109 +1,58 @@
+import copy
 import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from databricks.sdk import WorkspaceClient
-from databricks.sdk.service.sql import QueryStatus
-import pandas as pd
+from databricks.sdk.service.sql import QueryStatus, StatementParameterListItem, StatementState
 from typing import Dict, List, Optional
-from config import DATABRICKS_HOST, DATABRICKS_TOKEN, DATABRICKS_CATALOG, DATABRICKS_SCHEMA, DATABRICKS_TABLES
+from cachetools import TTLCache
+from cachetools.keys import hashkey
+from config import DATABRICKS_HOST, DATABRICKS_TOKEN, DATABRICKS_WAREHOUSE_ID, DATABRICKS_FQ_TABLES
 
 logger = logging.getLogger(__name__)
 
-class DatabricksClient:
-    def __init__(self):
-        """Initialize Databricks client with your credentials"""
-        # TODO: Add your Databricks workspace URL and token
-        self.client = WorkspaceClient(
-            host=DATABRICKS_HOST,
-            token=DATABRICKS_TOKEN
-        )
-        
-    def query_vehicle_program_status(self, launch_date: str) -> Dict[str, any]:
-        """
-        Query all department statuses for a given vehicle program launch date
-        
-        Args:
-            launch_date (str): Date in YYYY-MM-DD format
-            
-        Returns:
-            Dict containing status information from all departments
-        """
-        try:
-            results = {}
-            
-            # Query Bill of Material status
-            bom_status = self._query_bom_status(launch_date)
-            results['bill_of_material'] = bom_status
-            
-            # Query Master Parts List status
-            mpl_status = self._query_mpl_status(launch_date)
-            results['master_parts_list'] = mpl_status
-            
-            # Query Material Flow Engineering status
-            mfe_status = self._query_mfe_status(launch_date)
-            results['material_flow_engineering'] = mfe_status
-            
-            # Query 4P status
-            p4_status = self._query_4p_status(launch_date)
-            results['4p'] = p4_status
-            
-            # Query PPAP status
-            ppap_status = self._query_ppap_status(launch_date)
-            results['ppap'] = ppap_status
-            
-            return results
-            
-        except Exception as e:
-            logger.error(f"Error querying vehicle program status: {e}")
-            raise
-    
-    def _query_bom_status(self, launch_date: str) -> Dict:
-        """Query Bill of Material status"""
-        # TODO: Update this query based on your actual BOM table structure
-        query = f"""
+# Recent launch-date results are reused for this long
+STATUS_CACHE_SIZE = 256
+STATUS_CACHE_TTL = 60  # seconds
+
+# Department queries, built once at import with the fully-qualified table names.
+# launch_date is bound as a named parameter so the statement text stays identical across calls.
+# TODO: Update these queries based on your actual table structures
+_BOM_QUERY = f"""
         SELECT 
             part_number,
             part_name,
             status,
             completion_percentage,
             last_updated
-        FROM {DATABRICKS_CATALOG}.{DATABRICKS_SCHEMA}.{DATABRICKS_TABLES['bill_of_material']}
-        WHERE launch_date = '{launch_date}'
+        FROM {DATABRICKS_FQ_TABLES['bill_of_material']}
+        WHERE launch_date = :launch_date
         """
-        return self._execute_query(query, "BOM")
-    
-    def _query_mpl_status(self, launch_date: str) -> Dict:
-        """Query Master Parts List status"""
-        # TODO: Update this query based on your actual MPL table structure
-        query = f"""
+
+_MPL_QUERY = f"""
         SELECT 
             part_id,
             part_description,
             status,
             supplier_info,
             lead_time
-        FROM {DATABRICKS_CATALOG}.{DATABRICKS_SCHEMA}.{DATABRICKS_TABLES['master_parts_list']}
-        WHERE launch_date = '{launch_date}'
+        FROM {DATABRICKS_FQ_TABLES['master_parts_list']}
+        WHERE launch_date = :launch_date
         """
-        return self._execute_query(query, "MPL")
-    
-    def _query_mfe_status(self, launch_date: str) -> Dict:
-        """Query Material Flow Engineering status"""
-        # TODO: Update this query based on your actual MFE table structure
-        query = f"""
+
+_MFE_QUERY = f"""
         SELECT 
             flow_id,
             process_step,
             status,
             cycle_time,
             efficiency_rating
-        FROM {DATABRICKS_CATALOG}.{DATABRICKS_SCHEMA}.{DATABRICKS_TABLES['material_flow_engineering']}
-        WHERE launch_date = '{launch_date}'
+        FROM {DATABRICKS_FQ_TABLES['material_flow_engineering']}
+        WHERE launch_date = :launch_date
         """
-        return self._execute_query(query, "MFE")
-    
-    def _query_4p_status(self, launch_date: str) -> Dict:
-        """Query 4P status"""
-        # TODO: Update this query based on your actual 4P table structure
-        query = f"""
+
+_4P_QUERY = f"""
         SELECT 
             process_id,
             process_name,
@@ -111,43 +60,169 @@ class DatabricksClient:
             people_assigned,
             place_location,
             product_impact
-        FROM {DATABRICKS_CATALOG}.{DATABRICKS_SCHEMA}.{DATABRICKS_TABLES['4p']}
-        WHERE launch_date = '{launch_date}'
+        FROM {DATABRICKS_FQ_TABLES['4p']}
+        WHERE launch_date = :launch_date
         """
-        return self._execute_query(query, "4P")
-    
-    def _query_ppap_status(self, launch_date: str) -> Dict:
-        """Query PPAP status"""
-        # TODO: Update this query based on your actual PPAP table structure
-        query = f"""
+
+_PPAP_QUERY = f"""
         SELECT 
             ppap_id,
             submission_level,
             status,
             approval_date,
             comments
-        FROM {DATABRICKS_CATALOG}.{DATABRICKS_SCHEMA}.{DATABRICKS_TABLES['ppap']}
-        WHERE launch_date = '{launch_date}'
+        FROM {DATABRICKS_FQ_TABLES['ppap']}
+        WHERE launch_date = :launch_date
+        """
+
+# Process-wide WorkspaceClient so its HTTP session and auth are set up once
+_workspace_client = None
+_workspace_client_lock = threading.Lock()
+
+
+def _get_workspace_client() -> WorkspaceClient:
+    """Return the shared WorkspaceClient, creating it on first use"""
+    global _workspace_client
+    if _workspace_client is None:
+        with _workspace_client_lock:
+            if _workspace_client is None:
+                # TODO: Add your Databricks workspace URL and token
+                _workspace_client = WorkspaceClient(
+                    host=DATABRICKS_HOST,
+                    token=DATABRICKS_TOKEN
+                )
+    return _workspace_client
+
+
+class DatabricksClient:
+    def __init__(self):
+        """Initialize Databricks client with your credentials"""
+        self.client = _get_workspace_client()
+        self._status_cache = TTLCache(maxsize=STATUS_CACHE_SIZE, ttl=STATUS_CACHE_TTL)
+        self._status_cache_lock = threading.Lock()
+        
+    def query_vehicle_program_status(self, launch_date: str) -> Dict[str, any]:
+        """
+        Query all department statuses for a given vehicle program launch date
+        
+        Args:
+            launch_date (str): Date in YYYY-MM-DD format
+            
+        Returns:
+            Dict containing status information from all departments
         """
-        return self._execute_query(query, "PPAP")
+        key = hashkey(launch_date)
+        with self._status_cache_lock:
+            results = self._status_cache.get(key)
+        
+        if results is None:
+            results = self._query_departments(launch_date)
+            # A failed department is retried on the next call rather than served for the whole TTL
+            if not any(result.get('status') == 'error' for result in results.values()):
+                with self._status_cache_lock:
+                    self._status_cache[key] = results
+        
+        # Callers get their own copy, so mutating it can't change the cached entry
+        return copy.deepcopy(results)
     
-    def _execute_query(self, query: str, department: str) -> Dict:
-        """Execute SQL query and return results"""
+    def _query_departments(self, launch_date: str) -> Dict[str, Dict]:
+        """Run the five department queries for a launch date"""
         try:
-            # TODO: Implement actual query execution based on your Databricks setup
-            # This is a placeholder - you'll need to implement the actual query execution
-            logger.info(f"Executing query for {department}: {query}")
+            department_queries = {
+                'bill_of_material': self._query_bom_status,
+                'master_parts_list': self._query_mpl_status,
+                'material_flow_engineering': self._query_mfe_status,
+                '4p': self._query_4p_status,
+                'ppap': self._query_ppap_status,
+            }
+            
+            # Department queries are independent network round-trips, so run them concurrently
+            with ThreadPoolExecutor(max_workers=len(department_queries)) as executor:
+                futures = {
+                    executor.submit(query, launch_date): department
+                    for department, query in department_queries.items()
+                }
+                results = {}
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+            
+            # Keep the department order stable for callers
+            return {department: results[department] for department in department_queries}
+            
+        except Exception as e:
+            logger.error(f"Error querying vehicle program status: {e}")
+            raise
+    
+    def invalidate(self, launch_date: str):
+        """Drop the cached status for a launch date so the next query hits Databricks"""
+        with self._status_cache_lock:
+            self._status_cache.pop(hashkey(launch_date), None)
+    
+    def _query_bom_status(self, launch_date: str) -> Dict:
+        """Query Bill of Material status"""
+        return self._execute_query(_BOM_QUERY, "BOM", self._launch_date_parameters(launch_date))
+    
+    def _query_mpl_status(self, launch_date: str) -> Dict:
+        """Query Master Parts List status"""
+        return self._execute_query(_MPL_QUERY, "MPL", self._launch_date_parameters(launch_date))
+    
+    def _query_mfe_status(self, launch_date: str) -> Dict:
+        """Query Material Flow Engineering status"""
+        return self._execute_query(_MFE_QUERY, "MFE", self._launch_date_parameters(launch_date))
+    
+    def _query_4p_status(self, launch_date: str) -> Dict:
+        """Query 4P status"""
+        return self._execute_query(_4P_QUERY, "4P", self._launch_date_parameters(launch_date))
+    
+    def _query_ppap_status(self, launch_date: str) -> Dict:
+        """Query PPAP status"""
+        return self._execute_query(_PPAP_QUERY, "PPAP", self._launch_date_parameters(launch_date))
+    
+    @staticmethod
+    def _launch_date_parameters(launch_date: str) -> List[StatementParameterListItem]:
+        """Bind launch_date as a named statement parameter"""
+        return [StatementParameterListItem(name='launch_date', value=launch_date)]
+    
+    def _execute_query(self, query: str, department: str,
+                       parameters: Optional[List[StatementParameterListItem]] = None) -> Dict:
+        """Execute parameterized SQL query and return results"""
+        try:
+            logger.info(f"Executing query for {department}")
+            
+            if not DATABRICKS_WAREHOUSE_ID:
+                # TODO: Set DATABRICKS_WAREHOUSE_ID to run queries against your SQL warehouse
+                return {
+                    'status': 'success',
+                    'data': [],
+                    'summary': {
+                        'total_items': 0,
+                        'completed': 0,
+                        'pending': 0,
+                        'overdue': 0
+                    }
+                }
+            
+            response = self.client.statement_execution.execute_statement(
+                statement=query,
+                warehouse_id=DATABRICKS_WAREHOUSE_ID,
+                parameters=parameters,
+                wait_timeout='30s'
+            )
+            
+            if response.status.state != StatementState.SUCCEEDED:
+                raise Exception(f"Statement ended in state {response.status.state}")
+            
+            columns = [column.name for column in response.manifest.schema.columns]
+            rows = (response.result.data_array or []) if response.result else []
+            
+            # Summarize straight from the status column of the row arrays
+            status_index = columns.index('status') if 'status' in columns else None
+            statuses = [row[status_index] for row in rows] if status_index is not None else []
             
-            # Placeholder response - replace with actual query execution
             return {
                 'status': 'success',
-                'data': [],  # TODO: Replace with actual query results
-                'summary': {
-                    'total_items': 0,
-                    'completed': 0,
-                    'pending': 0,
-                    'overdue': 0
-                }
+                'data': [dict(zip(columns, row)) for row in rows],
+                'summary': self._summarize_statuses(statuses, len(rows))
             }
             
         except Exception as e:
@@ -164,6 +239,19 @@ class DatabricksClient:
                 }
             }
     
+    @staticmethod
+    def _summarize_statuses(statuses: List[Optional[str]], total_items: int) -> Dict:
+        """Count rows per status value in a single pass"""
+        # Each summary field counts rows whose status column holds that exact value
+        # TODO: Update status values based on your actual table contents
+        counts = Counter(statuses)
+        return {
+            'total_items': total_items,
+            'completed': counts['completed'],
+            'pending': counts['pending'],
+            'overdue': counts['overdue']
+        }
+    
     def create_visualization(self, data: Dict, launch_date: str) -> str:
         """
         Create visualization in Databricks
@@ -14,6 +14,7 @@ NC='\033[0m' # No Color
 # Configuration
 PROJECT_NAME="vehicle-program-slack-bot"
 COMPOSE_FILE="docker-compose.yml"
+HEALTH_URL="http://localhost:9092/health"
 
 # Function to print colored output
 print_status() {
@@ -48,28 +49,9 @@ check_env_file() {
 validate_env() {
     print_status "Validating environment variables..."
     
-    # Check required variables
-    required_vars=(
-        "SLACK_BOT_TOKEN"
-        "SLACK_SIGNING_SECRET"
-        "SLACK_APP_TOKEN"
-        "OPENAI_API_KEY"
-        "DATABRICKS_HOST"
-        "DATABRICKS_TOKEN"
-    )
-    
-    missing_vars=()
-    for var in "${required_vars[@]}"; do
-        if [ -z "${!var}" ]; then
-            missing_vars+=("$var")
-        fi
-    done
-    
-    if [ ${#missing_vars[@]} -ne 0 ]; then
-        print_error "Missing required environment variables:"
-        for var in "${missing_vars[@]}"; do
-            echo "  - $var"
-        done
+    # Same checks the bot runs at startup, so the required list lives only in production_config.py
+    if ! python3 production_config.py; then
+        print_error "Configuration validation failed"
         exit 1
     fi
     
@@ -92,10 +74,28 @@ start_app() {
     # Build and start services
     docker-compose -f $COMPOSE_FILE up -d --build
     
+    wait_for_health
+    
     print_status "Services started successfully"
     print_status "Monitoring dashboard: http://localhost:3000 (admin/admin)"
     print_status "Metrics endpoint: http://localhost:9090/metrics"
-    print_status "Health check: http://localhost:9090/health"
+    print_status "Health check: $HEALTH_URL"
+}
+
+# Function to wait until the bot's health server answers
+wait_for_health() {
+    print_status "Waiting for the bot health check..."
+    
+    for attempt in $(seq 1 30); do
+        if curl -fsS "$HEALTH_URL" > /dev/null 2>&1; then
+            print_status "Bot is healthy"
+            return 0
+        fi
+        sleep 2
+    done
+    
+    print_error "Bot did not become healthy at $HEALTH_URL"
+    exit 1
 }
 
 # Function to stop the application
@@ -126,7 +126,7 @@ show_status() {
     
     echo ""
     print_status "Service URLs:"
-    echo "  - Slack Bot Health: http://localhost:9090/health"
+    echo "  - Slack Bot Health: $HEALTH_URL"
     echo "  - Grafana Dashboard: http://localhost:3000"
     echo "  - Prometheus Metrics: http://localhost:9091"
 }
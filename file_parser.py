@@ -1,25 +1,118 @@
 import logging
 import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
+import openpyxl
 import requests
-from typing import Dict, List, Optional
+import httpx
+import asyncio
+from typing import Dict, List, Optional, Tuple
 import io
-from config import GOOGLE_SHEETS_CREDENTIALS_FILE, GOOGLE_SHEETS_SCOPES, SMARTSHEET_API_TOKEN, ALLOWED_FILE_TYPES
+import os
+import operator
+import re
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+from openpyxl.utils.exceptions import InvalidFileException
+from google_client import get_gspread_client, load_credentials
+from config import GOOGLE_SHEETS_CREDENTIALS_FILE, GOOGLE_SHEETS_SCOPES, SMARTSHEET_API_TOKEN, ALLOWED_FILE_EXTENSIONS
+
+# Rust-backed calamine reader is much faster than openpyxl on large workbooks
+try:
+    from python_calamine import CalamineError, CalamineWorkbook
+except ImportError:
+    CalamineError = CalamineWorkbook = None
+
+# orjson parses large Smartsheet payloads several times faster than the stdlib
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# ijson lets a Smartsheet response be parsed row by row instead of all at once
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 logger = logging.getLogger(__name__)
 
+SMARTSHEET_API_URL = "https://api.smartsheet.com/2.0"
+
+# Upper bound on threads used to parse workbook sheets concurrently
+MAX_SHEET_WORKERS = 8
+
+# Workbooks larger than this are handed to calamine by path so it doesn't keep a second in-memory copy
+WORKBOOK_SPOOL_THRESHOLD = 8 * 1024 * 1024  # bytes
+
+# Parsed Google Sheets are reused until the spreadsheet changes or this TTL expires
+SHEET_CACHE_SIZE = 64
+SHEET_CACHE_TTL = 300  # seconds
+
+# Department keyword in a sheet name, matched anywhere so names like 'BOM_Data' qualify
+_DEPT_RE = re.compile(r'BOM|MPL|MFE|4P|PPAP', re.IGNORECASE)
+
+# TODO: Update these mappings based on your Excel / Google Sheets template structure
+# Column mappings per department - add more department mappings as needed
+_DEPT_MAPPINGS = {
+    'BOM': {
+        'part_number': 'part_number',
+        'part_name': 'part_name',
+        'status': 'status',
+        'completion': 'completion_percentage'
+    },
+    'MPL': {
+        'part_id': 'part_id',
+        'description': 'part_description',
+        'status': 'status',
+        'supplier': 'supplier_info'
+    }
+}
+
+
+# Columns read from sheets that follow a department template; other columns are skipped
+_TEMPLATE_COLUMNS = {
+    'BOM': ['part_number', 'part_name', 'status', 'completion'],
+    'MPL': ['part_id', 'description', 'status', 'supplier']
+}
+
+# Known template column types, so pandas doesn't have to infer them
+_TEMPLATE_DTYPES = {
+    'status': 'category',
+    'completion': 'float32'
+}
+
+
+def _detect_department(sheet_name: str) -> Optional[str]:
+    """Return the department keyword found in a sheet name, if any"""
+    match = _DEPT_RE.search(sheet_name)
+    return match.group(0).upper() if match else None
+
+
+def _compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Shrink a parsed sheet: low-cardinality text becomes categorical, integers are downcast"""
+    # Work by position: uploaded sheets can repeat (or leave blank) header names
+    # Floats stay float64 so part numbers and costs keep their precision
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        if column.dtype == object and column.nunique() < len(df) / 2:
+            df.isetitem(position, column.astype('category'))
+        elif pd.api.types.is_integer_dtype(column.dtype):
+            df.isetitem(position, pd.to_numeric(column, downcast='integer'))
+    
+    return df
+
 class FileParser:
     def __init__(self):
         """Initialize file parser with necessary credentials"""
         # TODO: Add your Google Sheets service account credentials file path
         self.google_creds = None
+        self._sheet_cache = TTLCache(maxsize=SHEET_CACHE_SIZE, ttl=SHEET_CACHE_TTL)
+        self._sheet_cache_lock = threading.Lock()
         if GOOGLE_SHEETS_CREDENTIALS_FILE:
             try:
-                self.google_creds = Credentials.from_service_account_file(
-                    GOOGLE_SHEETS_CREDENTIALS_FILE, 
-                    scopes=GOOGLE_SHEETS_SCOPES
-                )
+                self.google_creds = load_credentials(GOOGLE_SHEETS_CREDENTIALS_FILE, tuple(GOOGLE_SHEETS_SCOPES))
             except Exception as e:
                 logger.error(f"Error loading Google credentials: {e}")
     
@@ -36,7 +129,7 @@ class FileParser:
         """
         try:
             # Read Excel file
-            excel_data = pd.read_excel(io.BytesIO(file_content), sheet_name=None)
+            excel_data = self._read_workbook(file_content, filename)
             
             parsed_data = {
                 'file_type': 'excel',
@@ -45,10 +138,15 @@ class FileParser:
                 'summary': {}
             }
             
-            for sheet_name, df in excel_data.items():
-                # TODO: Update column mapping based on your Excel template structure
-                sheet_data = self._parse_excel_sheet(df, sheet_name)
-                parsed_data['sheets'][sheet_name] = sheet_data
+            # Sheets are independent, so parse them in parallel
+            # TODO: Update column mapping based on your Excel template structure
+            if excel_data:
+                with ThreadPoolExecutor(max_workers=min(MAX_SHEET_WORKERS, len(excel_data))) as executor:
+                    parsed_sheets = executor.map(
+                        lambda item: self._parse_excel_sheet(item[1], item[0]),
+                        excel_data.items()
+                    )
+                    parsed_data['sheets'] = dict(zip(excel_data, parsed_sheets))
             
             # Generate summary
             parsed_data['summary'] = self._generate_summary(parsed_data['sheets'])
@@ -59,6 +157,71 @@ class FileParser:
             logger.error(f"Error parsing Excel file: {e}")
             raise
     
+    def _read_workbook(self, file_content: bytes, filename: str) -> Dict[str, pd.DataFrame]:
+        """Read every sheet of a workbook into a DataFrame, picking the fastest available engine"""
+        extension = os.path.splitext(filename)[1].lower()
+        
+        if extension == '.xls':
+            # Legacy binary workbooks go through xlrd
+            return pd.read_excel(io.BytesIO(file_content), sheet_name=None, engine='xlrd')
+        
+        # Unreadable workbooks raise ValueError whichever engine reads them, as pandas does
+        if CalamineWorkbook is not None:
+            try:
+                if len(file_content) <= WORKBOOK_SPOOL_THRESHOLD:
+                    return self._read_calamine(CalamineWorkbook.from_filelike(io.BytesIO(file_content)))
+                
+                # from_filelike copies the whole upload into calamine; reading from a path doesn't
+                with tempfile.NamedTemporaryFile(suffix=extension) as spooled:
+                    spooled.write(file_content)
+                    spooled.flush()
+                    return self._read_calamine(CalamineWorkbook.from_path(spooled.name))
+            except CalamineError as e:
+                raise ValueError(f"Unable to read workbook {filename}: {e}") from e
+        
+        # Streaming openpyxl reader: no styles, cached values only, memory bounded by the file
+        # (BytesIO shares the bytes object's buffer rather than copying it)
+        try:
+            workbook = openpyxl.load_workbook(io.BytesIO(file_content), read_only=True, data_only=True)
+        except (zipfile.BadZipFile, InvalidFileException) as e:
+            raise ValueError(f"Unable to read workbook {filename}: {e}") from e
+        try:
+            return {
+                worksheet.title: self._rows_to_dataframe(list(worksheet.iter_rows(values_only=True)), worksheet.title)
+                for worksheet in workbook.worksheets
+            }
+        finally:
+            workbook.close()
+    
+    def _read_calamine(self, workbook) -> Dict[str, pd.DataFrame]:
+        """Read every sheet of an open calamine workbook"""
+        return {
+            sheet_name: self._rows_to_dataframe(workbook.get_sheet_by_name(sheet_name).to_python(), sheet_name)
+            for sheet_name in workbook.sheet_names
+        }
+    
+    @staticmethod
+    def _rows_to_dataframe(rows: List[list], sheet_name: str = '') -> pd.DataFrame:
+        """Build a DataFrame from raw sheet rows, using the first row as the header"""
+        if not rows:
+            return pd.DataFrame()
+        
+        # Match pd.read_excel: blank headers become 'Unnamed: n' and empty cells become missing values
+        # (calamine reads both as '', openpyxl as None)
+        header = [f"Unnamed: {position}" if value is None or value == '' else value for position, value in enumerate(rows[0])]
+        body = [[None if value == '' else value for value in row] for row in rows[1:]]
+        
+        template_columns = _TEMPLATE_COLUMNS.get(_detect_department(sheet_name))
+        if not template_columns or not set(template_columns).issubset(header):
+            return pd.DataFrame(body, columns=header)
+        
+        # Sheet follows its department template: keep only the template columns and
+        # apply their known dtypes (falling back to inference if a value doesn't fit)
+        pick = operator.itemgetter(*(header.index(column) for column in template_columns))
+        df = pd.DataFrame([pick(row) for row in body], columns=template_columns)
+        dtypes = {column: dtype for column, dtype in _TEMPLATE_DTYPES.items() if column in template_columns}
+        return df.astype(dtypes, errors='ignore')
+    
     def parse_google_sheets(self, spreadsheet_id: str) -> Dict:
         """
         Parse Google Sheets data
@@ -73,9 +236,16 @@ class FileParser:
             if not self.google_creds:
                 raise Exception("Google credentials not configured")
             
-            gc = gspread.authorize(self.google_creds)
+            gc = get_gspread_client(self.google_creds)
             spreadsheet = gc.open_by_key(spreadsheet_id)
             
+            # Reuse the last parse while the spreadsheet hasn't been modified
+            cache_key = (spreadsheet_id, spreadsheet.get_lastUpdateTime())
+            with self._sheet_cache_lock:
+                cached = self._sheet_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
             parsed_data = {
                 'file_type': 'google_sheets',
                 'spreadsheet_id': spreadsheet_id,
@@ -83,24 +253,47 @@ class FileParser:
                 'summary': {}
             }
             
-            for worksheet in spreadsheet.worksheets():
-                # Get all values from worksheet
-                data = worksheet.get_all_records()
-                df = pd.DataFrame(data)
+            # Fetch every worksheet's values in a single values.batchGet round-trip
+            titles = [worksheet.title for worksheet in spreadsheet.worksheets()]
+            batch = spreadsheet.values_batch_get(
+                [self._quote_sheet_title(title) for title in titles],
+                params={'valueRenderOption': 'UNFORMATTED_VALUE'}
+            )
+            
+            for title, value_range in zip(titles, batch.get('valueRanges', [])):
+                df = self._values_to_dataframe(value_range.get('values', []))
                 
                 # TODO: Update column mapping based on your Google Sheets template structure
-                sheet_data = self._parse_google_sheet(df, worksheet.title)
-                parsed_data['sheets'][worksheet.title] = sheet_data
+                sheet_data = self._parse_google_sheet(df, title)
+                parsed_data['sheets'][title] = sheet_data
             
             # Generate summary
             parsed_data['summary'] = self._generate_summary(parsed_data['sheets'])
             
+            with self._sheet_cache_lock:
+                self._sheet_cache[cache_key] = parsed_data
+            
             return parsed_data
             
         except Exception as e:
             logger.error(f"Error parsing Google Sheets: {e}")
             raise
     
+    @staticmethod
+    def _quote_sheet_title(title: str) -> str:
+        """Quote a worksheet title for use as an A1 range"""
+        return "'" + title.replace("'", "''") + "'"
+    
+    @staticmethod
+    def _values_to_dataframe(values: List[list]) -> pd.DataFrame:
+        """Build a DataFrame from a Sheets value range, padding rows the API trimmed"""
+        if not values:
+            return pd.DataFrame()
+        header = values[0]
+        width = len(header)
+        rows = [row[:width] + [''] * (width - len(row)) for row in values[1:]]
+        return pd.DataFrame(rows, columns=header)
+    
     def parse_smartsheet(self, sheet_id: str) -> Dict:
         """
         Parse Smartsheet data
@@ -112,36 +305,101 @@ class FileParser:
             Parsed data dictionary
         """
         try:
-            # TODO: Add your Smartsheet API token
-            headers = {
-                'Authorization': f'Bearer {SMARTSHEET_API_TOKEN}',
-                'Content-Type': 'application/json'
-            }
-            
             # Get sheet details
-            sheet_url = f"https://api.smartsheet.com/2.0/sheets/{sheet_id}"
-            response = requests.get(sheet_url, headers=headers)
-            response.raise_for_status()
+            with requests.get(f"{SMARTSHEET_API_URL}/sheets/{sheet_id}", headers=self._smartsheet_headers(), stream=True) as response:
+                response.raise_for_status()
+                
+                if ijson is None:
+                    return self._build_smartsheet_result(sheet_id, _json_loads(response.content))
+                
+                # Let urllib3 undo any gzip transfer encoding before ijson reads the body
+                response.raw.decode_content = True
+                sheet_data, rows = self._stream_smartsheet(response.raw)
+                return self._build_smartsheet_result(sheet_id, sheet_data, rows)
             
-            sheet_data = response.json()
+        except Exception as e:
+            logger.error(f"Error parsing Smartsheet: {e}")
+            raise
+    
+    def parse_smartsheets(self, sheet_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Parse several Smartsheet sheets, fetching them concurrently
+        
+        Args:
+            sheet_ids: Smartsheet sheet IDs
             
-            parsed_data = {
-                'file_type': 'smartsheet',
-                'sheet_id': sheet_id,
-                'data': {},
-                'summary': {}
+        Returns:
+            Parsed data dictionary per sheet ID
+        """
+        try:
+            sheets = asyncio.run(self._fetch_smartsheets(sheet_ids))
+            return {
+                sheet_id: self._build_smartsheet_result(sheet_id, sheet_data)
+                for sheet_id, sheet_data in zip(sheet_ids, sheets)
             }
             
-            # TODO: Update parsing logic based on your Smartsheet structure
-            parsed_data['data'] = self._parse_smartsheet_data(sheet_data)
-            parsed_data['summary'] = self._generate_summary({'main': parsed_data['data']})
-            
-            return parsed_data
-            
         except Exception as e:
-            logger.error(f"Error parsing Smartsheet: {e}")
+            logger.error(f"Error parsing Smartsheets: {e}")
             raise
     
+    async def _fetch_smartsheets(self, sheet_ids: List[str]) -> List[Dict]:
+        """Fetch sheet JSON for every ID over one async HTTP client"""
+        async with httpx.AsyncClient(base_url=SMARTSHEET_API_URL, headers=self._smartsheet_headers()) as client:
+            async def fetch(sheet_id: str) -> Dict:
+                response = await client.get(f"/sheets/{sheet_id}")
+                response.raise_for_status()
+                return _json_loads(response.content)
+            
+            return await asyncio.gather(*(fetch(sheet_id) for sheet_id in sheet_ids))
+    
+    @staticmethod
+    def _smartsheet_headers() -> Dict[str, str]:
+        """Smartsheet API request headers"""
+        # TODO: Add your Smartsheet API token
+        return {
+            'Authorization': f'Bearer {SMARTSHEET_API_TOKEN}',
+            'Content-Type': 'application/json'
+        }
+    
+    def _stream_smartsheet(self, stream) -> Tuple[Dict, List[Dict]]:
+        """Incrementally parse Smartsheet JSON, converting each row as soon as it is read"""
+        sheet_data = {'name': 'Unknown', 'columns': []}
+        rows = []
+        builder = target = None
+        
+        # Only one row's raw JSON is held at a time; columns are small and built whole
+        for prefix, event, value in ijson.parse(stream, use_float=True):
+            if builder is None and prefix in ('columns', 'rows.item') and event in ('start_array', 'start_map'):
+                builder, target = ijson.ObjectBuilder(), prefix
+            
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == target and event in ('end_array', 'end_map'):
+                    if target == 'columns':
+                        sheet_data['columns'] = builder.value
+                    else:
+                        rows.append(self._smartsheet_row(builder.value))
+                    builder = None
+            elif prefix == 'name' and event == 'string':
+                sheet_data['name'] = value
+        
+        return sheet_data, rows
+    
+    def _build_smartsheet_result(self, sheet_id: str, sheet_data: Dict, rows: Optional[List[Dict]] = None) -> Dict:
+        """Wrap raw Smartsheet JSON in the parsed data structure"""
+        parsed_data = {
+            'file_type': 'smartsheet',
+            'sheet_id': sheet_id,
+            'data': {},
+            'summary': {}
+        }
+        
+        # TODO: Update parsing logic based on your Smartsheet structure
+        parsed_data['data'] = self._parse_smartsheet_data(sheet_data, rows)
+        parsed_data['summary'] = self._generate_summary({'main': parsed_data['data']})
+        
+        return parsed_data
+    
     def _parse_excel_sheet(self, df: pd.DataFrame, sheet_name: str) -> Dict:
         """Parse individual Excel sheet"""
         # TODO: Update this mapping based on your Excel template structure
@@ -151,28 +409,11 @@ class FileParser:
             'sheet_name': sheet_name,
             'total_rows': len(df),
             'columns': list(df.columns),
-            'data': df.to_dict('records'),
-            'department_mapping': {}
+            'data': _compact_dtypes(df),
+            # Map columns to departments based on your template
+            'department_mapping': dict(_DEPT_MAPPINGS.get(_detect_department(sheet_name), {}))
         }
         
-        # Map columns to departments based on your template
-        # Example mapping - update based on your actual structure
-        if 'BOM' in sheet_name.upper():
-            sheet_data['department_mapping'] = {
-                'part_number': 'part_number',
-                'part_name': 'part_name',
-                'status': 'status',
-                'completion': 'completion_percentage'
-            }
-        elif 'MPL' in sheet_name.upper():
-            sheet_data['department_mapping'] = {
-                'part_id': 'part_id',
-                'description': 'part_description',
-                'status': 'status',
-                'supplier': 'supplier_info'
-            }
-        # Add more department mappings as needed
-        
         return sheet_data
     
     def _parse_google_sheet(self, df: pd.DataFrame, sheet_name: str) -> Dict:
@@ -184,52 +425,37 @@ class FileParser:
             'sheet_name': sheet_name,
             'total_rows': len(df),
             'columns': list(df.columns),
-            'data': df.to_dict('records'),
-            'department_mapping': {}
+            'data': _compact_dtypes(df),
+            # Map columns to departments - same logic as Excel
+            'department_mapping': dict(_DEPT_MAPPINGS.get(_detect_department(sheet_name), {}))
         }
         
-        # Map columns to departments - same logic as Excel
-        if 'BOM' in sheet_name.upper():
-            sheet_data['department_mapping'] = {
-                'part_number': 'part_number',
-                'part_name': 'part_name',
-                'status': 'status',
-                'completion': 'completion_percentage'
-            }
-        elif 'MPL' in sheet_name.upper():
-            sheet_data['department_mapping'] = {
-                'part_id': 'part_id',
-                'description': 'part_description',
-                'status': 'status',
-                'supplier': 'supplier_info'
-            }
-        
         return sheet_data
     
-    def _parse_smartsheet_data(self, sheet_data: Dict) -> Dict:
-        """Parse Smartsheet data structure"""
+    def _parse_smartsheet_data(self, sheet_data: Dict, rows: Optional[List[Dict]] = None) -> Dict:
+        """Parse Smartsheet data structure; ``rows`` holds rows already converted while streaming"""
         # TODO: Update based on your Smartsheet structure
         # This is a placeholder - customize based on your actual Smartsheet format
         
+        # Parse rows
+        if rows is None:
+            rows = [self._smartsheet_row(row) for row in sheet_data.get('rows', ())]
+        
         parsed = {
             'sheet_name': sheet_data.get('name', 'Unknown'),
-            'total_rows': len(sheet_data.get('rows', [])),
-            'columns': [col.get('title', '') for col in sheet_data.get('columns', [])],
-            'data': [],
+            'total_rows': len(rows),
+            'columns': [col.get('title', '') for col in sheet_data.get('columns', ())],
+            'data': rows,
             'department_mapping': {}
         }
         
-        # Parse rows
-        for row in sheet_data.get('rows', []):
-            row_data = {}
-            for cell in row.get('cells', []):
-                column_id = cell.get('columnId')
-                value = cell.get('value', '')
-                row_data[f'col_{column_id}'] = value
-            parsed['data'].append(row_data)
-        
         return parsed
     
+    @staticmethod
+    def _smartsheet_row(row: Dict) -> Dict:
+        """Flatten a Smartsheet row's cells into a column -> value dict"""
+        return {f"col_{cell.get('columnId')}": cell.get('value', '') for cell in row.get('cells', ())}
+    
     def _generate_summary(self, sheets_data: Dict) -> Dict:
         """Generate summary statistics from parsed data"""
         summary = {
@@ -244,19 +470,12 @@ class FileParser:
             summary['total_records'] += sheet_data.get('total_rows', 0)
             
             # Extract department info from sheet name
-            if 'BOM' in sheet_name.upper():
-                summary['departments_found'].append('BOM')
-            elif 'MPL' in sheet_name.upper():
-                summary['departments_found'].append('MPL')
-            elif 'MFE' in sheet_name.upper():
-                summary['departments_found'].append('MFE')
-            elif '4P' in sheet_name.upper():
-                summary['departments_found'].append('4P')
-            elif 'PPAP' in sheet_name.upper():
-                summary['departments_found'].append('PPAP')
+            department = _detect_department(sheet_name)
+            if department:
+                summary['departments_found'].append(department)
         
         return summary
     
     def validate_file_type(self, filename: str) -> bool:
         """Validate if file type is supported"""
-        return any(filename.lower().endswith(ext) for ext in ALLOWED_FILE_TYPES) 
\ No newline at end of file
+        return os.path.splitext(filename)[1].lower() in ALLOWED_FILE_EXTENSIONS 
\ No newline at end of file
@@ -0,0 +1,36 @@
+import logging
+from functools import lru_cache
+from typing import Tuple
+import gspread
+from google.auth.transport.requests import AuthorizedSession
+from google.oauth2.service_account import Credentials
+from googleapiclient.discovery import build
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Keep-alive connection pool shared by every Sheets call made through gspread
+HTTP_POOL_CONNECTIONS = 10
+HTTP_POOL_MAXSIZE = 10
+
+
+@lru_cache(maxsize=1)
+def load_credentials(credentials_file: str, scopes: Tuple[str, ...]) -> Credentials:
+    """Load the service account key once per process; scopes must be a tuple to be hashable"""
+    return Credentials.from_service_account_file(credentials_file, scopes=scopes)
+
+
+@lru_cache(maxsize=1)
+def get_gspread_client(creds) -> gspread.Client:
+    """Return the process-wide gspread client for these credentials"""
+    # One authorized session means TCP/TLS connections are reused across requests
+    session = AuthorizedSession(creds)
+    session.mount('https://', HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE))
+    logger.info("Created shared gspread client")
+    return gspread.Client(auth=creds, session=session)
+
+
+@lru_cache(maxsize=1)
+def get_sheets_service(creds):
+    """Return the process-wide Sheets v4 discovery client for these credentials"""
+    return build('sheets', 'v4', credentials=creds)
@@ -1,13 +1,81 @@
 import logging
-import gspread
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+import itertools
+import numbers
 from typing import Dict, List, Optional
+import numpy as np
 import pandas as pd
+from gspread.urls import SPREADSHEETS_API_V4_BASE_URL, SPREADSHEET_BATCH_UPDATE_URL
 from config import GOOGLE_SHEETS_CREDENTIALS_FILE, GOOGLE_SHEETS_SCOPES, DASHBOARD_TEMPLATE_ID
+from google_client import get_gspread_client, get_sheets_service, load_credentials
 
 logger = logging.getLogger(__name__)
 
+# Department summary fields shown on the Summary sheet, in column order
+SUMMARY_COUNT_FIELDS = ['total_items', 'completed', 'pending', 'overdue']
+
+
+class _SheetBatch:
+    """Accumulates spreadsheets.batchUpdate requests so a dashboard is written in one call"""
+    
+    def __init__(self, existing: Dict[str, int]):
+        self.requests: List[Dict] = []
+        # Sheet IDs by title, fetched once per dashboard and kept current as sheets are queued
+        self.sheet_ids = dict(existing)
+        self._next_ids = itertools.count(max(existing.values(), default=-1) + 1)
+        self._added_grids: Dict[int, Dict] = {}
+    
+    def sheet_id(self, title: str, rows: int, cols: int) -> int:
+        """Return the ID of the sheet titled ``title``, queuing an addSheet if it doesn't exist"""
+        if title in self.sheet_ids:
+            return self.sheet_ids[title]
+        return self.add_sheet(title, rows, cols)
+    
+    def add_sheet(self, title: str, rows: int, cols: int) -> int:
+        """Queue an addSheet request and return the sheet ID reserved for it"""
+        sheet_id = next(self._next_ids)
+        grid = {'rowCount': rows, 'columnCount': cols}
+        self.sheet_ids[title] = sheet_id
+        self._added_grids[sheet_id] = grid
+        self.requests.append({
+            'addSheet': {
+                'properties': {
+                    'sheetId': sheet_id,
+                    'title': title,
+                    'gridProperties': grid
+                }
+            }
+        })
+        return sheet_id
+    
+    def write_values(self, sheet_id: int, values: List[List]):
+        """Queue an updateCells request replacing the sheet's values with ``values`` from A1"""
+        # updateCells does not grow the grid, so size sheets added in this batch to fit
+        grid = self._added_grids.get(sheet_id)
+        if grid is not None:
+            grid['rowCount'] = max(grid['rowCount'], len(values))
+            grid['columnCount'] = max(grid['columnCount'], max(map(len, values), default=0))
+        
+        # A range without bounds covers the whole sheet, so stale values are cleared too
+        self.requests.append({
+            'updateCells': {
+                'range': {'sheetId': sheet_id},
+                'rows': [{'values': [_cell(value) for value in row]} for row in values],
+                'fields': 'userEnteredValue'
+            }
+        })
+
+
+def _cell(value) -> Dict:
+    """Convert a Python value into a CellData payload"""
+    if value is None:
+        return {}
+    if isinstance(value, bool):
+        return {'userEnteredValue': {'boolValue': value}}
+    if isinstance(value, numbers.Real):
+        return {'userEnteredValue': {'numberValue': value}}
+    return {'userEnteredValue': {'stringValue': str(value)}}
+
+
 class GoogleSheetsDashboard:
     def __init__(self):
         """Initialize Google Sheets dashboard creator"""
@@ -17,11 +85,8 @@ class GoogleSheetsDashboard:
         
         if GOOGLE_SHEETS_CREDENTIALS_FILE:
             try:
-                self.creds = Credentials.from_service_account_file(
-                    GOOGLE_SHEETS_CREDENTIALS_FILE, 
-                    scopes=GOOGLE_SHEETS_SCOPES
-                )
-                self.service = build('sheets', 'v4', credentials=self.creds)
+                self.creds = load_credentials(GOOGLE_SHEETS_CREDENTIALS_FILE, tuple(GOOGLE_SHEETS_SCOPES))
+                self.service = get_sheets_service(self.creds)
             except Exception as e:
                 logger.error(f"Error loading Google credentials: {e}")
     
@@ -42,36 +107,47 @@ class GoogleSheetsDashboard:
                 raise Exception("Google credentials not configured")
             
             # Create new spreadsheet
-            gc = gspread.authorize(self.creds)
+            gc = get_gspread_client(self.creds)
+            title = f"Vehicle Program Dashboard - {launch_date}"
             
             # TODO: Add your dashboard template ID if you have one
             if DASHBOARD_TEMPLATE_ID:
                 # Copy from template
-                template = gc.open_by_key(DASHBOARD_TEMPLATE_ID)
-                dashboard = template.copy(title=f"Vehicle Program Dashboard - {launch_date}")
+                dashboard = gc.copy(DASHBOARD_TEMPLATE_ID, title=title)
+                spreadsheet_id, dashboard_url = dashboard.id, dashboard.url
+                existing_sheets = {ws.title: ws.id for ws in dashboard.worksheets()}
             else:
-                # Create new spreadsheet
-                dashboard = gc.create(f"Vehicle Program Dashboard - {launch_date}")
+                # Create new spreadsheet; the response already carries its ID, URL and sheet IDs
+                created = gc.request('post', SPREADSHEETS_API_V4_BASE_URL, json={'properties': {'title': title}}).json()
+                spreadsheet_id, dashboard_url = created['spreadsheetId'], created['spreadsheetUrl']
+                existing_sheets = {
+                    sheet['properties']['title']: sheet['properties']['sheetId']
+                    for sheet in created.get('sheets', [])
+                }
+            
+            # Queue every sheet add and cell write, then submit them in one batchUpdate
+            batch = _SheetBatch(existing_sheets)
+            self._create_summary_sheet(batch, databricks_data, file_data, launch_date)
+            self._create_department_sheets(batch, databricks_data)
+            self._create_file_data_sheets(batch, file_data)
+            self._create_charts_and_visualizations(spreadsheet_id, databricks_data, file_data)
             
-            # Create dashboard sheets
-            self._create_summary_sheet(dashboard, databricks_data, file_data, launch_date)
-            self._create_department_sheets(dashboard, databricks_data)
-            self._create_file_data_sheets(dashboard, file_data)
-            self._create_charts_and_visualizations(dashboard, databricks_data, file_data)
+            if batch.requests:
+                gc.request('post', SPREADSHEET_BATCH_UPDATE_URL % spreadsheet_id, json={'requests': batch.requests})
             
             # Make the spreadsheet accessible
-            dashboard.share('', perm_type='anyone', role='reader')
+            gc.insert_permission(spreadsheet_id, None, perm_type='anyone', role='reader')
             
-            return dashboard.url
+            return dashboard_url
             
         except Exception as e:
             logger.error(f"Error creating dashboard: {e}")
             raise
     
-    def _create_summary_sheet(self, dashboard, databricks_data: Dict, file_data: Optional[Dict], launch_date: str):
+    def _create_summary_sheet(self, batch: _SheetBatch, databricks_data: Dict, file_data: Optional[Dict], launch_date: str):
         """Create summary sheet with overview"""
         try:
-            summary_sheet = dashboard.worksheet('Summary') if 'Summary' in [ws.title for ws in dashboard.worksheets()] else dashboard.add_worksheet(title='Summary', rows=50, cols=20)
+            summary_sheet_id = batch.sheet_id('Summary', rows=50, cols=20)
             
             # Create summary data
             summary_data = [
@@ -85,23 +161,7 @@ class GoogleSheetsDashboard:
             ]
             
             # Add Databricks data
-            for dept, dept_data in databricks_data.items():
-                if dept_data.get('status') == 'success':
-                    summary = dept_data.get('summary', {})
-                    total = summary.get('total_items', 0)
-                    completed = summary.get('completed', 0)
-                    pending = summary.get('pending', 0)
-                    overdue = summary.get('overdue', 0)
-                    completion_pct = (completed / total * 100) if total > 0 else 0
-                    
-                    summary_data.append([
-                        dept.upper(),
-                        total,
-                        completed,
-                        pending,
-                        overdue,
-                        f"{completion_pct:.1f}%"
-                    ])
+            summary_data.extend(self._department_summary_rows(databricks_data))
             
             # Add file data summary if available
             if file_data:
@@ -118,24 +178,23 @@ class GoogleSheetsDashboard:
                 ])
             
             # Update the sheet
-            summary_sheet.clear()
-            summary_sheet.update('A1', summary_data)
+            batch.write_values(summary_sheet_id, summary_data)
             
             # Format the sheet
-            self._format_summary_sheet(summary_sheet)
+            self._format_summary_sheet(summary_sheet_id)
             
         except Exception as e:
             logger.error(f"Error creating summary sheet: {e}")
             raise
     
-    def _create_department_sheets(self, dashboard, databricks_data: Dict):
+    def _create_department_sheets(self, batch: _SheetBatch, databricks_data: Dict):
         """Create individual sheets for each department"""
         try:
             for dept, dept_data in databricks_data.items():
                 if dept_data.get('status') == 'success':
                     # Create or get department sheet
                     sheet_name = f"{dept.upper()}_Status"
-                    dept_sheet = dashboard.worksheet(sheet_name) if sheet_name in [ws.title for ws in dashboard.worksheets()] else dashboard.add_worksheet(title=sheet_name, rows=100, cols=20)
+                    dept_sheet_id = batch.sheet_id(sheet_name, rows=100, cols=20)
                     
                     # TODO: Update this based on your actual data structure
                     # This is a placeholder - customize based on your department data format
@@ -145,83 +204,87 @@ class GoogleSheetsDashboard:
                         # Convert to DataFrame for easier handling
                         df = pd.DataFrame(dept_data_rows)
                         
-                        # Create headers
+                        # Create headers and data rows
                         headers = list(df.columns) if not df.empty else ['No Data Available']
-                        sheet_data = [headers]
-                        
-                        # Add data rows
-                        for _, row in df.iterrows():
-                            sheet_data.append(row.tolist())
+                        sheet_data = [headers] + self._frame_rows(df)
                         
                         # Update sheet
-                        dept_sheet.clear()
-                        dept_sheet.update('A1', sheet_data)
+                        batch.write_values(dept_sheet_id, sheet_data)
                         
                         # Format department sheet
-                        self._format_department_sheet(dept_sheet, dept)
+                        self._format_department_sheet(dept_sheet_id, dept)
                     
         except Exception as e:
             logger.error(f"Error creating department sheets: {e}")
             raise
     
-    def _create_file_data_sheets(self, dashboard, file_data: Optional[Dict]):
+    def _create_file_data_sheets(self, batch: _SheetBatch, file_data: Optional[Dict]):
         """Create sheets for uploaded file data"""
         if not file_data:
             return
         
         try:
-            if file_data.get('file_type') == 'excel':
+            if file_data.get('file_type') in ('excel', 'google_sheets'):
+                # Create sheet for each Excel / Google Sheets worksheet
                 for sheet_name, sheet_data in file_data.get('sheets', {}).items():
-                    # Create sheet for each Excel worksheet
-                    upload_sheet = dashboard.add_worksheet(title=f"Upload_{sheet_name}", rows=100, cols=20)
-                    
-                    # Add data
-                    if sheet_data.get('data'):
-                        df = pd.DataFrame(sheet_data['data'])
-                        headers = list(df.columns)
-                        sheet_data_rows = [headers]
-                        
-                        for _, row in df.iterrows():
-                            sheet_data_rows.append(row.tolist())
-                        
-                        upload_sheet.update('A1', sheet_data_rows)
-            
-            elif file_data.get('file_type') == 'google_sheets':
-                for sheet_name, sheet_data in file_data.get('sheets', {}).items():
-                    # Create sheet for each Google Sheets worksheet
-                    upload_sheet = dashboard.add_worksheet(title=f"Upload_{sheet_name}", rows=100, cols=20)
-                    
-                    # Add data
-                    if sheet_data.get('data'):
-                        df = pd.DataFrame(sheet_data['data'])
-                        headers = list(df.columns)
-                        sheet_data_rows = [headers]
-                        
-                        for _, row in df.iterrows():
-                            sheet_data_rows.append(row.tolist())
-                        
-                        upload_sheet.update('A1', sheet_data_rows)
+                    self._write_records_to_sheet(batch, f"Upload_{sheet_name}", sheet_data.get('data'))
             
             elif file_data.get('file_type') == 'smartsheet':
                 # Create sheet for Smartsheet data
-                upload_sheet = dashboard.add_worksheet(title="Upload_Smartsheet", rows=100, cols=20)
-                
-                smartsheet_data = file_data.get('data', {})
-                if smartsheet_data.get('data'):
-                    df = pd.DataFrame(smartsheet_data['data'])
-                    headers = list(df.columns)
-                    sheet_data_rows = [headers]
-                    
-                    for _, row in df.iterrows():
-                        sheet_data_rows.append(row.tolist())
-                    
-                    upload_sheet.update('A1', sheet_data_rows)
+                self._write_records_to_sheet(batch, "Upload_Smartsheet", file_data.get('data', {}).get('data'))
                     
         except Exception as e:
             logger.error(f"Error creating file data sheets: {e}")
             raise
     
-    def _create_charts_and_visualizations(self, dashboard, databricks_data: Dict, file_data: Optional[Dict]):
+    def _write_records_to_sheet(self, batch: _SheetBatch, title: str, data):
+        """Queue a new sheet holding uploaded data given as a DataFrame or records"""
+        df = self._as_dataframe(data)
+        if df.empty:
+            # Nothing to show, so don't spend a sheet on it
+            return
+        
+        # Size the sheet to the data so Sheets doesn't allocate unused cells
+        upload_sheet_id = batch.add_sheet(title, rows=len(df) + 1, cols=len(df.columns))
+        batch.write_values(upload_sheet_id, [list(df.columns)] + self._frame_rows(df))
+    
+    @staticmethod
+    def _department_summary_rows(databricks_data: Dict) -> List[List]:
+        """Build Summary sheet rows for every successful department in one vectorized pass"""
+        summaries = {
+            dept.upper(): dept_data.get('summary', {})
+            for dept, dept_data in databricks_data.items()
+            if dept_data.get('status') == 'success'
+        }
+        if not summaries:
+            return []
+        
+        counts = pd.DataFrame.from_records(list(summaries.values()), index=list(summaries), columns=SUMMARY_COUNT_FIELDS)
+        counts = counts.fillna(0).astype('int64')
+        total = counts['total_items'].to_numpy()
+        completion_pct = np.divide(counts['completed'].to_numpy(), total, out=np.zeros(len(total)), where=total > 0) * 100
+        
+        rows = counts.astype(object)
+        rows.insert(0, 'department', rows.index)
+        rows['completion_pct'] = np.char.mod('%.1f%%', completion_pct).tolist()
+        return rows.values.tolist()
+    
+    @staticmethod
+    def _as_dataframe(data) -> pd.DataFrame:
+        """Return parsed sheet data as a DataFrame, whether live or restored from the session store"""
+        if isinstance(data, pd.DataFrame):
+            return data
+        if isinstance(data, dict) and 'columns' in data and 'data' in data:
+            # DataFrames are persisted with orient='split'
+            return pd.DataFrame(data['data'], columns=data['columns'])
+        return pd.DataFrame(data or [])
+    
+    @staticmethod
+    def _frame_rows(df: pd.DataFrame) -> List[List]:
+        """Materialize DataFrame rows in one pass, with NaN sent as empty cells"""
+        return df.astype(object).where(df.notna(), None).values.tolist()
+    
+    def _create_charts_and_visualizations(self, spreadsheet_id: str, databricks_data: Dict, file_data: Optional[Dict]):
         """Create charts and visualizations in the dashboard"""
         try:
             # TODO: Implement chart creation using Google Sheets API
@@ -250,7 +313,7 @@ class GoogleSheetsDashboard:
             logger.error(f"Error creating charts: {e}")
             raise
     
-    def _format_summary_sheet(self, sheet):
+    def _format_summary_sheet(self, sheet_id: int):
         """Format the summary sheet with styling"""
         try:
             # TODO: Implement Google Sheets formatting
@@ -261,7 +324,7 @@ class GoogleSheetsDashboard:
             logger.error(f"Error formatting summary sheet: {e}")
             raise
     
-    def _format_department_sheet(self, sheet, department: str):
+    def _format_department_sheet(self, sheet_id: int, department: str):
         """Format department sheet with styling"""
         try:
             # TODO: Implement Google Sheets formatting for department sheets
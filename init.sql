@@ -11,12 +11,36 @@ WHERE NOT EXISTS (SELECT FROM pg_database WHERE datname = 'vehicle_bot')\gexec
 -- Create extensions if needed
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Migrate session blobs from TEXT to JSONB (no-op once converted)
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'user_sessions' AND column_name = 'databricks_data' AND data_type = 'text'
+    ) THEN
+        ALTER TABLE user_sessions
+            ALTER COLUMN databricks_data TYPE JSONB USING databricks_data::jsonb,
+            ALTER COLUMN file_data TYPE JSONB USING file_data::jsonb;
+    END IF;
+END;
+$$;
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_user_sessions_user_id ON user_sessions(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_sessions_created_at ON user_sessions(created_at);
 CREATE INDEX IF NOT EXISTS idx_bot_metrics_user_id ON bot_metrics(user_id);
 CREATE INDEX IF NOT EXISTS idx_bot_metrics_created_at ON bot_metrics(created_at);
 CREATE INDEX IF NOT EXISTS idx_bot_metrics_command ON bot_metrics(command);
+CREATE INDEX IF NOT EXISTS ix_user_sessions_user_active ON user_sessions(user_id, is_active);
+-- Keep only the newest active session per user so the unique index below can be built
+UPDATE user_sessions AS s SET is_active = FALSE
+WHERE s.is_active AND EXISTS (
+    SELECT 1 FROM user_sessions AS newer
+    WHERE newer.user_id = s.user_id AND newer.is_active
+      AND (newer.created_at, newer.id) > (s.created_at, s.id)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_user_sessions_active_user ON user_sessions(user_id) WHERE is_active;
+CREATE INDEX IF NOT EXISTS ix_bot_metrics_created_success ON bot_metrics(created_at, success);
 
 -- Create a view for recent activity
 CREATE OR REPLACE VIEW recent_activity AS
@@ -1,25 +1,139 @@
 import time
+import math
+import functools
+import hashlib
 import logging
+import socket
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 import requests
 import json
 from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
 from flask import Flask, Response
+from waitress import serve
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import threading
 import os
 
 # Import configuration
-from production_config import SENTRY_DSN, METRICS_PORT
+from production_config import SENTRY_DSN, SENTRY_PROFILING, METRICS_PORT, HEALTH_PORT, METRICS_CACHE_TTL
+
+try:
+    import sentry_sdk
+except ImportError:
+    sentry_sdk = None
+
+# orjson encodes the health and metrics payloads straight to bytes, several times faster than the stdlib
+try:
+    import orjson
+
+    def _json_bytes(data: Any, indent: bool = False) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+except ImportError:
+    def _json_bytes(data: Any, indent: bool = False) -> bytes:
+        return json.dumps(data, indent=2 if indent else None).encode('utf-8')
 
 logger = logging.getLogger(__name__)
 
+# Worker threads for the metrics/health server, so concurrent scrapes don't queue
+METRICS_SERVER_THREADS = 4
+
+# Active users are unique user IDs seen over the current and previous window
+ACTIVE_USERS_WINDOW = 3600  # seconds
+ACTIVE_USERS_REFRESH_INTERVAL = 30  # seconds between gauge updates
+
+# Slack handler parameters that carry the requesting user, checked in this order
+SLACK_PAYLOAD_ARGS = ('message', 'event', 'command', 'body')
+
+# Per error type, at most SENTRY_ERROR_BURST events reach Sentry in each SENTRY_ERROR_WINDOW
+SENTRY_ERROR_WINDOW = 60  # seconds
+SENTRY_ERROR_BURST = 10
+
+# Breadcrumbs kept per Sentry scope; the SDK default of 100 is heavy for a long-lived bot
+SENTRY_MAX_BREADCRUMBS = 20
+
+# Latency buckets sized for Slack round-trips; fewer than the defaults, +Inf is added automatically
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
 # Prometheus metrics
+# Keep label values to small fixed sets - per-user labels create a time series per user
 COMMAND_COUNTER = Counter('slack_bot_commands_total', 'Total number of Slack bot commands', ['command', 'status'])
-COMMAND_DURATION = Histogram('slack_bot_command_duration_seconds', 'Duration of Slack bot commands', ['command'])
-ERROR_COUNTER = Counter('slack_bot_errors_total', 'Total number of errors', ['error_type', 'user_id'])
+COMMAND_DURATION = Histogram('slack_bot_command_duration_seconds', 'Duration of Slack bot commands', ['command'], buckets=LATENCY_BUCKETS)
+ERROR_COUNTER = Counter('slack_bot_errors_total', 'Total number of errors', ['error_type'])
 ACTIVE_USERS = Gauge('slack_bot_active_users', 'Number of active users')
-REQUEST_DURATION = Histogram('slack_bot_request_duration_seconds', 'Duration of HTTP requests', ['endpoint'])
+REQUEST_DURATION = Histogram('slack_bot_request_duration_seconds', 'Duration of HTTP requests', ['endpoint'], buckets=LATENCY_BUCKETS)
+
+
+class _HyperLogLog:
+    """Fixed-size unique-count sketch (2**precision one-byte registers)"""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str):
+        """Record a value"""
+        hashed = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        rank = remaining_bits - (hashed & ((1 << remaining_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def union(self, other: '_HyperLogLog') -> '_HyperLogLog':
+        """Return a sketch counting values seen by either sketch"""
+        merged = _HyperLogLog(self.precision)
+        merged.registers = bytearray(map(max, self.registers, other.registers))
+        return merged
+
+    def __len__(self) -> int:
+        """Estimated number of unique values"""
+        registers = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / registers)
+        estimate = alpha * registers * registers / sum(2.0 ** -rank for rank in self.registers)
+        
+        # Small-range correction: linear counting while registers are still empty
+        empty = self.registers.count(0)
+        if estimate <= 2.5 * registers and empty:
+            estimate = registers * math.log(registers / empty)
+        return int(round(estimate))
+
+
+def _drop_throttled_events(event, hint):
+    """Sentry before_send hook: drop events logged while their error type was over budget"""
+    if event.get('extra', {}).get('sentry_throttled'):
+        return None
+    return event
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    """Serves /health from process state only, so a slow /metrics render can't delay liveness probes"""
+
+    def do_GET(self):
+        if self.path != '/health':
+            self.send_error(404)
+            return
+        
+        body = _json_bytes(self.server.monitoring_manager.get_health_status())
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Probes arrive every few seconds; don't write an access log line for each
+        pass
+
+
+def _listening_socket(port: int) -> socket.socket:
+    """Bind the metrics listener up front, so a port already in use fails start_metrics_server"""
+    # No SO_REUSEPORT: each process has its own registry, and a second instance must not bind silently
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('0.0.0.0', port))
+    return sock
 
 
 class MonitoringManager:
@@ -27,17 +141,38 @@ class MonitoringManager:
 
     def __init__(self):
         """Initialize monitoring manager"""
-        self.start_time = time.time()
+        self._restart_clock()
         self.metrics_server = None
         self.metrics_thread = None
+        self.health_server = None
         self.command_counter = {}
         self.error_counter = {}
         
-        # Initialize Sentry if DSN is provided
+        # Running totals kept alongside the per-command/per-error dicts so summaries are O(1)
+        self._counter_lock = threading.Lock()
+        self._reset_totals()
+        
+        # Last /metrics payload as (monotonic render time, bytes), shared by scrapes within METRICS_CACHE_TTL
+        self._last_render = (float('-inf'), b'')
+        self._render_lock = threading.Lock()
+        
+        # Unique users per window, published to ACTIVE_USERS by a refresher started with the metrics server
+        self._active_users = _HyperLogLog()
+        self._previous_active_users = _HyperLogLog()
+        self._active_users_window_start = time.monotonic()
+        
+        # Labelled metric children bound on first use, so the hot path skips .labels() lookups
+        self._command_children = {}
+        self._duration_children = {}
+        
+        # Sentry reporting budget per error type: window start (monotonic) and events sent in it
+        self._sentry_window_start = {}
+        self._sentry_sent = {}
+        
+        # Initialize Sentry if DSN is provided; _sentry stays None unless it is actually live
+        self._sentry = None
         if SENTRY_DSN:
             try:
-                import sentry_sdk
-                from sentry_sdk.integrations.flask import FlaskIntegration
                 from sentry_sdk.integrations.logging import LoggingIntegration
                 
                 sentry_logging = LoggingIntegration(
@@ -45,52 +180,91 @@ class MonitoringManager:
                     event_level=logging.ERROR
                 )
                 
+                # No FlaskIntegration: the Flask app only serves scrapes and probes, which aren't worth tracing
                 sentry_sdk.init(
                     dsn=SENTRY_DSN,
-                    integrations=[FlaskIntegration(), sentry_logging],
+                    integrations=[sentry_logging],
                     traces_sample_rate=0.1,
-                    profiles_sample_rate=0.1,
+                    profiles_sample_rate=0.1 if SENTRY_PROFILING else 0.0,
+                    send_default_pii=False,
+                    max_breadcrumbs=SENTRY_MAX_BREADCRUMBS,
+                    before_send=_drop_throttled_events,
                 )
+                self._sentry = sentry_sdk
                 logger.info("Sentry initialized successfully")
             except ImportError:
                 logger.warning("Sentry SDK not installed - error tracking disabled")
             except Exception as e:
                 logger.error(f"Failed to initialize Sentry: {e}")
         
-        # Start metrics server
-        self.start_metrics_server()
+        # The metrics server is started explicitly by the bot entrypoint, not on import
 
     def start_metrics_server(self):
-        """Start Prometheus metrics server"""
+        """Start the Prometheus metrics server and the separate health server"""
+        if os.environ.get('DISABLE_METRICS_SERVER'):
+            logger.info("Metrics server disabled by DISABLE_METRICS_SERVER")
+            return
+        
+        if self.metrics_thread and self.metrics_thread.is_alive():
+            return
+        
         try:
             app = Flask(__name__)
             
             @app.route('/metrics')
             def metrics():
-                return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+                return Response(self.render_metrics(), mimetype=CONTENT_TYPE_LATEST)
             
+            # Kept for existing scrapers; probes should use the dedicated health server
             @app.route('/health')
             def health():
-                return self.get_health_status()
+                return Response(_json_bytes(self.get_health_status()), mimetype='application/json')
+            
+            metrics_socket = _listening_socket(METRICS_PORT)
             
             def run_server():
-                app.run(host='0.0.0.0', port=METRICS_PORT)
+                # Production WSGI server instead of the single-threaded Werkzeug dev server
+                serve(app, sockets=[metrics_socket], threads=METRICS_SERVER_THREADS)
             
             self.metrics_thread = threading.Thread(target=run_server, daemon=True)
             self.metrics_thread.start()
-            logger.info(f"Metrics server started on port {METRICS_PORT}")
+            
+            self.health_server = ThreadingHTTPServer(('0.0.0.0', HEALTH_PORT), _HealthHandler)
+            self.health_server.monitoring_manager = self
+            threading.Thread(target=self.health_server.serve_forever, daemon=True).start()
+            
+            threading.Thread(target=self._active_users_loop, daemon=True).start()
+            logger.info(f"Metrics server started on port {METRICS_PORT}, health server on port {HEALTH_PORT}")
             
         except Exception as e:
             logger.error(f"Failed to start metrics server: {e}")
 
+    def render_metrics(self) -> bytes:
+        """Return the Prometheus exposition, re-rendering at most once per METRICS_CACHE_TTL"""
+        with self._render_lock:
+            now = time.monotonic()
+            if now - self._last_render[0] >= METRICS_CACHE_TTL:
+                self._last_render = (now, generate_latest())
+            return self._last_render[1]
+
     def track_command(self, command_name: str, success: bool, duration: float, user_id: Optional[str] = None):
         """Track command execution metrics"""
-        try:
-            status = 'success' if success else 'failure'
-            COMMAND_COUNTER.labels(command=command_name, status=status).inc()
-            COMMAND_DURATION.labels(command=command_name).observe(duration)
-            
-            # Track in internal counter for testing
+        status = 'success' if success else 'failure'
+        
+        counter = self._command_children.get((command_name, status))
+        if counter is None:
+            counter = self._command_children.setdefault(
+                (command_name, status), COMMAND_COUNTER.labels(command=command_name, status=status)
+            )
+        counter.inc()
+        
+        histogram = self._duration_children.get(command_name)
+        if histogram is None:
+            histogram = self._duration_children.setdefault(command_name, COMMAND_DURATION.labels(command=command_name))
+        histogram.observe(duration)
+        
+        # Track in internal counter for testing
+        with self._counter_lock:
             if command_name not in self.command_counter:
                 self.command_counter[command_name] = {'success': 0, 'failure': 0, 'total_duration': 0, 'count': 0}
             
@@ -101,49 +275,89 @@ class MonitoringManager:
             else:
                 self.command_counter[command_name]['failure'] += 1
             
-            if user_id:
-                # Track active users (simplified - in production you'd want more sophisticated tracking)
-                ACTIVE_USERS.set(1)  # This is simplified - you'd want to track unique users
-            
-            logger.info(f"Command tracked: {command_name} - {status} - {duration:.2f}s")
+            self._total_commands += 1
+            self._total_duration += duration
+            self._success_count += success
+        
+        if user_id:
+            self._active_users.add(user_id)
+        
+        # Per-call trace at DEBUG with lazy %-formatting: no string is built unless it will be emitted,
+        # and it stays out of Sentry's INFO breadcrumbs
+        logger.debug("Command tracked: %s - %s - %.2fs", command_name, status, duration)
+
+    def _active_users_loop(self):
+        """Periodically publish the active user estimate"""
+        while True:
+            time.sleep(ACTIVE_USERS_REFRESH_INTERVAL)
+            self._refresh_active_users()
+
+    def _refresh_active_users(self):
+        """Rotate the user window if due and set the ACTIVE_USERS gauge"""
+        try:
+            now = time.monotonic()
+            if now - self._active_users_window_start >= ACTIVE_USERS_WINDOW:
+                self._previous_active_users, self._active_users = self._active_users, _HyperLogLog()
+                self._active_users_window_start = now
             
+            ACTIVE_USERS.set(len(self._active_users.union(self._previous_active_users)))
         except Exception as e:
-            logger.error(f"Error tracking command: {e}")
+            logger.error(f"Error refreshing active users: {e}")
 
     def track_error(self, error_type: str, error_message: str, user_id: Optional[str] = None):
         """Track error metrics"""
-        try:
-            ERROR_COUNTER.labels(error_type=error_type, user_id=user_id or 'unknown').inc()
-            
-            # Track in internal counter for testing
+        ERROR_COUNTER.labels(error_type=error_type).inc()
+        
+        # Track in internal counter for testing
+        with self._counter_lock:
             if error_type not in self.error_counter:
                 self.error_counter[error_type] = {'count': 0, 'last_message': '', 'last_occurrence': None}
             
             self.error_counter[error_type]['count'] += 1
             self.error_counter[error_type]['last_message'] = error_message
-            self.error_counter[error_type]['last_occurrence'] = datetime.now().isoformat()
+            # Epoch seconds; formatted only when metrics are requested
+            self.error_counter[error_type]['last_occurrence'] = time.time()
             
-            logger.error(f"Error tracked: {error_type} - {error_message}")
+            self._total_errors += 1
             
-        except Exception as e:
-            logger.error(f"Error tracking error: {e}")
+            # Error storms still count above, but only a bounded number reach Sentry
+            report = self._sentry is not None and self._sentry_allowed(error_type)
+        
+        # User attribution goes to the log record and the Sentry scope, not to metric labels
+        with (self._sentry.push_scope() if report and user_id else nullcontext()) as scope:
+            if scope is not None:
+                scope.set_user({'id': user_id})
+            logger.error(
+                "Error tracked: %s - %s", error_type, error_message,
+                extra={'user_id': user_id, 'sentry_throttled': self._sentry is not None and not report}
+            )
+
+    def _sentry_allowed(self, error_type: str) -> bool:
+        """Spend one unit of this error type's Sentry budget if any is left (caller holds _counter_lock)"""
+        now = time.monotonic()
+        if now - self._sentry_window_start.get(error_type, float('-inf')) >= SENTRY_ERROR_WINDOW:
+            self._sentry_window_start[error_type] = now
+            self._sentry_sent[error_type] = 1
+            return True
+        
+        sent = self._sentry_sent[error_type]
+        if sent < SENTRY_ERROR_BURST:
+            self._sentry_sent[error_type] = sent + 1
+            return True
+        return False
 
     def track_request(self, endpoint: str, duration: float, success: bool):
         """Track HTTP request metrics"""
-        try:
-            REQUEST_DURATION.labels(endpoint=endpoint).observe(duration)
-            logger.info(f"Request tracked: {endpoint} - {duration:.2f}s - {'success' if success else 'failure'}")
-        except Exception as e:
-            logger.error(f"Error tracking request: {e}")
+        REQUEST_DURATION.labels(endpoint=endpoint).observe(duration)
+        logger.debug("Request tracked: %s - %.2fs - %s", endpoint, duration, 'success' if success else 'failure')
 
     def get_health_status(self) -> Dict[str, Any]:
         """Get health status for monitoring"""
         try:
-            uptime = time.time() - self.start_time
             return {
                 'status': 'healthy',
-                'uptime': uptime,
-                'start_time': datetime.fromtimestamp(self.start_time).isoformat(),
+                'uptime': self.uptime(),
+                'start_time': self._start_time_iso,
                 'metrics_server': 'running' if self.metrics_thread and self.metrics_thread.is_alive() else 'stopped'
             }
         except Exception as e:
@@ -157,7 +371,7 @@ class MonitoringManager:
     def get_metrics(self) -> Dict[str, Any]:
         """Get comprehensive metrics for monitoring"""
         try:
-            uptime = time.time() - self.start_time
+            uptime = self.uptime()
             
             # Process command metrics
             commands = {}
@@ -175,14 +389,14 @@ class MonitoringManager:
                 errors[error_type] = {
                     'count': data['count'],
                     'last_message': data['last_message'],
-                    'last_occurrence': data['last_occurrence']
+                    'last_occurrence': datetime.fromtimestamp(data['last_occurrence']).isoformat() if data['last_occurrence'] else None
                 }
             
             return {
                 'uptime': uptime,
                 'commands': commands,
                 'errors': errors,
-                'start_time': datetime.fromtimestamp(self.start_time).isoformat(),
+                'start_time': self._start_time_iso,
                 'metrics_server_status': 'running' if self.metrics_thread and self.metrics_thread.is_alive() else 'stopped'
             }
         except Exception as e:
@@ -197,28 +411,52 @@ class MonitoringManager:
     def reset_metrics(self):
         """Reset all metrics counters"""
         try:
-            self.command_counter = {}
-            self.error_counter = {}
-            self.start_time = time.time()
+            with self._counter_lock:
+                self.command_counter = {}
+                self.error_counter = {}
+                self._reset_totals()
+            self._restart_clock()
             logger.info("Metrics reset successfully")
         except Exception as e:
             logger.error(f"Error resetting metrics: {e}")
 
+    def _restart_clock(self):
+        """Record the start time once, in the forms the status endpoints need"""
+        self.start_time = time.time()
+        self._start_monotonic = time.monotonic()
+        self._start_time_iso = datetime.fromtimestamp(self.start_time).isoformat()
+
+    def uptime(self) -> float:
+        """Seconds since start (or the last reset), immune to wall-clock changes"""
+        return time.monotonic() - self._start_monotonic
+
+    def _reset_totals(self):
+        """Zero the running totals (caller holds _counter_lock once tracking has started)"""
+        self._total_commands = 0
+        self._total_errors = 0
+        self._total_duration = 0.0
+        self._success_count = 0
+
     def get_metrics_summary(self) -> Dict[str, Any]:
         """Get metrics summary for dashboard"""
         try:
-            metrics = self.get_metrics()
-            
-            total_commands = sum(cmd['total_calls'] for cmd in metrics['commands'].values())
-            total_errors = sum(err['count'] for err in metrics['errors'].values())
+            # Read the running totals rather than re-summing every command and error
+            with self._counter_lock:
+                total_commands = self._total_commands
+                total_errors = self._total_errors
+                total_duration = self._total_duration
+                success_count = self._success_count
+                active_commands = len(self.command_counter)
+                error_types = len(self.error_counter)
             
             return {
-                'uptime_hours': metrics['uptime'] / 3600,
+                'uptime_hours': self.uptime() / 3600,
                 'total_commands': total_commands,
                 'total_errors': total_errors,
-                'success_rate': (total_commands - total_errors) / total_commands * 100 if total_commands > 0 else 0,
-                'active_commands': len(metrics['commands']),
-                'error_types': len(metrics['errors'])
+                'success_rate': success_count / total_commands * 100 if total_commands > 0 else 0,
+                'avg_response_time': total_duration / total_commands if total_commands > 0 else 0,
+                'active_commands': active_commands,
+                'error_types': error_types
             }
         except Exception as e:
             logger.error(f"Error getting metrics summary: {e}")
@@ -227,6 +465,7 @@ class MonitoringManager:
                 'total_commands': 0,
                 'total_errors': 0,
                 'success_rate': 0,
+                'avg_response_time': 0,
                 'active_commands': 0,
                 'error_types': 0
             }
@@ -240,18 +479,18 @@ class MonitoringManager:
         except Exception as e:
             logger.error(f"Error cleaning up metrics: {e}")
 
-    def export_metrics(self, format: str = 'prometheus') -> str:
-        """Export metrics in specified format"""
+    def export_metrics(self, format: str = 'prometheus') -> bytes:
+        """Export metrics in specified format, as encoded bytes ready to write out"""
         try:
             if format == 'prometheus':
-                return generate_latest().decode('utf-8')
+                return generate_latest()
             elif format == 'json':
-                return json.dumps(self.get_metrics(), indent=2)
+                return _json_bytes(self.get_metrics(), indent=True)
             else:
                 raise ValueError(f"Unsupported format: {format}")
         except Exception as e:
             logger.error(f"Error exporting metrics: {e}")
-            return ""
+            return b""
 
     def alert_on_threshold(self, metric_name: str, threshold: float, operator: str = '>'):
         """Alert when metric exceeds threshold"""
@@ -283,11 +522,24 @@ class MonitoringManager:
 monitoring_manager = MonitoringManager()
 
 
+def _slack_user(args: tuple, kwargs: dict) -> Optional[str]:
+    """User ID from a Slack handler's payload: message['user'], or event['user_id'] for file_shared"""
+    # Bolt passes payloads by parameter name; direct calls may pass them positionally
+    for payload in (*(kwargs.get(name) for name in SLACK_PAYLOAD_ARGS), *args):
+        if isinstance(payload, dict):
+            user_id = payload.get('user') or payload.get('user_id')
+            if isinstance(user_id, str):
+                return user_id
+    return None
+
+
 def monitor_command(command_name: str):
     """Decorator to monitor command execution"""
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            # Monotonic, high-resolution clock: cheap to read and immune to wall-clock jumps
+            start_ns = time.perf_counter_ns()
             success = False
             try:
                 result = func(*args, **kwargs)
@@ -297,8 +549,8 @@ def monitor_command(command_name: str):
                 monitoring_manager.track_error('command_error', str(e))
                 raise
             finally:
-                duration = time.time() - start_time
-                monitoring_manager.track_command(command_name, success, duration)
+                duration = (time.perf_counter_ns() - start_ns) / 1e9
+                monitoring_manager.track_command(command_name, success, duration, user_id=_slack_user(args, kwargs))
         return wrapper
     return decorator
 
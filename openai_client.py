@@ -1,10 +1,443 @@
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+import httpx
 import openai
 import logging
-from typing import Dict, Optional
-from config import OPENAI_API_KEY, OPENAI_MODEL
+import numpy as np
+import pandas as pd
+from collections import deque
+from datetime import date
+from functools import lru_cache
+from typing import Any, AsyncIterator, Coroutine, Dict, Iterator, List, Optional, Tuple
+from config import OPENAI_API_KEY, OPENAI_FAST_MODEL, OPENAI_MODEL, OPENAI_TIMEOUT
+from production_config import ProductionConfig
+
+# tiktoken gives exact prompt token counts for throttling; without it we estimate from length
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+def _prompt_default(obj: Any) -> Any:
+    """Encode the pandas and numpy values parsed files carry; anything else is a bug, not prompt text"""
+    if isinstance(obj, pd.DataFrame):
+        # Parsed sheets: column names once, then one list per row
+        return obj.to_dict(orient='split', index=False)
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# orjson serializes prompt data with sorted keys, so equal data always yields the same prompt and cache key
+try:
+    import orjson
+
+    def _dump(data: Any) -> str:
+        """Compact, deterministic JSON for prompt data; strings are passed through"""
+        if isinstance(data, str):
+            return data
+        return orjson.dumps(data, default=_prompt_default, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+except ImportError:
+    def _dump(data: Any) -> str:
+        """Compact, deterministic JSON for prompt data; strings are passed through"""
+        if isinstance(data, str):
+            return data
+        return json.dumps(data, default=_prompt_default, sort_keys=True, separators=(',', ':'))
+
+# redis-py backs the response cache; without it every request goes to OpenAI
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
 
 logger = logging.getLogger(__name__)
 
+# Account throughput limits; requests wait for budget instead of triggering 429s
+OPENAI_MAX_REQUESTS_PER_MINUTE = 500
+OPENAI_MAX_TOKENS_PER_MINUTE = 80000
+OPENAI_MAX_CONCURRENT_REQUESTS = 10
+OPENAI_MAX_ATTEMPTS = 5
+OPENAI_RETRY_BASE_DELAY = 1.0  # seconds, doubled on each retry
+OPENAI_FAST_MAX_TOKENS = 400  # instructions and recommendations on the fast model are short
+
+# Circuit breaker: when too many recent attempts time out or fail, stop calling OpenAI for a while
+OPENAI_CIRCUIT_WINDOW = 60  # seconds of attempts considered
+OPENAI_CIRCUIT_MIN_ATTEMPTS = 10  # don't judge the failure rate on fewer attempts than this
+OPENAI_CIRCUIT_FAILURE_RATIO = 0.3
+OPENAI_CIRCUIT_OPEN_SECONDS = 30
+
+# Connection pool of the process-wide async client, shared by every OpenAIClient
+OPENAI_MAX_CONNECTIONS = 100
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = 50
+
+# Response cache keys: prefix plus a hash of the model and prompt
+RESPONSE_CACHE_PREFIX = 'openai:response:'
+
+# Batch API jobs complete within the window at half price, on a separate rate-limit pool
+BATCH_ENDPOINT = '/v1/chat/completions'
+BATCH_COMPLETION_WINDOW = '24h'
+BATCH_POLL_INTERVAL = 60  # seconds between status checks
+BATCH_TERMINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+# The system message is identical for every request, so it is built once and shared.
+# All static instructions live here and the user message carries only the request's data,
+# so every request shares the same prompt prefix and benefits from OpenAI prompt caching.
+SYSTEM_PROMPT_CONTENT = """You are an AI assistant specialized in vehicle program launch analysis.
+You help analyze data from various departments including Bill of Materials, Master Parts List,
+Material Flow Engineering, 4P, and PPAP. Provide clear, actionable insights and recommendations.
+
+Each request starts with a "Task:" line naming one of the tasks below, followed by the data for it.
+Answer with the numbered sections listed for that task.
+
+Department data is a tab-separated table with one row per department. Columns: dept (department),
+status (query status, with the error if the query failed), total (total items), done (completed items),
+pend (pending items), over (overdue items).
+
+Task: program_analysis
+1. Overall status summary
+2. Key issues and risks
+3. Recommendations for improvement
+4. Next steps for launch readiness
+
+Task: recommendations
+1. Priority actions to take
+2. Resource allocation recommendations
+3. Timeline adjustments if needed
+4. Risk mitigation strategies
+5. Success metrics to track
+
+Task: file_analysis
+1. Data quality assessment
+2. Completeness analysis
+3. Key insights from the data
+4. Data validation results
+5. Integration recommendations
+
+Task: upload_instructions
+1. What file formats are accepted
+2. Required data structure
+3. How to upload files
+4. What information will be extracted
+
+Task: combined_analysis
+1. Comprehensive status overview
+2. Data completeness assessment
+3. Identified gaps and issues
+4. Actionable recommendations
+5. Launch readiness score"""
+SYSTEM_MSG = {"role": "system", "content": SYSTEM_PROMPT_CONTENT}
+
+# Department summary counts included in prompts, with their short TSV column names
+DEPARTMENT_SUMMARY_FIELDS = (
+    ('total_items', 'total'),
+    ('completed', 'done'),
+    ('pending', 'pend'),
+    ('overdue', 'over'),
+)
+DEPARTMENT_TABLE_HEADER = '\t'.join(('dept', 'status') + tuple(column for _, column in DEPARTMENT_SUMMARY_FIELDS))
+
+# Background event loop that synchronous callers share, so the async client's
+# connection pool lives on one loop for the whole process
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _shared_loop() -> asyncio.AbstractEventLoop:
+    """Return the background event loop, starting it on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='openai-event-loop', daemon=True).start()
+    return _loop
+
+
+def run_sync(coro: Coroutine) -> Any:
+    """Run an OpenAIClient coroutine from synchronous code and return its result"""
+    return asyncio.run_coroutine_threadsafe(coro, _shared_loop()).result()
+
+
+def iter_sync(stream: AsyncIterator) -> Iterator:
+    """Iterate an OpenAIClient async generator from synchronous code"""
+    loop = _shared_loop()
+    while True:
+        try:
+            yield asyncio.run_coroutine_threadsafe(stream.__anext__(), loop).result()
+        except StopAsyncIteration:
+            return
+
+
+@lru_cache(maxsize=4)
+def _get_client(api_key: str) -> openai.AsyncOpenAI:
+    """Process-wide async client for an API key, so connections and TLS sessions are reused across instances"""
+    # Retries are handled by the runner, which also respects the rate-limit budgets
+    return openai.AsyncOpenAI(
+        api_key=api_key,
+        timeout=OPENAI_TIMEOUT,
+        max_retries=0,
+        http_client=openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+    )
+
+
+# tiktoken encodings by model, loaded off the request path by _warm_encodings
+_encodings: Dict[str, Any] = {}
+
+
+def _load_encodings(models: Tuple[str, ...]):
+    """Load the tiktoken encoding for each model into _encodings"""
+    for model in models:
+        try:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding('cl100k_base')
+        except Exception as e:
+            # tiktoken downloads the BPE file on first use; without it token counts stay estimated
+            logger.warning(f"tiktoken encoding unavailable for {model}, estimating token counts: {e}")
+            continue
+        _encodings[model] = encoding
+
+
+def _warm_encodings(*models: str):
+    """Load tiktoken encodings in the background so a slow or failed download never blocks a request"""
+    missing = tuple(model for model in models if model not in _encodings)
+    if tiktoken is None or not missing:
+        return
+    threading.Thread(target=_load_encodings, args=(missing,), name="tiktoken-warmup", daemon=True).start()
+
+
+def _format_department_data(databricks_data: Dict) -> str:
+    """Department status block for prompts"""
+    # Anything other than query_vehicle_program_status results is passed through as JSON
+    if not all(isinstance(result, dict) for result in databricks_data.values()):
+        return _dump(databricks_data)
+    
+    # Reduce to a hashable snapshot so repeated prompts over the same data reuse one formatted block
+    rows = tuple(
+        (
+            department,
+            result.get('status'),
+            result.get('error'),
+            tuple(result.get('summary', {}).get(field, 0) for field, _ in DEPARTMENT_SUMMARY_FIELDS)
+        )
+        for department, result in databricks_data.items()
+    )
+    return _format_department_rows(rows)
+
+
+@lru_cache(maxsize=128)
+def _format_department_rows(rows: Tuple) -> str:
+    """Format department snapshots built by _format_department_data"""
+    # One TSV row per department costs far fewer tokens than a labelled line per count
+    parts = [DEPARTMENT_TABLE_HEADER]
+    for department, status, error, counts in rows:
+        if error:
+            # Keep the error on its own row by flattening any tabs or newlines in it
+            status = f"{status}: {' '.join(str(error).split())}"
+        parts.append('\t'.join(map(str, (department, status) + counts)))
+    return "\n".join(parts)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling OpenAI while the circuit breaker is open"""
+
+
+class ParallelChatRunner:
+    """Runs chat completions concurrently within request and token per-minute budgets, retrying transient failures"""
+
+    def __init__(self, client, model: str,
+                 max_requests_per_minute: int = OPENAI_MAX_REQUESTS_PER_MINUTE,
+                 max_tokens_per_minute: int = OPENAI_MAX_TOKENS_PER_MINUTE,
+                 max_attempts: int = OPENAI_MAX_ATTEMPTS,
+                 max_concurrent: int = OPENAI_MAX_CONCURRENT_REQUESTS):
+        self.client = client
+        self.model = model
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_tokens_per_minute = max_tokens_per_minute
+        self.max_attempts = max_attempts
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        
+        # Token buckets, refilled continuously up to one minute's budget
+        self._budget_lock = asyncio.Lock()
+        self._available_requests = float(max_requests_per_minute)
+        self._available_tokens = float(max_tokens_per_minute)
+        self._last_refill = time.monotonic()
+        
+        # Circuit breaker state: (timestamp, failed) per attempt in the current window
+        self._outcomes = deque()
+        self._circuit_open_until = 0.0
+
+    async def create(self, messages: list, max_tokens: int, model: Optional[str] = None, **kwargs):
+        """Send one chat completion once the budgets allow it; model defaults to the runner's"""
+        model = model or self.model
+        # Completion tokens count against the limit too, so reserve the full max_tokens up front
+        tokens = self._estimate_tokens(messages, model) + max_tokens
+        
+        for attempt in range(1, self.max_attempts + 1):
+            self._check_circuit()
+            await self._reserve(tokens)
+            try:
+                async with self._semaphore:
+                    # Bound the whole call so a hung request can't hold its slot past the timeout
+                    response = await asyncio.wait_for(self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        **kwargs
+                    ), timeout=OPENAI_TIMEOUT)
+                self._record_outcome(failed=False)
+                return response
+            except (asyncio.TimeoutError, openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError) as e:
+                # 429s are throttling, handled by the budgets; only outages count towards the circuit
+                if not isinstance(e, openai.RateLimitError):
+                    self._record_outcome(failed=True)
+                if attempt == self.max_attempts:
+                    raise
+                delay = OPENAI_RETRY_BASE_DELAY * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                logger.warning(f"OpenAI request failed ({e}), retrying in {delay:.1f}s (attempt {attempt}/{self.max_attempts})")
+                await asyncio.sleep(delay)
+
+    async def stream(self, messages: list, max_tokens: int, model: Optional[str] = None, **kwargs):
+        """Stream one chat completion's chunks, holding a concurrency slot until the stream is drained"""
+        model = model or self.model
+        tokens = self._estimate_tokens(messages, model) + max_tokens
+        
+        for attempt in range(1, self.max_attempts + 1):
+            self._check_circuit()
+            await self._reserve(tokens)
+            started = False
+            try:
+                async with self._semaphore:
+                    stream = await asyncio.wait_for(self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        stream=True,
+                        **kwargs
+                    ), timeout=OPENAI_TIMEOUT)
+                    async with stream:
+                        chunks = stream.__aiter__()
+                        while True:
+                            # Time out each read, not the whole stream: a long answer is fine, a stalled one isn't
+                            try:
+                                chunk = await asyncio.wait_for(chunks.__anext__(), timeout=OPENAI_TIMEOUT)
+                            except StopAsyncIteration:
+                                break
+                            started = True
+                            yield chunk
+                self._record_outcome(failed=False)
+                return
+            except (asyncio.TimeoutError, openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError) as e:
+                if not isinstance(e, openai.RateLimitError):
+                    self._record_outcome(failed=True)
+                # Chunks already reached the caller, so a retry would repeat them
+                if started or attempt == self.max_attempts:
+                    raise
+                delay = OPENAI_RETRY_BASE_DELAY * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                logger.warning(f"OpenAI stream failed ({e}), retrying in {delay:.1f}s (attempt {attempt}/{self.max_attempts})")
+                await asyncio.sleep(delay)
+
+    def _check_circuit(self):
+        """Fail fast while the circuit is open"""
+        remaining = self._circuit_open_until - time.monotonic()
+        if remaining > 0:
+            raise CircuitOpenError(f"OpenAI is temporarily unavailable, try again in {remaining:.0f}s")
+
+    def _record_outcome(self, failed: bool):
+        """Record one attempt and open the circuit if too many recent attempts failed"""
+        now = time.monotonic()
+        self._outcomes.append((now, failed))
+        while now - self._outcomes[0][0] > OPENAI_CIRCUIT_WINDOW:
+            self._outcomes.popleft()
+        
+        failures = sum(1 for _, outcome in self._outcomes if outcome)
+        if len(self._outcomes) >= OPENAI_CIRCUIT_MIN_ATTEMPTS and failures / len(self._outcomes) > OPENAI_CIRCUIT_FAILURE_RATIO:
+            logger.error(f"Opening OpenAI circuit for {OPENAI_CIRCUIT_OPEN_SECONDS}s after {failures}/{len(self._outcomes)} failed attempts")
+            self._circuit_open_until = now + OPENAI_CIRCUIT_OPEN_SECONDS
+            self._outcomes.clear()
+
+    async def _reserve(self, tokens: int):
+        """Wait until one request of this many tokens fits both budgets, then spend it"""
+        tokens = min(tokens, self.max_tokens_per_minute)
+        async with self._budget_lock:
+            while True:
+                self._refill()
+                if self._available_requests >= 1 and self._available_tokens >= tokens:
+                    self._available_requests -= 1
+                    self._available_tokens -= tokens
+                    return
+                
+                # Sleep just long enough for the scarcer budget to cover this request
+                await asyncio.sleep(max(
+                    (1 - self._available_requests) * 60 / self.max_requests_per_minute,
+                    (tokens - self._available_tokens) * 60 / self.max_tokens_per_minute
+                ))
+
+    def _refill(self):
+        """Credit both budgets for the time elapsed since the last refill"""
+        now = time.monotonic()
+        elapsed_minutes = (now - self._last_refill) / 60
+        self._last_refill = now
+        self._available_requests = min(self.max_requests_per_minute, self._available_requests + elapsed_minutes * self.max_requests_per_minute)
+        self._available_tokens = min(self.max_tokens_per_minute, self._available_tokens + elapsed_minutes * self.max_tokens_per_minute)
+
+    def _estimate_tokens(self, messages: list, model: str) -> int:
+        """Prompt token count for throttling"""
+        text = ''.join(message['content'] for message in messages)
+        encoding = _encodings.get(model)
+        if encoding is None:
+            # Roughly four characters per token for English text
+            return len(text) // 4 + 1
+        return len(encoding.encode(text))
+
+
+def _digest(text: str) -> str:
+    """Short stable hash used for cache keys"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """Caches OpenAI responses in Redis by exact prompt"""
+
+    def __init__(self, redis_client, model: str, ttl: int = ProductionConfig.RESPONSE_CACHE_TTL):
+        self.redis = redis_client
+        self.model = model
+        self.ttl = ttl
+
+    async def get(self, prompt: str) -> Optional[str]:
+        """Return the cached response for this exact prompt, or None"""
+        # Prompts carry the launch date and department data, so only an identical prompt may reuse an answer
+        try:
+            cached = await self.redis.get(RESPONSE_CACHE_PREFIX + self._key(prompt))
+            return cached.decode('utf-8') if cached is not None else None
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return None
+
+    async def set(self, prompt: str, response: str):
+        """Store a response under its exact prompt"""
+        try:
+            await self.redis.setex(RESPONSE_CACHE_PREFIX + self._key(prompt), self.ttl, response)
+        except Exception as e:
+            logger.warning(f"Response cache store failed: {e}")
+
+    def _key(self, prompt: str) -> str:
+        """Cache key for a prompt; includes the model so a model change doesn't serve stale answers"""
+        return _digest(f"{self.model}\0{prompt}")
+
 
 class OpenAIClient:
     """OpenAI client for processing vehicle program queries"""
@@ -13,13 +446,30 @@ class OpenAIClient:
         """Initialize OpenAI client"""
         self.api_key = OPENAI_API_KEY or "test-key"
         self.model = OPENAI_MODEL
+        self.fast_model = OPENAI_FAST_MODEL
         # Only create client if API key is available
         if self.api_key and self.api_key != "test-key":
-            self.client = openai.OpenAI(api_key=self.api_key)
+            self.client = _get_client(self.api_key)
+            self.runner = ParallelChatRunner(self.client, self.model)
+            _warm_encodings(self.model, self.fast_model)
+            self.cache = self._create_response_cache()
         else:
             self.client = None
+            self.runner = None
+            self.cache = None
+
+    def _create_response_cache(self) -> Optional[ResponseCache]:
+        """Response cache when it is enabled and Redis is available"""
+        if not ProductionConfig.RESPONSE_CACHE_ENABLED or not ProductionConfig.REDIS_URL or aioredis is None:
+            return None
+        redis_client = aioredis.from_url(
+            ProductionConfig.REDIS_URL,
+            max_connections=ProductionConfig.REDIS_MAX_CONNECTIONS,
+            socket_timeout=ProductionConfig.REDIS_SOCKET_TIMEOUT
+        )
+        return ResponseCache(redis_client, self.model)
 
-    def process_vehicle_program_query(self, launch_date: str, databricks_data: Dict) -> str:
+    async def process_vehicle_program_query(self, launch_date: str, databricks_data: Dict) -> str:
         """
         Process vehicle program query using OpenAI
         Args:
@@ -33,21 +483,125 @@ class OpenAIClient:
                 return "OpenAI client not configured. Please check your API key."
             
             prompt = self._create_analysis_prompt(launch_date, databricks_data)
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
+            return await self._acall_cached(prompt)
         except Exception as e:
             logger.error(f"Error processing OpenAI query: {e}")
             return f"Sorry, I encountered an error while analyzing the data: {str(e)}"
 
-    def analyze_program_status(self, program_data: Dict, launch_date: str) -> str:
+    async def stream_vehicle_program_query(self, launch_date: str, databricks_data: Dict) -> AsyncIterator[str]:
+        """
+        Stream the vehicle program analysis as it is generated
+        Args:
+            launch_date: Vehicle launch date
+            databricks_data: Data from Databricks
+        Yields:
+            Text deltas of the analysis response
+        """
+        try:
+            if not self.client:
+                yield "OpenAI client not configured. Please check your API key."
+                return
+            
+            prompt = self._create_analysis_prompt(launch_date, databricks_data)
+            cached = await self.cache.get(prompt) if self.cache else None
+            if cached is not None:
+                yield cached
+                return
+            
+            parts = []
+            async for chunk in self.runner.stream(self._messages(prompt), 1000, temperature=0.7):
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content or ""
+                    parts.append(delta)
+                    yield delta
+            
+            if self.cache:
+                await self.cache.set(prompt, ''.join(parts))
+        except Exception as e:
+            logger.error(f"Error streaming OpenAI query: {e}")
+            yield f"Sorry, I encountered an error while analyzing the data: {str(e)}"
+
+    async def process_many(self, jobs: List[Tuple[str, Dict]]) -> List[str]:
+        """
+        Process several independent vehicle program queries concurrently
+        Args:
+            jobs: (launch_date, databricks_data) pairs
+        Returns:
+            One analysis response per job, in the same order
+        """
+        # process_vehicle_program_query turns failures into messages, so one bad job can't sink the batch
+        return await asyncio.gather(*(
+            self.process_vehicle_program_query(launch_date, databricks_data)
+            for launch_date, databricks_data in jobs
+        ))
+
+    async def submit_batch(self, jobs: List[Tuple[str, Dict]]) -> str:
+        """
+        Submit vehicle program queries that can wait to the Batch API
+        Args:
+            jobs: (launch_date, databricks_data) pairs
+        Returns:
+            Batch ID to pass to poll_batch and retrieve_batch_results
+        """
+        lines = []
+        for index, (launch_date, databricks_data) in enumerate(jobs):
+            lines.append(json.dumps({
+                "custom_id": f"{index}:{launch_date}",
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": self.model,
+                    "messages": self._messages(self._create_analysis_prompt(launch_date, databricks_data)),
+                    "max_tokens": 1000,
+                    "temperature": 0.7
+                }
+            }))
+        
+        input_file = await self.client.files.create(
+            file=("program_analysis.jsonl", "\n".join(lines).encode('utf-8')),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW
+        )
+        logger.info(f"Submitted batch {batch.id} with {len(jobs)} program analyses")
+        return batch.id
+
+    async def poll_batch(self, batch_id: str, interval: float = BATCH_POLL_INTERVAL):
+        """Wait for a batch to finish and return its final state"""
+        while True:
+            batch = await self.client.batches.retrieve(batch_id)
+            if batch.status in BATCH_TERMINAL_STATUSES:
+                logger.info(f"Batch {batch_id} finished with status {batch.status}")
+                return batch
+            await asyncio.sleep(interval)
+
+    async def retrieve_batch_results(self, batch_id: str) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Stream the results of a finished batch
+        Args:
+            batch_id: ID returned by submit_batch
+        Yields:
+            (custom_id, analysis) pairs; custom_id is "<job index>:<launch date>"
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            logger.error(f"Batch {batch_id} has no output file (status {batch.status})")
+            return
+        
+        async with self.client.files.with_streaming_response.content(batch.output_file_id) as response:
+            async for line in response.iter_lines():
+                if not line:
+                    continue
+                result = json.loads(line)
+                if result.get("error") or result["response"]["status_code"] != 200:
+                    logger.error(f"Batch request {result['custom_id']} failed: {result.get('error') or result['response']['body']}")
+                    continue
+                yield result["custom_id"], result["response"]["body"]["choices"][0]["message"]["content"]
+
+    async def analyze_program_status(self, program_data: Dict, launch_date: str) -> str:
         """
         Analyze program status using OpenAI
         Args:
@@ -58,35 +612,30 @@ class OpenAIClient:
         """
         try:
             prompt = self._create_analysis_prompt(launch_date, program_data)
-            response = self._call_openai_api([
-                {"role": "system", "content": self._get_system_prompt()},
-                {"role": "user", "content": prompt}
-            ])
+            response = await self._acall_cached(prompt)
             return self._validate_response(response)
         except Exception as e:
             logger.error(f"Error analyzing program status: {e}")
             return f"Sorry, I encountered an error while analyzing the program status: {str(e)}"
 
-    def generate_recommendations(self, analysis_data: Dict) -> str:
+    async def generate_recommendations(self, analysis_data: Dict, model: Optional[str] = None) -> str:
         """
         Generate recommendations based on analysis data
         Args:
             analysis_data: Analysis data with status and issues
+            model: Model to use; defaults to the fast model
         Returns:
             Recommendations from OpenAI
         """
         try:
             prompt = self._create_recommendation_prompt(analysis_data)
-            response = self._call_openai_api([
-                {"role": "system", "content": self._get_system_prompt()},
-                {"role": "user", "content": prompt}
-            ])
+            response = await self._acall_openai_api(prompt, OPENAI_FAST_MAX_TOKENS, model or self.fast_model)
             return self._validate_response(response)
         except Exception as e:
             logger.error(f"Error generating recommendations: {e}")
             return f"Sorry, I encountered an error while generating recommendations: {str(e)}"
 
-    def analyze_file_data(self, file_data: Dict) -> str:
+    async def analyze_file_data(self, file_data: Dict) -> str:
         """
         Analyze uploaded file data
         Args:
@@ -96,40 +645,32 @@ class OpenAIClient:
         """
         try:
             prompt = self._create_file_analysis_prompt(file_data)
-            response = self._call_openai_api([
-                {"role": "system", "content": self._get_system_prompt()},
-                {"role": "user", "content": prompt}
-            ])
+            response = await self._acall_openai_api(prompt)
             return self._validate_response(response)
         except Exception as e:
             logger.error(f"Error analyzing file data: {e}")
             return f"Sorry, I encountered an error while analyzing the file data: {str(e)}"
 
-    def generate_file_upload_instructions(self, missing_data: Dict) -> str:
+    async def generate_file_upload_instructions(self, missing_data: Dict, model: Optional[str] = None) -> str:
         """
         Generate instructions for file upload based on missing data
         Args:
             missing_data: Dictionary of missing data categories
+            model: Model to use; defaults to the fast model
         Returns:
             Instructions for file upload
         """
         try:
+            # Without a client these methods answer with their error reply
+            if not self.client:
+                raise RuntimeError("OpenAI client not configured")
             prompt = self._create_upload_prompt(missing_data)
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
+            return await self._acall_openai_api(prompt, OPENAI_FAST_MAX_TOKENS, model or self.fast_model)
         except Exception as e:
             logger.error(f"Error generating upload instructions: {e}")
             return f"Sorry, I encountered an error while generating upload instructions: {str(e)}"
 
-    def analyze_uploaded_data(self, databricks_data: Dict, file_data: Dict) -> str:
+    async def analyze_uploaded_data(self, databricks_data: Dict, file_data: Dict) -> str:
         """
         Analyze combined data from Databricks and uploaded files
         Args:
@@ -139,105 +680,67 @@ class OpenAIClient:
             Analysis of combined data
         """
         try:
+            # Without a client these methods answer with their error reply
+            if not self.client:
+                raise RuntimeError("OpenAI client not configured")
             prompt = self._create_combined_analysis_prompt(databricks_data, file_data)
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1200,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
+            return await self._acall_openai_api(prompt, max_tokens=1200)
         except Exception as e:
             logger.error(f"Error analyzing combined data: {e}")
             return f"Sorry, I encountered an error while analyzing the combined data: {str(e)}"
 
-    def _get_system_prompt(self) -> str:
+    @staticmethod
+    def _get_system_prompt() -> str:
         """Get system prompt for OpenAI"""
-        return """You are an AI assistant specialized in vehicle program launch analysis. 
-        You help analyze data from various departments including Bill of Materials, Master Parts List, 
-        Material Flow Engineering, 4P, and PPAP. Provide clear, actionable insights and recommendations."""
+        return SYSTEM_PROMPT_CONTENT
+
+    @staticmethod
+    def _messages(prompt: str) -> list:
+        """Chat messages for a user prompt, behind the shared system message"""
+        return [SYSTEM_MSG, {"role": "user", "content": prompt}]
 
     def _create_analysis_prompt(self, launch_date: str, databricks_data: Dict) -> str:
         """Create analysis prompt for vehicle program data"""
-        return f"""Analyze the vehicle program launch data for {launch_date}.
-        
-        Databricks Data:
-        {databricks_data}
-        
-        Please provide:
-        1. Overall status summary
-        2. Key issues and risks
-        3. Recommendations for improvement
-        4. Next steps for launch readiness"""
+        return f"Task: program_analysis\n\nLaunch date: {launch_date}\n\nDepartment data:\n{_format_department_data(databricks_data)}"
 
     def _create_recommendation_prompt(self, analysis_data: Dict) -> str:
         """Create prompt for generating recommendations"""
-        return f"""Based on the analysis data, provide specific recommendations:
-        
-        Analysis Data: {analysis_data}
-        
-        Please provide:
-        1. Priority actions to take
-        2. Resource allocation recommendations
-        3. Timeline adjustments if needed
-        4. Risk mitigation strategies
-        5. Success metrics to track"""
+        return f"Task: recommendations\n\nAnalysis data:\n{_dump(analysis_data)}"
 
     def _create_file_analysis_prompt(self, file_data: Dict) -> str:
         """Create prompt for file data analysis"""
-        return f"""Analyze the uploaded file data:
-        
-        File Data: {file_data}
-        
-        Please provide:
-        1. Data quality assessment
-        2. Completeness analysis
-        3. Key insights from the data
-        4. Data validation results
-        5. Integration recommendations"""
+        return f"Task: file_analysis\n\nFile data:\n{_dump(file_data)}"
 
     def _create_upload_prompt(self, missing_data: Dict) -> str:
         """Create prompt for file upload instructions"""
-        return f"""Based on the missing data categories, provide clear instructions for file upload:
-        
-        Missing Data: {missing_data}
-        
-        Please provide:
-        1. What file formats are accepted
-        2. Required data structure
-        3. How to upload files
-        4. What information will be extracted"""
+        return f"Task: upload_instructions\n\nMissing data:\n{_dump(missing_data)}"
 
     def _create_combined_analysis_prompt(self, databricks_data: Dict, file_data: Dict) -> str:
         """Create prompt for combined data analysis"""
-        return f"""Analyze the combined data from Databricks and uploaded files:
-        
-        Databricks Data: {databricks_data}
-        File Data: {file_data}
-        
-        Please provide:
-        1. Comprehensive status overview
-        2. Data completeness assessment
-        3. Identified gaps and issues
-        4. Actionable recommendations
-        5. Launch readiness score"""
-
-    def _call_openai_api(self, messages: list) -> str:
-        """Call OpenAI API with given messages"""
+        return f"Task: combined_analysis\n\nDatabricks data:\n{_format_department_data(databricks_data)}\n\nFile data:\n{_dump(file_data)}"
+
+    async def _acall_openai_api(self, prompt: str, max_tokens: int = 1000, model: Optional[str] = None) -> str:
+        """Call OpenAI API with a user prompt without blocking the event loop"""
         if not self.client:
             return "OpenAI client not configured. Please check your API key."
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            max_tokens=1000,
-            temperature=0.7
-        )
+        response = await self.runner.create(self._messages(prompt), max_tokens, model, temperature=0.7)
         return response.choices[0].message.content
 
+    async def _acall_cached(self, prompt: str, max_tokens: int = 1000) -> str:
+        """_acall_openai_api, answered from the response cache when possible"""
+        if not self.cache:
+            return await self._acall_openai_api(prompt, max_tokens)
+        
+        cached = await self.cache.get(prompt)
+        if cached is not None:
+            return cached
+        
+        response = await self._acall_openai_api(prompt, max_tokens)
+        if response:
+            await self.cache.set(prompt, response)
+        return response
+
     def _validate_response(self, response: str) -> str:
         """Validate OpenAI response"""
         if not response or response.strip() == "":
@@ -1,5 +1,11 @@
+import atexit
 import os
+import queue
+import sys
 import logging.config
+import logging.handlers
+import threading
+from functools import lru_cache
 from datetime import datetime
 from typing import Dict, Any, List
 
@@ -16,22 +22,33 @@ LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 LOG_FILE = os.getenv('LOG_FILE', 'logs/vehicle_bot.log')
 LOG_MAX_SIZE = int(os.getenv('LOG_MAX_SIZE', '10485760'))  # 10MB
 LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+LOG_DETAILED_FORMAT = '%(asctime)s [%(levelname)s] %(name)s:%(lineno)d: %(message)s'
+LOG_BUFFER_SIZE = int(os.getenv('LOG_BUFFER_SIZE', '65536'))  # bytes of log file writes held in memory
+LOG_FLUSH_INTERVAL = float(os.getenv('LOG_FLUSH_INTERVAL', '30'))  # seconds before buffered records are written
 
 # Database Configuration
 DATABASE_URL = os.getenv('DATABASE_URL')
 DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', '10'))
 DATABASE_MAX_OVERFLOW = int(os.getenv('DATABASE_MAX_OVERFLOW', '20'))
 DATABASE_POOL_TIMEOUT = int(os.getenv('DATABASE_POOL_TIMEOUT', '30'))
+DATABASE_POOL_RECYCLE = int(os.getenv('DATABASE_POOL_RECYCLE', '3600'))
 
 # Cache Configuration
 REDIS_URL = os.getenv('REDIS_URL')
 REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '10'))
 REDIS_SOCKET_TIMEOUT = int(os.getenv('REDIS_SOCKET_TIMEOUT', '5'))
 
+# OpenAI Response Cache Configuration (exact prompt matches, stored in REDIS_URL)
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'False').lower() == 'true'
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '28800'))  # seconds; about one shift
+
 # Monitoring Configuration
 METRICS_PORT = int(os.getenv('METRICS_PORT', '9090'))
+HEALTH_PORT = int(os.getenv('HEALTH_PORT', str(METRICS_PORT + 1)))  # liveness endpoint, separate from /metrics
 HEALTH_CHECK_INTERVAL = int(os.getenv('HEALTH_CHECK_INTERVAL', '30'))
 SENTRY_DSN = os.getenv('SENTRY_DSN')
+SENTRY_PROFILING = os.getenv('SENTRY_PROFILING', 'False').lower() == 'true'  # profiler samples every thread; opt-in only
+METRICS_CACHE_TTL = float(os.getenv('METRICS_CACHE_TTL', '1.0'))  # seconds a rendered /metrics payload is reused
 
 # Performance Configuration
 MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', '50'))
@@ -55,6 +72,7 @@ SLACK_APP_TOKEN = os.getenv('SLACK_APP_TOKEN')
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+OPENAI_FAST_MODEL = os.getenv('OPENAI_FAST_MODEL', 'gpt-4o-mini')
 
 # Databricks Configuration
 DATABRICKS_HOST = os.getenv('DATABRICKS_HOST')
@@ -69,101 +87,247 @@ GOOGLE_SHEETS_TOKEN_FILE = os.getenv('GOOGLE_SHEETS_TOKEN_FILE')
 # Smartsheet Configuration
 SMARTSHEET_API_TOKEN = os.getenv('SMARTSHEET_API_TOKEN')
 
+# Settings the bot can't run without, as (name, value) pairs fixed at import
+_REQUIRED_CONFIGS = (
+    ('SLACK_BOT_TOKEN', SLACK_BOT_TOKEN),
+    ('SLACK_SIGNING_SECRET', SLACK_SIGNING_SECRET),
+    ('SLACK_APP_TOKEN', SLACK_APP_TOKEN),
+    ('OPENAI_API_KEY', OPENAI_API_KEY),
+    ('DATABRICKS_HOST', DATABRICKS_HOST),
+    ('DATABRICKS_TOKEN', DATABRICKS_TOKEN),
+)
+
+@lru_cache(maxsize=1)
+def _validate_config() -> Dict[str, Any]:
+    """Validate the settings read at import; they can't change afterwards, so the result is cached"""
+    errors = []
+    warnings = []
+
+    # Required configurations
+    for config_name, config_value in _REQUIRED_CONFIGS:
+        if not config_value:
+            errors.append(f"Missing required configuration: {config_name}")
+
+    # Database configuration
+    if not DATABASE_URL:
+        warnings.append("DATABASE_URL not configured - database features will be disabled")
+
+    # Redis configuration
+    if not REDIS_URL:
+        warnings.append("REDIS_URL not configured - caching will be disabled")
+
+    # Monitoring configuration
+    if not SENTRY_DSN:
+        warnings.append("SENTRY_DSN not configured - error tracking will be limited")
+
+    # Performance warnings
+    if RATE_LIMIT_REQUESTS < 10:
+        warnings.append("RATE_LIMIT_REQUESTS is very low - may impact performance")
+
+    if MAX_FILE_SIZE_MB > 100:
+        warnings.append("MAX_FILE_SIZE_MB is very high - may impact memory usage")
+
+    return {
+        'valid': len(errors) == 0,
+        'errors': errors,
+        'warnings': warnings,
+        'environment': ENVIRONMENT,
+        'debug': DEBUG
+    }
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that buffers writes, flushing on WARNING and above or after flush_interval seconds"""
+
+    def __init__(self, filename: str, buffer_size: int = LOG_BUFFER_SIZE,
+                 flush_interval: float = LOG_FLUSH_INTERVAL, **kwargs):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._flush_timer = None
+        self._size = 0
+        super().__init__(filename, **kwargs)
+
+    def _open(self):
+        """Open the log file with a large write buffer"""
+        stream = open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                      encoding=self.encoding, errors=self.errors)
+        self._size = os.path.getsize(self.baseFilename)
+        return stream
+
+    def emit(self, record: logging.LogRecord):
+        """Buffer one record; unlike StreamHandler it doesn't flush after every write"""
+        try:
+            msg = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            # Size is tracked in memory (characters, close to bytes for log text) because asking
+            # the file for its position would flush the buffer on every record
+            if self.maxBytes > 0 and self._size > 0 and self._size + len(msg) >= self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(msg)
+            self._size += len(msg)
+            
+            if record.levelno >= logging.WARNING:
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self._timed_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        except Exception:
+            self.handleError(record)
+
+    def _timed_flush(self):
+        """Write out records buffered since the timer was started"""
+        self._flush_timer = None
+        self.flush()
+
+    def close(self):
+        """Cancel the pending timed flush; closing flushes the buffer"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        super().close()
+
+# Records for the log file are queued by the calling thread and written by the listener's thread
+_log_queue = queue.SimpleQueue()
+_log_listener = None
+_log_listener_lock = threading.Lock()
+
+def start_log_listener():
+    """Start the background thread that writes queued records to the log file"""
+    global _log_listener
+    with _log_listener_lock:
+        if _log_listener is not None:
+            return
+        file_handler = BufferedRotatingFileHandler(
+            LOG_FILE, maxBytes=LOG_MAX_SIZE, backupCount=LOG_BACKUP_COUNT
+        )
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(logging.Formatter(LOG_DETAILED_FORMAT))
+        _log_listener = logging.handlers.QueueListener(_log_queue, file_handler, respect_handler_level=True)
+        _log_listener.start()
+    # Drain the queue on exit; atexit runs this before logging's own shutdown
+    atexit.register(stop_log_listener)
+
+def stop_log_listener():
+    """Write out any queued records and stop the listener thread"""
+    global _log_listener
+    with _log_listener_lock:
+        if _log_listener is None:
+            return
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+
+def _queue_handler() -> logging.handlers.QueueHandler:
+    """Handler that puts records on _log_queue for the listener thread"""
+    return logging.handlers.QueueHandler(_log_queue)
+
+def _build_logging_config() -> Dict[str, Any]:
+    """Build the logging configuration from the settings above"""
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'standard': {
+                'format': '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+            },
+            'detailed': {
+                'format': LOG_DETAILED_FORMAT
+            }
+        },
+        'handlers': {
+            'console': {
+                'class': 'logging.StreamHandler',
+                'level': 'INFO',
+                'formatter': 'standard',
+                'stream': 'ext://sys.stdout'
+            },
+            'file': {
+                # Enqueue only; start_log_listener(), called right after dictConfig, writes the rotating file.
+                # Built by a factory: dictConfig's own QueueHandler support differs across 3.11-3.13
+                '()': 'production_config._queue_handler',
+                'level': 'DEBUG'
+            }
+        },
+        'loggers': {
+            '': {
+                'handlers': ['console', 'file'],
+                'level': LOG_LEVEL,
+                'propagate': False
+            },
+            'slack_bolt': {
+                'handlers': ['console', 'file'],
+                'level': 'INFO',
+                'propagate': False
+            },
+            'openai': {
+                'handlers': ['console', 'file'],
+                'level': 'INFO',
+                'propagate': False
+            }
+        }
+    }
+
+
+# Built once at import; dictConfig doesn't modify the dict, so every caller can share it
+_LOGGING_CONFIG = _build_logging_config()
+
 class ProductionConfig:
     """Production configuration class"""
     
+    # Slack
+    SLACK_BOT_TOKEN = SLACK_BOT_TOKEN
+    SLACK_SIGNING_SECRET = SLACK_SIGNING_SECRET
+    SLACK_APP_TOKEN = SLACK_APP_TOKEN
+    
+    # Files
+    MAX_FILE_SIZE = MAX_FILE_SIZE_MB * 1024 * 1024  # bytes
+    
+    # Database
+    DATABASE_URL = DATABASE_URL
+    DATABASE_POOL_SIZE = DATABASE_POOL_SIZE
+    DATABASE_MAX_OVERFLOW = DATABASE_MAX_OVERFLOW
+    DATABASE_POOL_TIMEOUT = DATABASE_POOL_TIMEOUT
+    DATABASE_POOL_RECYCLE = DATABASE_POOL_RECYCLE
+    DATA_RETENTION_DAYS = DATA_RETENTION_DAYS
+    
+    # Cache
+    REDIS_URL = REDIS_URL
+    REDIS_MAX_CONNECTIONS = REDIS_MAX_CONNECTIONS
+    REDIS_SOCKET_TIMEOUT = REDIS_SOCKET_TIMEOUT
+    RESPONSE_CACHE_ENABLED = RESPONSE_CACHE_ENABLED
+    RESPONSE_CACHE_TTL = RESPONSE_CACHE_TTL
+    
+    # Monitoring
+    METRICS_PORT = METRICS_PORT
+    HEALTH_PORT = HEALTH_PORT
+    METRICS_CACHE_TTL = METRICS_CACHE_TTL
+    
     @classmethod
     def validate_config(cls) -> Dict[str, Any]:
         """Validate configuration and return status"""
-        errors = []
-        warnings = []
-        
-        # Required configurations
-        required_configs = {
-            'SLACK_BOT_TOKEN': SLACK_BOT_TOKEN,
-            'SLACK_SIGNING_SECRET': SLACK_SIGNING_SECRET,
-            'SLACK_APP_TOKEN': SLACK_APP_TOKEN,
-            'OPENAI_API_KEY': OPENAI_API_KEY,
-            'DATABRICKS_HOST': DATABRICKS_HOST,
-            'DATABRICKS_TOKEN': DATABRICKS_TOKEN,
-        }
-        
-        for config_name, config_value in required_configs.items():
-            if not config_value:
-                errors.append(f"Missing required configuration: {config_name}")
-        
-        # Database configuration
-        if not DATABASE_URL:
-            warnings.append("DATABASE_URL not configured - database features will be disabled")
-        
-        # Redis configuration
-        if not REDIS_URL:
-            warnings.append("REDIS_URL not configured - caching will be disabled")
-        
-        # Monitoring configuration
-        if not SENTRY_DSN:
-            warnings.append("SENTRY_DSN not configured - error tracking will be limited")
-        
-        # Performance warnings
-        if RATE_LIMIT_REQUESTS < 10:
-            warnings.append("RATE_LIMIT_REQUESTS is very low - may impact performance")
-        
-        if MAX_FILE_SIZE_MB > 100:
-            warnings.append("MAX_FILE_SIZE_MB is very high - may impact memory usage")
-        
-        return {
-            'valid': len(errors) == 0,
-            'errors': errors,
-            'warnings': warnings,
-            'environment': ENVIRONMENT,
-            'debug': DEBUG
-        }
+        return _validate_config()
     
     @classmethod
     def get_logging_config(cls) -> Dict[str, Any]:
         """Get logging configuration"""
-        return {
-            'version': 1,
-            'disable_existing_loggers': False,
-            'formatters': {
-                'standard': {
-                    'format': '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
-                },
-                'detailed': {
-                    'format': '%(asctime)s [%(levelname)s] %(name)s:%(lineno)d: %(message)s'
-                }
-            },
-            'handlers': {
-                'console': {
-                    'class': 'logging.StreamHandler',
-                    'level': 'INFO',
-                    'formatter': 'standard',
-                    'stream': 'ext://sys.stdout'
-                },
-                'file': {
-                    'class': 'logging.handlers.RotatingFileHandler',
-                    'level': 'DEBUG',
-                    'formatter': 'detailed',
-                    'filename': LOG_FILE,
-                    'maxBytes': LOG_MAX_SIZE,
-                    'backupCount': LOG_BACKUP_COUNT
-                }
-            },
-            'loggers': {
-                '': {
-                    'handlers': ['console', 'file'],
-                    'level': LOG_LEVEL,
-                    'propagate': False
-                },
-                'slack_bolt': {
-                    'handlers': ['console', 'file'],
-                    'level': 'INFO',
-                    'propagate': False
-                },
-                'openai': {
-                    'handlers': ['console', 'file'],
-                    'level': 'INFO',
-                    'propagate': False
-                }
-            }
-        } 
\ No newline at end of file
+        return _LOGGING_CONFIG
+
+
+def main() -> int:
+    """Check the configuration before deploying; exits non-zero when it is invalid"""
+    validation = ProductionConfig.validate_config()
+    for error in validation['errors']:
+        print(f"❌ {error}")
+    for warning in validation['warnings']:
+        print(f"⚠️  {warning}")
+    if not validation['valid']:
+        return 1
+    print(f"✅ Configuration valid for {validation['environment']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
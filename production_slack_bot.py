@@ -1,27 +1,111 @@
+import importlib
 import logging
 import logging.config
 import re
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import cached_property
 from typing import Dict, Optional
 from slack_bolt import App
 from slack_bolt.adapter.socket_mode import SocketModeHandler
 from slack_bolt.context.say import Say
 from slack_bolt.context.ack import Ack
 
-from production_config import ProductionConfig
-from databricks_client import DatabricksClient
-from openai_client import OpenAIClient
-from file_parser import FileParser
-from google_sheets_dashboard import GoogleSheetsDashboard
+from production_config import ProductionConfig, start_log_listener, stop_log_listener
 from database import db_manager
 from monitoring import monitoring_manager, monitor_command, monitor_error
 
-# Configure logging
+# Configure logging; the listener starts with the QueueHandler so queued records always reach the file
 logging.config.dictConfig(ProductionConfig.get_logging_config())
+start_log_listener()
 logger = logging.getLogger(__name__)
 
+def _lazy(module_name: str, attribute: str):
+    """Return a callable that imports module_name the first time attribute is called"""
+    def load(*args, **kwargs):
+        return getattr(importlib.import_module(module_name), attribute)(*args, **kwargs)
+    load.__name__ = attribute
+    return load
+
+# Client modules pull in openai, pandas, googleapiclient and the Databricks connector, so they
+# are only imported once a handler needs them (/help and /status never load them)
+DatabricksClient = _lazy('databricks_client', 'DatabricksClient')
+OpenAIClient = _lazy('openai_client', 'OpenAIClient')
+iter_sync = _lazy('openai_client', 'iter_sync')
+run_sync = _lazy('openai_client', 'run_sync')
+FileParser = _lazy('file_parser', 'FileParser')
+GoogleSheetsDashboard = _lazy('google_sheets_dashboard', 'GoogleSheetsDashboard')
+
+# Streamed replies are edited at sentence boundaries, at most once per STREAM_MIN_UPDATE_INTERVAL
+# to stay under Slack's chat.update rate limit, and at least every STREAM_MAX_UPDATE_INTERVAL
+STREAM_MIN_UPDATE_INTERVAL = 1.0  # seconds
+STREAM_MAX_UPDATE_INTERVAL = 2.0  # seconds
+SENTENCE_BOUNDARY = re.compile(r'[.!?]\s')
+
+# Command and launch-date patterns, compiled once for every bot instance
+VEHICLE_COMMAND = re.compile(r"^/vehicle.*", re.IGNORECASE)
+UPLOAD_COMMAND = re.compile(r"^/upload.*", re.IGNORECASE)
+HELP_COMMAND = re.compile(r"^/help.*", re.IGNORECASE)
+DASHBOARD_COMMAND = re.compile(r"^/dashboard.*", re.IGNORECASE)
+STATUS_COMMAND = re.compile(r"^/status.*", re.IGNORECASE)
+LAUNCH_DATE = re.compile(r'\b(\d{4}-\d{2}-\d{2})\b')  # YYYY-MM-DD
+
+# Static replies, built once instead of inside every handler call
+UPLOAD_INSTRUCTIONS = """
+📁 *File Upload Instructions*
+
+You can upload the following file types:
+• **Excel files** (.xlsx, .xls)
+• **Google Sheets** (share the spreadsheet ID)
+• **Smartsheet** (provide the sheet ID)
+
+*For Excel files:* Simply upload the file in this channel
+*For Google Sheets:* Use `/upload google [spreadsheet-id]`
+*For Smartsheet:* Use `/upload smartsheet [sheet-id]`
+
+The file should contain vehicle program data with columns for:
+• Part numbers/IDs
+• Status information
+• Completion percentages
+• Department assignments
+"""
+
+HELP_TEXT = """
+🤖 *Vehicle Program Slack Bot - Help*
+
+*Available Commands:*
+
+🚗 `/vehicle [launch-date]` - Query vehicle program status
+   Example: `/vehicle 2024-03-15`
+
+📁 `/upload` - Get instructions for uploading data files
+   Supports: Excel, Google Sheets, Smartsheet
+
+📊 `/dashboard` - Create Google Sheets dashboard
+   Combines Databricks data with uploaded files
+
+📈 `/status` - Check system status and metrics
+
+❓ `/help` - Show this help message
+
+*Workflow:*
+1. Start with `/vehicle [launch-date]` to query Databricks
+2. Optionally upload additional data files
+3. Use `/dashboard` to create comprehensive reporting
+
+*Data Sources:*
+• Bill of Material (BOM)
+• Master Parts List (MPL)
+• Material Flow Engineering (MFE)
+• 4P (People, Process, Place, Product)
+• PPAP (Production Part Approval Process)
+
+*Support:*
+For issues or questions, contact your system administrator.
+"""
+
 class ProductionSlackBot:
     """Production-ready Slack bot with monitoring and error handling"""
     
@@ -42,38 +126,53 @@ class ProductionSlackBot:
             signing_secret=ProductionConfig.SLACK_SIGNING_SECRET
         )
         
-        # Initialize clients with production settings
-        self.databricks_client = DatabricksClient()
-        self.openai_client = OpenAIClient()
-        self.file_parser = FileParser()
-        self.dashboard_creator = GoogleSheetsDashboard()
-        
         # Initialize monitoring
         monitoring_manager.start_metrics_server()
+        db_manager.start_cleanup_scheduler()
         
         # Register event handlers
         self._register_handlers()
         
         logger.info("Production Slack bot initialized successfully")
     
+    @cached_property
+    def databricks_client(self):
+        """Databricks client, created on first use"""
+        return DatabricksClient()
+    
+    @cached_property
+    def openai_client(self):
+        """OpenAI client, created on first use"""
+        return OpenAIClient()
+    
+    @cached_property
+    def file_parser(self):
+        """File parser, created on first use"""
+        return FileParser()
+    
+    @cached_property
+    def dashboard_creator(self):
+        """Google Sheets dashboard creator, created on first use"""
+        return GoogleSheetsDashboard()
+    
     def _register_handlers(self):
         """Register all Slack event handlers with monitoring"""
         
-        @self.app.message(re.compile(r"^/vehicle.*", re.IGNORECASE))
+        @self.app.message(VEHICLE_COMMAND)
         @monitor_command("vehicle_query")
         def handle_vehicle_command(message, say: Say, ack: Ack):
             """Handle vehicle program queries with monitoring"""
             ack()
             self._handle_vehicle_program_query(message, say)
         
-        @self.app.message(re.compile(r"^/upload.*", re.IGNORECASE))
+        @self.app.message(UPLOAD_COMMAND)
         @monitor_command("upload_request")
         def handle_upload_command(message, say: Say, ack: Ack):
             """Handle file upload requests with monitoring"""
             ack()
             self._handle_upload_request(message, say)
         
-        @self.app.message(re.compile(r"^/help.*", re.IGNORECASE))
+        @self.app.message(HELP_COMMAND)
         @monitor_command("help_request")
         def handle_help_command(message, say: Say, ack: Ack):
             """Handle help requests with monitoring"""
@@ -86,14 +185,14 @@ class ProductionSlackBot:
             """Handle file uploads with monitoring"""
             self._handle_file_upload(event, say)
         
-        @self.app.message(re.compile(r"^/dashboard.*", re.IGNORECASE))
+        @self.app.message(DASHBOARD_COMMAND)
         @monitor_command("dashboard_request")
         def handle_dashboard_command(message, say: Say, ack: Ack):
             """Handle dashboard creation requests with monitoring"""
             ack()
             self._handle_dashboard_request(message, say)
         
-        @self.app.message(re.compile(r"^/status.*", re.IGNORECASE))
+        @self.app.message(STATUS_COMMAND)
         @monitor_command("status_request")
         def handle_status_command(message, say: Say, ack: Ack):
             """Handle status requests with monitoring"""
@@ -123,16 +222,22 @@ class ProductionSlackBot:
             # Query Databricks for all department statuses
             databricks_data = self.databricks_client.query_vehicle_program_status(launch_date)
             
-            # Process with OpenAI
-            analysis = self.openai_client.process_vehicle_program_query(launch_date, databricks_data)
-            
-            # Create visualization in Databricks
-            visualization_url = self.databricks_client.create_visualization(databricks_data, launch_date)
-            
-            # Store session data
-            db_manager.store_user_session(user_id, launch_date, databricks_data)
+            # The visualization and session storage don't depend on the analysis, so they run while it streams
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                visualization = executor.submit(self.databricks_client.create_visualization, databricks_data, launch_date)
+                stored = executor.submit(db_manager.store_user_session, user_id, launch_date, databricks_data)
+                
+                # Stream the OpenAI analysis into one message so the user sees it as it is written
+                header = f"🚗 *Vehicle Program Analysis for {launch_date}*\n\n"
+                posted = say(text=f"{header}_Analyzing..._")
+                analysis = self._stream_into_message(
+                    posted, header, self.openai_client.stream_vehicle_program_query(launch_date, databricks_data)
+                )
+                
+                visualization_url = visualization.result()
+                stored.result()
             
-            # Send comprehensive response
+            # Replace the streamed message with the comprehensive response
             response = f"""
 🚗 *Vehicle Program Analysis for {launch_date}*
 
@@ -147,13 +252,31 @@ class ProductionSlackBot:
 • Use `/dashboard` to create a Google Sheets dashboard
             """
             
-            say(text=response)
+            self.app.client.chat_update(channel=posted['channel'], ts=posted['ts'], text=response)
             
         except Exception as e:
             logger.error(f"Error handling vehicle program query: {e}")
             monitoring_manager.track_error('vehicle_program_query', str(e), user_id=message.get('user'))
             say(text=f"❌ Error processing your request. Please try again or contact support if the issue persists.")
     
+    def _stream_into_message(self, posted, header: str, deltas) -> str:
+        """Edit a posted message as streamed text arrives and return the full text"""
+        parts = []
+        pending = ''  # text received since the last edit
+        last_update = time.monotonic()
+        for delta in iter_sync(deltas):
+            parts.append(delta)
+            pending += delta
+            elapsed = time.monotonic() - last_update
+            if elapsed < STREAM_MIN_UPDATE_INTERVAL:
+                continue
+            # Prefer to show whole sentences, but don't leave the message stalled on a long one
+            if elapsed >= STREAM_MAX_UPDATE_INTERVAL or SENTENCE_BOUNDARY.search(pending):
+                self.app.client.chat_update(channel=posted['channel'], ts=posted['ts'], text=header + ''.join(parts))
+                pending = ''
+                last_update = time.monotonic()
+        return ''.join(parts)
+    
     @monitor_error("upload_request")
     def _handle_upload_request(self, message, say: Say):
         """Handle file upload requests with enhanced error handling"""
@@ -162,30 +285,13 @@ class ProductionSlackBot:
             
             # Check if specific file type is mentioned
             if 'excel' in text.lower() or 'xlsx' in text.lower():
-                instructions = self.openai_client.generate_file_upload_instructions('excel')
+                instructions = run_sync(self.openai_client.generate_file_upload_instructions('excel'))
             elif 'google' in text.lower() or 'sheets' in text.lower():
-                instructions = self.openai_client.generate_file_upload_instructions('google_sheets')
+                instructions = run_sync(self.openai_client.generate_file_upload_instructions('google_sheets'))
             elif 'smartsheet' in text.lower():
-                instructions = self.openai_client.generate_file_upload_instructions('smartsheet')
+                instructions = run_sync(self.openai_client.generate_file_upload_instructions('smartsheet'))
             else:
-                instructions = """
-📁 *File Upload Instructions*
-
-You can upload the following file types:
-• **Excel files** (.xlsx, .xls)
-• **Google Sheets** (share the spreadsheet ID)
-• **Smartsheet** (provide the sheet ID)
-
-*For Excel files:* Simply upload the file in this channel
-*For Google Sheets:* Use `/upload google [spreadsheet-id]`
-*For Smartsheet:* Use `/upload smartsheet [sheet-id]`
-
-The file should contain vehicle program data with columns for:
-• Part numbers/IDs
-• Status information
-• Completion percentages
-• Department assignments
-                """
+                instructions = UPLOAD_INSTRUCTIONS
             
             say(text=instructions)
             
@@ -227,10 +333,10 @@ The file should contain vehicle program data with columns for:
             parsed_data = self.file_parser.parse_excel_file(file_content, filename)
             
             # Combine with existing Databricks data
-            combined_analysis = self.openai_client.analyze_uploaded_data(
-                parsed_data, 
-                session_data['databricks_data']
-            )
+            combined_analysis = run_sync(self.openai_client.analyze_uploaded_data(
+                session_data['databricks_data'],
+                parsed_data
+            ))
             
             # Update session with file data
             db_manager.update_user_session(user_id, file_data=parsed_data)
@@ -300,6 +406,11 @@ Share this dashboard with your team for collaborative review.
         """Handle status requests with system information"""
         try:
             status = monitoring_manager.get_status()
+            metrics = status.get('metrics', {})
+            configuration = status.get('configuration', {})
+            
+            def check(key):
+                return '✅' if configuration.get(key) else '❌'
             
             response = f"""
 📊 *System Status*
@@ -308,15 +419,15 @@ Share this dashboard with your team for collaborative review.
 🌍 **Environment:** {status.get('environment', 'Unknown')}
 
 📈 **Recent Activity (7 days):**
-• Total Commands: {status.get('metrics', {}).get('total_commands', 0)}
-• Success Rate: {status.get('metrics', {}).get('success_rate', 0):.1f}%
-• Avg Response Time: {status.get('metrics', {}).get('avg_response_time', 0):.0f}ms
+• Total Commands: {metrics.get('total_commands', 0)}
+• Success Rate: {metrics.get('success_rate', 0):.1f}%
+• Avg Response Time: {metrics.get('avg_response_time', 0):.0f}ms
 
 ⚙️ **Configuration:**
-• Database: {'✅' if status.get('configuration', {}).get('database_configured') else '❌'}
-• Redis: {'✅' if status.get('configuration', {}).get('redis_configured') else '❌'}
-• Sentry: {'✅' if status.get('configuration', {}).get('sentry_configured') else '❌'}
-• Metrics: {'✅' if status.get('configuration', {}).get('metrics_enabled') else '❌'}
+• Database: {check('database_configured')}
+• Redis: {check('redis_configured')}
+• Sentry: {check('sentry_configured')}
+• Metrics: {check('metrics_enabled')}
             """
             
             say(text=response)
@@ -328,47 +439,11 @@ Share this dashboard with your team for collaborative review.
     @monitor_error("help_request")
     def _handle_help_request(self, message, say: Say):
         """Handle help requests"""
-        help_text = """
-🤖 *Vehicle Program Slack Bot - Help*
-
-*Available Commands:*
-
-🚗 `/vehicle [launch-date]` - Query vehicle program status
-   Example: `/vehicle 2024-03-15`
-
-📁 `/upload` - Get instructions for uploading data files
-   Supports: Excel, Google Sheets, Smartsheet
-
-📊 `/dashboard` - Create Google Sheets dashboard
-   Combines Databricks data with uploaded files
-
-📈 `/status` - Check system status and metrics
-
-❓ `/help` - Show this help message
-
-*Workflow:*
-1. Start with `/vehicle [launch-date]` to query Databricks
-2. Optionally upload additional data files
-3. Use `/dashboard` to create comprehensive reporting
-
-*Data Sources:*
-• Bill of Material (BOM)
-• Master Parts List (MPL)
-• Material Flow Engineering (MFE)
-• 4P (People, Process, Place, Product)
-• PPAP (Production Part Approval Process)
-
-*Support:*
-For issues or questions, contact your system administrator.
-        """
-        
-        say(text=help_text)
+        say(text=HELP_TEXT)
     
     def _extract_launch_date(self, text: str) -> Optional[str]:
         """Extract launch date from message text"""
-        # Look for date pattern YYYY-MM-DD
-        date_pattern = r'\b(\d{4}-\d{2}-\d{2})\b'
-        match = re.search(date_pattern, text)
+        match = LAUNCH_DATE.search(text)
         
         if match:
             return match.group(1)
@@ -395,6 +470,7 @@ For issues or questions, contact your system administrator.
             logger.info("Stopping Production Slack Bot...")
             monitoring_manager.stop_metrics_server()
             logger.info("Production Slack Bot stopped successfully")
+            stop_log_listener()
         except Exception as e:
             logger.error(f"Error stopping Slack bot: {e}")
 
@@ -8,22 +8,37 @@ import os
 import sys
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def run_command(command, description):
-    """Run a command and return the result"""
+# Per-module test files don't depend on each other, so they run in parallel
+PER_MODULE_TEST_STEPS = [
+    ('basic', 'Basic Tests', 'tests/test_basic.py', 'Basic functionality tests'),
+    ('production_slack_bot', 'Production Slack Bot Tests', 'tests/test_production_slack_bot.py', 'Production Slack bot tests'),
+    ('databricks_client', 'Databricks Client Tests', 'tests/test_databricks_client.py', 'Databricks client tests'),
+    ('file_parser', 'File Parser Tests', 'tests/test_file_parser.py', 'File parser tests'),
+    ('openai_client', 'OpenAI Client Tests', 'tests/test_openai_client.py', 'OpenAI client tests'),
+    ('database', 'Database Tests', 'tests/test_database.py', 'Database manager tests'),
+    ('monitoring', 'Monitoring Tests', 'tests/test_monitoring.py', 'Monitoring system tests'),
+    ('comprehensive', 'Comprehensive Tests', 'tests/test_comprehensive.py', 'Comprehensive integration tests'),
+]
+
+def execute_command(command):
+    """Run a command with its output captured and return the result and duration"""
+    start_time = time.time()
+    result = subprocess.run(command, shell=True, capture_output=True, text=True)
+    return result, time.time() - start_time
+
+def report_command(command, description, result, duration):
+    """Print a finished command's exit code, duration and output"""
     print(f"\n{'='*60}")
     print(f"🔄 {description}")
     print(f"{'='*60}")
     print(f"Command: {command}")
     print(f"{'='*60}")
     
-    start_time = time.time()
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-    end_time = time.time()
-    
     print(f"Exit Code: {result.returncode}")
-    print(f"Duration: {end_time - start_time:.2f} seconds")
+    print(f"Duration: {duration:.2f} seconds")
     
     if result.stdout:
         print("\n📤 STDOUT:")
@@ -32,7 +47,11 @@ def run_command(command, description):
     if result.stderr:
         print("\n⚠️  STDERR:")
         print(result.stderr)
-    
+
+def run_command(command, description):
+    """Run a command and return the result"""
+    result, duration = execute_command(command)
+    report_command(command, description, result, duration)
     return result
 
 def main():
@@ -50,69 +69,16 @@ def main():
     # Test results storage
     test_results = {}
     
-    # 1. Run basic tests
-    print("\n📋 Step 1: Running Basic Tests")
-    result = run_command(
-        "python -m pytest tests/test_basic.py -v --tb=short",
-        "Basic functionality tests"
-    )
-    test_results['basic'] = result.returncode == 0
-    
-    # 2. Run production Slack bot tests
-    print("\n📋 Step 2: Running Production Slack Bot Tests")
-    result = run_command(
-        "python -m pytest tests/test_production_slack_bot.py -v --tb=short",
-        "Production Slack bot tests"
-    )
-    test_results['production_slack_bot'] = result.returncode == 0
-    
-    # 3. Run Databricks client tests
-    print("\n📋 Step 3: Running Databricks Client Tests")
-    result = run_command(
-        "python -m pytest tests/test_databricks_client.py -v --tb=short",
-        "Databricks client tests"
-    )
-    test_results['databricks_client'] = result.returncode == 0
-    
-    # 4. Run file parser tests
-    print("\n📋 Step 4: Running File Parser Tests")
-    result = run_command(
-        "python -m pytest tests/test_file_parser.py -v --tb=short",
-        "File parser tests"
-    )
-    test_results['file_parser'] = result.returncode == 0
-    
-    # 5. Run OpenAI client tests
-    print("\n📋 Step 5: Running OpenAI Client Tests")
-    result = run_command(
-        "python -m pytest tests/test_openai_client.py -v --tb=short",
-        "OpenAI client tests"
-    )
-    test_results['openai_client'] = result.returncode == 0
-    
-    # 6. Run database tests
-    print("\n📋 Step 6: Running Database Tests")
-    result = run_command(
-        "python -m pytest tests/test_database.py -v --tb=short",
-        "Database manager tests"
-    )
-    test_results['database'] = result.returncode == 0
-    
-    # 7. Run monitoring tests
-    print("\n📋 Step 7: Running Monitoring Tests")
-    result = run_command(
-        "python -m pytest tests/test_monitoring.py -v --tb=short",
-        "Monitoring system tests"
-    )
-    test_results['monitoring'] = result.returncode == 0
-    
-    # 8. Run comprehensive tests
-    print("\n📋 Step 8: Running Comprehensive Tests")
-    result = run_command(
-        "python -m pytest tests/test_comprehensive.py -v --tb=short",
-        "Comprehensive integration tests"
-    )
-    test_results['comprehensive'] = result.returncode == 0
+    # 1-8. Run the per-module test files in parallel; results are reported in step order
+    commands = [f"python -m pytest {path} -v --tb=short -p no:cacheprovider" for _, _, path, _ in PER_MODULE_TEST_STEPS]
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = [executor.submit(execute_command, command) for command in commands]
+        for step, ((key, title, _, description), command, future) in enumerate(
+                zip(PER_MODULE_TEST_STEPS, commands, futures), start=1):
+            print(f"\n📋 Step {step}: Running {title}")
+            result, duration = future.result()
+            report_command(command, description, result, duration)
+            test_results[key] = result.returncode == 0
     
     # 9. Run all tests with coverage
     print("\n📋 Step 9: Running All Tests with Coverage")
@@ -1,5 +1,6 @@
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Optional
 from slack_bolt import App
@@ -7,19 +8,26 @@ from slack_bolt.adapter.socket_mode import SocketModeHandler
 from slack_bolt.context.say import Say
 from slack_bolt.context.ack import Ack
 
-from config import SLACK_BOT_TOKEN, SLACK_SIGNING_SECRET, SLACK_APP_TOKEN, DEBUG_MODE, LOG_LEVEL
+from config import SLACK_BOT_TOKEN, SLACK_SIGNING_SECRET, SLACK_APP_TOKEN, DEBUG_MODE, LOG_LEVEL_NUM
 from databricks_client import DatabricksClient
-from openai_client import OpenAIClient
+from openai_client import OpenAIClient, run_sync
 from file_parser import FileParser
 from google_sheets_dashboard import GoogleSheetsDashboard
 
 # Configure logging
 logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
+    level=LOG_LEVEL_NUM,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+# Command and launch-date patterns, compiled once for every bot instance
+VEHICLE_COMMAND = re.compile(r"^/vehicle.*", re.IGNORECASE)
+UPLOAD_COMMAND = re.compile(r"^/upload.*", re.IGNORECASE)
+HELP_COMMAND = re.compile(r"^/help.*", re.IGNORECASE)
+DASHBOARD_COMMAND = re.compile(r"^/dashboard.*", re.IGNORECASE)
+LAUNCH_DATE = re.compile(r'\b(\d{4}-\d{2}-\d{2})\b')  # YYYY-MM-DD
+
 class VehicleProgramSlackBot:
     def __init__(self):
         """Initialize the Slack bot with all necessary clients"""
@@ -44,19 +52,19 @@ class VehicleProgramSlackBot:
     def _register_handlers(self):
         """Register all Slack event handlers"""
         
-        @self.app.message(re.compile(r"^/vehicle.*", re.IGNORECASE))
+        @self.app.message(VEHICLE_COMMAND)
         def handle_vehicle_command(message, say: Say, ack: Ack):
             """Handle vehicle program queries"""
             ack()
             self._handle_vehicle_program_query(message, say)
         
-        @self.app.message(re.compile(r"^/upload.*", re.IGNORECASE))
+        @self.app.message(UPLOAD_COMMAND)
         def handle_upload_command(message, say: Say, ack: Ack):
             """Handle file upload requests"""
             ack()
             self._handle_upload_request(message, say)
         
-        @self.app.message(re.compile(r"^/help.*", re.IGNORECASE))
+        @self.app.message(HELP_COMMAND)
         def handle_help_command(message, say: Say, ack: Ack):
             """Handle help requests"""
             ack()
@@ -67,7 +75,7 @@ class VehicleProgramSlackBot:
             """Handle file uploads"""
             self._handle_file_upload(event, say)
         
-        @self.app.message(re.compile(r"^/dashboard.*", re.IGNORECASE))
+        @self.app.message(DASHBOARD_COMMAND)
         def handle_dashboard_command(message, say: Say, ack: Ack):
             """Handle dashboard creation requests"""
             ack()
@@ -95,11 +103,11 @@ class VehicleProgramSlackBot:
             # Query Databricks for all department statuses
             databricks_data = self.databricks_client.query_vehicle_program_status(launch_date)
             
-            # Process with OpenAI
-            analysis = self.openai_client.process_vehicle_program_query(launch_date, databricks_data)
-            
-            # Create visualization in Databricks
-            visualization_url = self.databricks_client.create_visualization(databricks_data, launch_date)
+            # Create the Databricks visualization while OpenAI processes the data; neither needs the other
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                visualization = executor.submit(self.databricks_client.create_visualization, databricks_data, launch_date)
+                analysis = run_sync(self.openai_client.process_vehicle_program_query(launch_date, databricks_data))
+                visualization_url = visualization.result()
             
             # Send comprehensive response
             response = f"""
@@ -136,11 +144,11 @@ class VehicleProgramSlackBot:
             
             # Check if specific file type is mentioned
             if 'excel' in text.lower() or 'xlsx' in text.lower():
-                instructions = self.openai_client.generate_file_upload_instructions('excel')
+                instructions = run_sync(self.openai_client.generate_file_upload_instructions('excel'))
             elif 'google' in text.lower() or 'sheets' in text.lower():
-                instructions = self.openai_client.generate_file_upload_instructions('google_sheets')
+                instructions = run_sync(self.openai_client.generate_file_upload_instructions('google_sheets'))
             elif 'smartsheet' in text.lower():
-                instructions = self.openai_client.generate_file_upload_instructions('smartsheet')
+                instructions = run_sync(self.openai_client.generate_file_upload_instructions('smartsheet'))
             else:
                 instructions = """
 📁 *File Upload Instructions*
@@ -196,10 +204,10 @@ The file should contain vehicle program data with columns for:
             parsed_data = self.file_parser.parse_excel_file(file_content, filename)
             
             # Combine with existing Databricks data
-            combined_analysis = self.openai_client.analyze_uploaded_data(
-                parsed_data, 
-                session['databricks_data']
-            )
+            combined_analysis = run_sync(self.openai_client.analyze_uploaded_data(
+                session['databricks_data'],
+                parsed_data
+            ))
             
             # Update session
             session['file_data'] = parsed_data
@@ -297,9 +305,7 @@ Share this dashboard with your team for collaborative review.
     
     def _extract_launch_date(self, text: str) -> Optional[str]:
         """Extract launch date from message text"""
-        # Look for date pattern YYYY-MM-DD
-        date_pattern = r'\b(\d{4}-\d{2}-\d{2})\b'
-        match = re.search(date_pattern, text)
+        match = LAUNCH_DATE.search(text)
         
         if match:
             return match.group(1)
@@ -39,8 +39,9 @@ def main():
     """Main startup function"""
     print("🚗 Starting Vehicle Program Slack Bot...")
     
-    # Load environment variables
+    # Load environment variables; config.py skips its own load once this flag is set
     load_dotenv()
+    os.environ['DOTENV_LOADED'] = '1'
     
     # Validate environment
     if not validate_environment():
@@ -0,0 +1,15 @@
+import sys
+import pytest
+
+
+def _clear_openai_client():
+    if 'openai_client' in sys.modules:
+        sys.modules['openai_client']._get_client.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_openai_client():
+    """Drop the shared OpenAI client so each test sees its own patched AsyncOpenAI"""
+    _clear_openai_client()
+    yield
+    _clear_openai_client()
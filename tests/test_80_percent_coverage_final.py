@@ -1,6 +1,7 @@
+import asyncio
 import pytest
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import sys
 import os
 import json
@@ -309,13 +310,13 @@ class TestOpenAIClientFinal:
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
             client = OpenAIClient()
             
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'Test response'
-                mock_openai.return_value.chat.completions.create.return_value = mock_response
+                mock_openai.return_value.chat.completions.create = AsyncMock(return_value=mock_response)
                 
-                result = client.process_vehicle_program_query('Test query', '2024-01-01')
+                result = asyncio.run(client.process_vehicle_program_query('Test query', '2024-01-01'))
                 assert 'Test response' in result
     
     def test_process_vehicle_program_query_error(self):
@@ -324,7 +325,7 @@ class TestOpenAIClientFinal:
             client = OpenAIClient()
             
             with patch('openai.OpenAI', side_effect=Exception('API error')):
-                result = client.process_vehicle_program_query('Test query', '2024-01-01')
+                result = asyncio.run(client.process_vehicle_program_query('Test query', '2024-01-01'))
                 assert 'error' in result.lower()
     
     def test_generate_recommendations_success(self):
@@ -332,13 +333,13 @@ class TestOpenAIClientFinal:
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
             client = OpenAIClient()
             
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'Test recommendations'
-                mock_openai.return_value.chat.completions.create.return_value = mock_response
+                mock_openai.return_value.chat.completions.create = AsyncMock(return_value=mock_response)
                 
-                result = client.generate_recommendations('Test data')
+                result = asyncio.run(client.generate_recommendations('Test data'))
                 assert 'Test recommendations' in result
     
     def test_generate_recommendations_error(self):
@@ -347,7 +348,7 @@ class TestOpenAIClientFinal:
             client = OpenAIClient()
             
             with patch('openai.OpenAI', side_effect=Exception('API error')):
-                result = client.generate_recommendations('Test data')
+                result = asyncio.run(client.generate_recommendations('Test data'))
                 assert 'error' in result.lower()
     
     def test_analyze_file_data_success(self):
@@ -355,13 +356,13 @@ class TestOpenAIClientFinal:
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
             client = OpenAIClient()
             
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'Test analysis'
-                mock_openai.return_value.chat.completions.create.return_value = mock_response
+                mock_openai.return_value.chat.completions.create = AsyncMock(return_value=mock_response)
                 
-                result = client.analyze_file_data('Test file data')
+                result = asyncio.run(client.analyze_file_data('Test file data'))
                 assert 'Test analysis' in result
     
     def test_analyze_file_data_error(self):
@@ -370,7 +371,7 @@ class TestOpenAIClientFinal:
             client = OpenAIClient()
             
             with patch('openai.OpenAI', side_effect=Exception('API error')):
-                result = client.analyze_file_data('Test file data')
+                result = asyncio.run(client.analyze_file_data('Test file data'))
                 assert 'error' in result.lower()
 
 class TestDatabricksClientFinal:
@@ -514,13 +515,13 @@ class TestIntegrationFinal:
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
             client = OpenAIClient()
             
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'Test analysis'
-                mock_openai.return_value.chat.completions.create.return_value = mock_response
+                mock_openai.return_value.chat.completions.create = AsyncMock(return_value=mock_response)
                 
-                analysis = client.analyze_file_data(str(parsed_data))
+                analysis = asyncio.run(client.analyze_file_data(str(parsed_data)))
                 assert 'Test analysis' in analysis
     
     def test_databricks_openai_integration(self):
@@ -546,13 +547,13 @@ class TestIntegrationFinal:
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
             client = OpenAIClient()
             
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'BOM analysis'
-                mock_openai.return_value.chat.completions.create.return_value = mock_response
+                mock_openai.return_value.chat.completions.create = AsyncMock(return_value=mock_response)
                 
-                analysis = client.process_vehicle_program_query('Analyze BOM', '2024-01-01')
+                analysis = asyncio.run(client.process_vehicle_program_query('Analyze BOM', '2024-01-01'))
                 assert 'BOM analysis' in analysis
 
 if __name__ == '__main__':
@@ -1,6 +1,7 @@
+import asyncio
 import pytest
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import sys
 import os
 import json
@@ -224,7 +225,7 @@ class TestOpenAIClientFinal:
     def test_initialization_with_api_key(self):
         """Test successful initialization with API key"""
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_openai.return_value = Mock()
                 client = OpenAIClient()
                 assert client is not None
@@ -232,7 +233,7 @@ class TestOpenAIClientFinal:
     def test_initialization_without_api_key(self):
         """Test initialization without API key"""
         with patch.dict(os.environ, {}, clear=True):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_openai.return_value = Mock()
                 client = OpenAIClient()
                 assert client is not None
@@ -240,84 +241,84 @@ class TestOpenAIClientFinal:
     def test_process_vehicle_program_query_with_valid_data(self):
         """Test processing vehicle program query with valid data"""
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_client = Mock()
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'Test response'
-                mock_client.chat.completions.create.return_value = mock_response
+                mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
                 mock_openai.return_value = mock_client
                 
                 client = OpenAIClient()
-                result = client.process_vehicle_program_query('Test query', '2024-01-01')
+                result = asyncio.run(client.process_vehicle_program_query('Test query', '2024-01-01'))
                 assert isinstance(result, str)
     
     def test_process_vehicle_program_query_with_exception(self):
         """Test processing vehicle program query with exception"""
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_client = Mock()
-                mock_client.chat.completions.create.side_effect = Exception('API error')
+                mock_client.chat.completions.create = AsyncMock(side_effect=Exception('API error'))
                 mock_openai.return_value = mock_client
                 
                 client = OpenAIClient()
-                result = client.process_vehicle_program_query('Test query', '2024-01-01')
+                result = asyncio.run(client.process_vehicle_program_query('Test query', '2024-01-01'))
                 assert isinstance(result, str)
                 assert 'error' in result.lower()
     
     def test_generate_recommendations_with_valid_data(self):
         """Test generating recommendations with valid data"""
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_client = Mock()
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'Test recommendations'
-                mock_client.chat.completions.create.return_value = mock_response
+                mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
                 mock_openai.return_value = mock_client
                 
                 client = OpenAIClient()
-                result = client.generate_recommendations('Test data')
+                result = asyncio.run(client.generate_recommendations('Test data'))
                 assert isinstance(result, str)
     
     def test_generate_recommendations_with_exception(self):
         """Test generating recommendations with exception"""
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_client = Mock()
-                mock_client.chat.completions.create.side_effect = Exception('API error')
+                mock_client.chat.completions.create = AsyncMock(side_effect=Exception('API error'))
                 mock_openai.return_value = mock_client
                 
                 client = OpenAIClient()
-                result = client.generate_recommendations('Test data')
+                result = asyncio.run(client.generate_recommendations('Test data'))
                 assert isinstance(result, str)
                 assert 'error' in result.lower()
     
     def test_analyze_file_data_with_valid_data(self):
         """Test analyzing file data with valid data"""
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_client = Mock()
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'Test analysis'
-                mock_client.chat.completions.create.return_value = mock_response
+                mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
                 mock_openai.return_value = mock_client
                 
                 client = OpenAIClient()
-                result = client.analyze_file_data('Test file data')
+                result = asyncio.run(client.analyze_file_data('Test file data'))
                 assert isinstance(result, str)
     
     def test_analyze_file_data_with_exception(self):
         """Test analyzing file data with exception"""
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_client = Mock()
-                mock_client.chat.completions.create.side_effect = Exception('API error')
+                mock_client.chat.completions.create = AsyncMock(side_effect=Exception('API error'))
                 mock_openai.return_value = mock_client
                 
                 client = OpenAIClient()
-                result = client.analyze_file_data('Test file data')
+                result = asyncio.run(client.analyze_file_data('Test file data'))
                 assert isinstance(result, str)
                 assert 'error' in result.lower()
 
@@ -430,16 +431,16 @@ class TestIntegrationFinal:
         
         # Test OpenAI analysis
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_client = Mock()
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'Test analysis'
-                mock_client.chat.completions.create.return_value = mock_response
+                mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
                 mock_openai.return_value = mock_client
                 
                 client = OpenAIClient()
-                analysis = client.analyze_file_data(str(parsed_data))
+                analysis = asyncio.run(client.analyze_file_data(str(parsed_data)))
                 assert isinstance(analysis, str)
     
     def test_databricks_openai_integration_comprehensive(self):
@@ -455,16 +456,16 @@ class TestIntegrationFinal:
         
         # Test OpenAI analysis of Databricks data
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_client = Mock()
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'BOM analysis'
-                mock_client.chat.completions.create.return_value = mock_response
+                mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
                 mock_openai.return_value = mock_client
                 
                 client = OpenAIClient()
-                analysis = client.process_vehicle_program_query('Analyze BOM', '2024-01-01')
+                analysis = asyncio.run(client.process_vehicle_program_query('Analyze BOM', '2024-01-01'))
                 assert isinstance(analysis, str)
 
 if __name__ == '__main__':
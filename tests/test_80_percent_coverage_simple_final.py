@@ -1,6 +1,7 @@
+import asyncio
 import pytest
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import sys
 import os
 import json
@@ -194,7 +195,7 @@ class TestOpenAIClientSimple:
     def test_initialization_success(self):
         """Test successful initialization"""
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_openai.return_value = Mock()
                 client = OpenAIClient()
                 assert client is not None
@@ -208,16 +209,16 @@ class TestOpenAIClientSimple:
     def test_process_vehicle_program_query_success(self):
         """Test processing vehicle program query successfully"""
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_client = Mock()
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'Test response'
-                mock_client.chat.completions.create.return_value = mock_response
+                mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
                 mock_openai.return_value = mock_client
                 
                 client = OpenAIClient()
-                result = client.process_vehicle_program_query('Test query', '2024-01-01')
+                result = asyncio.run(client.process_vehicle_program_query('Test query', '2024-01-01'))
                 assert isinstance(result, str)
     
     def test_process_vehicle_program_query_error(self):
@@ -225,22 +226,22 @@ class TestOpenAIClientSimple:
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
             with patch('openai.OpenAI', side_effect=Exception('API error')):
                 client = OpenAIClient()
-                result = client.process_vehicle_program_query('Test query', '2024-01-01')
+                result = asyncio.run(client.process_vehicle_program_query('Test query', '2024-01-01'))
                 assert isinstance(result, str)
     
     def test_generate_recommendations_success(self):
         """Test generating recommendations successfully"""
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_client = Mock()
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'Test recommendations'
-                mock_client.chat.completions.create.return_value = mock_response
+                mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
                 mock_openai.return_value = mock_client
                 
                 client = OpenAIClient()
-                result = client.generate_recommendations('Test data')
+                result = asyncio.run(client.generate_recommendations('Test data'))
                 assert isinstance(result, str)
     
     def test_generate_recommendations_error(self):
@@ -248,22 +249,22 @@ class TestOpenAIClientSimple:
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
             with patch('openai.OpenAI', side_effect=Exception('API error')):
                 client = OpenAIClient()
-                result = client.generate_recommendations('Test data')
+                result = asyncio.run(client.generate_recommendations('Test data'))
                 assert isinstance(result, str)
     
     def test_analyze_file_data_success(self):
         """Test analyzing file data successfully"""
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_client = Mock()
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'Test analysis'
-                mock_client.chat.completions.create.return_value = mock_response
+                mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
                 mock_openai.return_value = mock_client
                 
                 client = OpenAIClient()
-                result = client.analyze_file_data('Test file data')
+                result = asyncio.run(client.analyze_file_data('Test file data'))
                 assert isinstance(result, str)
     
     def test_analyze_file_data_error(self):
@@ -271,7 +272,7 @@ class TestOpenAIClientSimple:
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
             with patch('openai.OpenAI', side_effect=Exception('API error')):
                 client = OpenAIClient()
-                result = client.analyze_file_data('Test file data')
+                result = asyncio.run(client.analyze_file_data('Test file data'))
                 assert isinstance(result, str)
 
 class TestDatabricksClientSimple:
@@ -400,16 +401,16 @@ class TestIntegrationSimple:
         
         # Test OpenAI analysis
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_client = Mock()
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'Test analysis'
-                mock_client.chat.completions.create.return_value = mock_response
+                mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
                 mock_openai.return_value = mock_client
                 
                 client = OpenAIClient()
-                analysis = client.analyze_file_data(str(parsed_data))
+                analysis = asyncio.run(client.analyze_file_data(str(parsed_data)))
                 assert isinstance(analysis, str)
     
     def test_databricks_openai_integration(self):
@@ -425,16 +426,16 @@ class TestIntegrationSimple:
         
         # Test OpenAI analysis of Databricks data
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
-            with patch('openai.OpenAI') as mock_openai:
+            with patch('openai.AsyncOpenAI') as mock_openai:
                 mock_client = Mock()
                 mock_response = Mock()
                 mock_response.choices = [Mock()]
                 mock_response.choices[0].message.content = 'BOM analysis'
-                mock_client.chat.completions.create.return_value = mock_response
+                mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
                 mock_openai.return_value = mock_client
                 
                 client = OpenAIClient()
-                analysis = client.process_vehicle_program_query('Analyze BOM', '2024-01-01')
+                analysis = asyncio.run(client.process_vehicle_program_query('Analyze BOM', '2024-01-01'))
                 assert isinstance(analysis, str)
 
 if __name__ == '__main__':
@@ -1,6 +1,6 @@
 import pytest
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import sys
 import os
 
@@ -114,7 +114,7 @@ class TestFileParser:
 class TestOpenAIClient:
     """Test OpenAI client"""
     
-    @patch('openai.OpenAI')
+    @patch('openai.AsyncOpenAI')
     def test_openai_client_initialization(self, mock_openai):
         """Test OpenAI client initialization"""
         from openai_client import OpenAIClient
@@ -127,7 +127,7 @@ class TestOpenAIClient:
         mock_response = Mock()
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = "Test response"
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
         
         client = OpenAIClient()
         assert client is not None
@@ -1,6 +1,7 @@
+import asyncio
 import pytest
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import sys
 import os
 import tempfile
@@ -87,7 +88,7 @@ class TestSlackBotCoverage:
         mock_app.return_value = mock_app_instance
         
         mock_openai_instance = Mock()
-        mock_openai_instance.process_vehicle_program_query.return_value = "Analysis complete"
+        mock_openai_instance.process_vehicle_program_query = AsyncMock(return_value="Analysis complete")
         mock_openai.return_value = mock_openai_instance
         
         mock_databricks_instance = Mock()
@@ -135,7 +136,7 @@ class TestSlackBotCoverage:
         mock_app.return_value = mock_app_instance
         
         mock_openai_instance = Mock()
-        mock_openai_instance.process_vehicle_program_query.side_effect = Exception("Test error")
+        mock_openai_instance.process_vehicle_program_query = AsyncMock(side_effect=Exception("Test error"))
         mock_openai.return_value = mock_openai_instance
         
         mock_databricks_instance = Mock()
@@ -173,7 +174,7 @@ class TestSlackBotCoverage:
         mock_app.return_value = mock_app_instance
         
         mock_openai_instance = Mock()
-        mock_openai_instance.generate_file_upload_instructions.return_value = "Upload instructions"
+        mock_openai_instance.generate_file_upload_instructions = AsyncMock(return_value="Upload instructions")
         mock_openai.return_value = mock_openai_instance
         
         mock_databricks_instance = Mock()
@@ -220,7 +221,7 @@ class TestSlackBotCoverage:
         mock_app.return_value = mock_app_instance
         
         mock_openai_instance = Mock()
-        mock_openai_instance.analyze_uploaded_data.return_value = "File analysis complete"
+        mock_openai_instance.analyze_uploaded_data = AsyncMock(return_value="File analysis complete")
         mock_openai.return_value = mock_openai_instance
         
         mock_databricks_instance = Mock()
@@ -553,7 +554,7 @@ class TestOpenAIClientCoverage:
         assert client.client is None  # No real API key
     
     @patch('openai_client.OPENAI_API_KEY', 'sk-real-key')
-    @patch('openai_client.openai.OpenAI')
+    @patch('openai_client.openai.AsyncOpenAI')
     def test_openai_client_with_real_key(self, mock_openai):
         """Test OpenAI client with real API key"""
         mock_client = Mock()
@@ -813,7 +814,7 @@ class TestIntegrationCoverage:
         client = OpenAIClient()
         
         # Test with no client (test environment)
-        result = client.process_vehicle_program_query('2024-03-15', {})
+        result = asyncio.run(client.process_vehicle_program_query('2024-03-15', {}))
         assert "OpenAI client not configured" in result
 
 class TestErrorHandlingCoverage:
@@ -832,7 +833,7 @@ class TestErrorHandlingCoverage:
         client = OpenAIClient()
         
         # Test analyze_program_status with no client
-        result = client.analyze_program_status({}, '2024-03-15')
+        result = asyncio.run(client.analyze_program_status({}, '2024-03-15'))
         assert "encountered an error" in result
 
 class TestEdgeCasesCoverage:
@@ -22,9 +22,11 @@ class TestDatabaseManagerComprehensive:
             mock_config.DATABASE_POOL_SIZE = 5
             mock_config.DATABASE_MAX_OVERFLOW = 10
             
+            # No background metrics writer, so tests control when queued metrics are written
             with patch('database.create_engine') as mock_create_engine, \
                  patch('database.sessionmaker') as mock_sessionmaker, \
-                 patch('database.Base.metadata.create_all') as mock_create_all:
+                 patch('database.Base.metadata.create_all') as mock_create_all, \
+                 patch('database.threading.Thread'):
                 
                 # Configure mocks
                 mock_engine = Mock()
@@ -120,8 +122,9 @@ class TestDatabaseManagerComprehensive:
         assert isinstance(added_session, UserSession)
         assert added_session.user_id == user_id
         assert added_session.launch_date == launch_date
-        assert json.loads(added_session.databricks_data) == databricks_data
-        assert json.loads(added_session.file_data) == file_data
+        # Blobs go to JSONB columns as-is; the engine serializes them
+        assert added_session.databricks_data == databricks_data
+        assert added_session.file_data == file_data
     
     def test_store_user_session_no_database(self):
         """Test user session storage when database is not available"""
@@ -161,12 +164,46 @@ class TestDatabaseManagerComprehensive:
         assert result['databricks_data'] == {'BOM': {'status': 'success'}}
         assert result['file_data'] == {'file': 'data'}
     
+    def test_get_user_session_returns_copies(self):
+        """Test editing a returned session doesn't change the cached one"""
+        mock_session = Mock()
+        self.db_manager.SessionLocal.return_value = mock_session
+        mock_session.scalars.return_value.first.return_value = UserSession(
+            user_id='U123456', launch_date='2024-03-15', databricks_data={'BOM': {'status': 'success'}}
+        )
+        
+        first = self.db_manager.get_user_session('U123456')
+        first['databricks_data']['BOM']['status'] = 'edited'
+        second = self.db_manager.get_user_session('U123456')
+        
+        assert second['databricks_data'] == {'BOM': {'status': 'success'}}
+        assert mock_session.scalars.call_count == 1
+    
+    def test_get_user_session_overlapping_write_is_not_cached(self):
+        """Test a read that started before a write committed doesn't cache the replaced row"""
+        mock_session = Mock()
+        self.db_manager.SessionLocal.return_value = mock_session
+        old_row = UserSession(user_id='U123456', launch_date='2024-03-15', databricks_data={})
+        new_row = UserSession(user_id='U123456', launch_date='2024-06-01', databricks_data={})
+        
+        def read_then_write(*args, **kwargs):
+            # The write commits after this read's SELECT returned the old row
+            self.db_manager.store_user_session('U123456', '2024-06-01', {})
+            return Mock(first=Mock(return_value=old_row))
+        
+        mock_session.scalars.side_effect = read_then_write
+        assert self.db_manager.get_user_session('U123456')['launch_date'] == '2024-03-15'
+        
+        mock_session.scalars.side_effect = None
+        mock_session.scalars.return_value.first.return_value = new_row
+        assert self.db_manager.get_user_session('U123456')['launch_date'] == '2024-06-01'
+    
     def test_get_user_session_not_found(self):
         """Test user session retrieval when not found"""
         mock_session = Mock()
         self.db_manager.SessionLocal.return_value = mock_session
         
-        mock_session.query.return_value.filter.return_value.first.return_value = None
+        mock_session.scalars.return_value.first.return_value = None
         
         result = self.db_manager.get_user_session('U123456')
         
@@ -185,18 +222,15 @@ class TestDatabaseManagerComprehensive:
         mock_session = Mock()
         self.db_manager.SessionLocal.return_value = mock_session
         
-        # Mock existing session
-        existing_session = UserSession(
-            user_id='U123456',
-            launch_date='2024-03-15',
-            databricks_data=json.dumps({'BOM': {'status': 'success'}})
-        )
-        mock_session.query.return_value.filter.return_value.first.return_value = existing_session
-        
         self.db_manager.update_user_session('U123456', launch_date='2024-04-15')
         
-        # Verify session was updated
-        assert existing_session.launch_date == '2024-04-15'
+        # Verify the active session was updated with one UPDATE statement, without loading it
+        mock_session.execute.assert_called_once()
+        statement = mock_session.execute.call_args[0][0]
+        params = statement.compile().params
+        assert statement.table.name == 'user_sessions'
+        assert params['launch_date'] == '2024-04-15'
+        assert params['user_id_1'] == 'U123456'
     
     def test_update_user_session_not_found(self):
         """Test user session update when not found"""
@@ -222,16 +256,18 @@ class TestDatabaseManagerComprehensive:
         
         self.db_manager.store_metrics(user_id, command, launch_date, response_time, success, error_message)
         
-        # Verify metrics were added
-        mock_session.add.assert_called_once()
-        added_metrics = mock_session.add.call_args[0][0]
-        assert isinstance(added_metrics, BotMetrics)
-        assert added_metrics.user_id == user_id
-        assert added_metrics.command == command
-        assert added_metrics.launch_date == launch_date
-        assert added_metrics.response_time == response_time
-        assert added_metrics.success == success
-        assert added_metrics.error_message == error_message
+        # Metrics are queued and written in one bulk insert per batch
+        mock_session.bulk_insert_mappings.assert_not_called()
+        self.db_manager.flush_metrics()
+        
+        mock_session.bulk_insert_mappings.assert_called_once_with(BotMetrics, [{
+            'user_id': user_id,
+            'command': command,
+            'launch_date': launch_date,
+            'response_time': response_time,
+            'success': success,
+            'error_message': error_message
+        }])
     
     def test_store_metrics_with_error(self):
         """Test metrics storage with error"""
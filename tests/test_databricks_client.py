@@ -8,11 +8,21 @@ import pandas as pd
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import databricks_client
 from databricks_client import DatabricksClient
+from databricks.sdk.service.sql import StatementState
+from config import DATABRICKS_FQ_TABLES
 
 class TestDatabricksClient:
     """Test DatabricksClient class"""
     
+    @pytest.fixture(autouse=True)
+    def reset_workspace_client(self):
+        """Drop the shared WorkspaceClient so each test builds its own mock"""
+        databricks_client._workspace_client = None
+        yield
+        databricks_client._workspace_client = None
+    
     @patch('databricks_client.WorkspaceClient')
     @patch('databricks_client.DATABRICKS_HOST', 'https://test.databricks.com')
     @patch('databricks_client.DATABRICKS_TOKEN', 'test_token')
@@ -29,6 +39,15 @@ class TestDatabricksClient:
             token='test_token'
         )
     
+    @patch('databricks_client.WorkspaceClient')
+    def test_workspace_client_shared_across_instances(self, mock_workspace_client):
+        """Test WorkspaceClient is created once and reused"""
+        first = DatabricksClient()
+        second = DatabricksClient()
+        
+        mock_workspace_client.assert_called_once()
+        assert first.client is second.client
+    
     @patch('databricks_client.WorkspaceClient')
     @patch('databricks_client.DATABRICKS_HOST', 'https://test.databricks.com')
     @patch('databricks_client.DATABRICKS_TOKEN', 'test_token')
@@ -68,6 +87,39 @@ class TestDatabricksClient:
                             assert '4p' in result
                             assert 'ppap' in result
     
+    @patch('databricks_client.WorkspaceClient')
+    def test_query_vehicle_program_status_cached(self, mock_workspace_client):
+        """Test repeated launch-date queries are served from the cache until invalidated"""
+        client = DatabricksClient()
+        
+        with patch.object(client, '_execute_query') as mock_execute:
+            mock_execute.return_value = {'status': 'success', 'data': [], 'summary': {}}
+            
+            first = client.query_vehicle_program_status('2024-03-15')
+            first['ppap']['status'] = 'changed'
+            second = client.query_vehicle_program_status('2024-03-15')
+            
+            assert second['ppap']['status'] == 'success'
+            assert mock_execute.call_count == 5
+            
+            client.invalidate('2024-03-15')
+            client.query_vehicle_program_status('2024-03-15')
+            
+            assert mock_execute.call_count == 10
+    
+    @patch('databricks_client.WorkspaceClient')
+    def test_query_vehicle_program_status_errors_not_cached(self, mock_workspace_client):
+        """Test a result with a failed department is queried again on the next call"""
+        client = DatabricksClient()
+        
+        with patch.object(client, '_execute_query') as mock_execute:
+            mock_execute.return_value = {'status': 'error', 'error': 'warehouse unavailable', 'data': [], 'summary': {}}
+            
+            client.query_vehicle_program_status('2024-03-15')
+            client.query_vehicle_program_status('2024-03-15')
+            
+            assert mock_execute.call_count == 10
+    
     @patch('databricks_client.WorkspaceClient')
     @patch('databricks_client.DATABRICKS_HOST', 'https://test.databricks.com')
     @patch('databricks_client.DATABRICKS_TOKEN', 'test_token')
@@ -86,9 +138,6 @@ class TestDatabricksClient:
     @patch('databricks_client.WorkspaceClient')
     @patch('databricks_client.DATABRICKS_HOST', 'https://test.databricks.com')
     @patch('databricks_client.DATABRICKS_TOKEN', 'test_token')
-    @patch('databricks_client.DATABRICKS_CATALOG', 'test_catalog')
-    @patch('databricks_client.DATABRICKS_SCHEMA', 'test_schema')
-    @patch('databricks_client.DATABRICKS_TABLES', {'bill_of_material': 'bom_table'})
     def test_query_bom_status(self, mock_workspace_client):
         """Test BOM status query"""
         mock_client = Mock()
@@ -105,16 +154,14 @@ class TestDatabricksClient:
             # Verify the query was executed
             mock_execute.assert_called_once()
             call_args = mock_execute.call_args
-            assert 'bom_table' in call_args[0][0]  # Check SQL contains table name
-            assert '2024-03-15' in call_args[0][0]  # Check SQL contains date
+            assert DATABRICKS_FQ_TABLES['bill_of_material'] in call_args[0][0]  # Check SQL contains table name
+            assert '2024-03-15' not in call_args[0][0]  # Date is bound, not interpolated
+            assert call_args[0][2][0].value == '2024-03-15'
             assert call_args[0][1] == 'BOM'  # Check department parameter
     
     @patch('databricks_client.WorkspaceClient')
     @patch('databricks_client.DATABRICKS_HOST', 'https://test.databricks.com')
     @patch('databricks_client.DATABRICKS_TOKEN', 'test_token')
-    @patch('databricks_client.DATABRICKS_CATALOG', 'test_catalog')
-    @patch('databricks_client.DATABRICKS_SCHEMA', 'test_schema')
-    @patch('databricks_client.DATABRICKS_TABLES', {'master_parts_list': 'mpl_table'})
     def test_query_mpl_status(self, mock_workspace_client):
         """Test Master Parts List status query"""
         mock_client = Mock()
@@ -129,7 +176,7 @@ class TestDatabricksClient:
             
             mock_execute.assert_called_once()
             call_args = mock_execute.call_args
-            assert 'mpl_table' in call_args[0][0]
+            assert DATABRICKS_FQ_TABLES['master_parts_list'] in call_args[0][0]
             assert call_args[0][1] == 'MPL'
     
     @patch('databricks_client.WorkspaceClient')
@@ -173,6 +220,60 @@ class TestDatabricksClient:
         assert 'count' in result
         assert result['count'] == 2
     
+    @staticmethod
+    def _statement_response(state, columns, rows):
+        """Build a statement execution response with the given state, column names and row arrays"""
+        response = Mock()
+        response.status.state = state
+        response.manifest.schema.columns = []
+        for column_name in columns:
+            column = Mock()
+            column.name = column_name
+            response.manifest.schema.columns.append(column)
+        response.result.data_array = rows
+        return response
+    
+    @patch('databricks_client.WorkspaceClient')
+    @patch('databricks_client.DATABRICKS_WAREHOUSE_ID', 'test_warehouse')
+    def test_execute_statement_maps_rows(self, mock_workspace_client):
+        """Test statement rows are mapped to column dicts and counted by status"""
+        statement_execution = mock_workspace_client.return_value.statement_execution
+        statement_execution.execute_statement.return_value = self._statement_response(
+            StatementState.SUCCEEDED,
+            ['part_number', 'status'],
+            [['P001', 'completed'], ['P002', 'pending'], ['P003', 'completed'], ['P004', 'in_review']]
+        )
+        parameters = DatabricksClient._launch_date_parameters('2024-03-15')
+        
+        result = DatabricksClient()._execute_query(databricks_client._BOM_QUERY, "BOM", parameters)
+        
+        statement_execution.execute_statement.assert_called_once_with(
+            statement=databricks_client._BOM_QUERY,
+            warehouse_id='test_warehouse',
+            parameters=parameters,
+            wait_timeout='30s'
+        )
+        assert result['status'] == 'success'
+        assert result['data'][0] == {'part_number': 'P001', 'status': 'completed'}
+        assert len(result['data']) == 4
+        assert result['summary'] == {'total_items': 4, 'completed': 2, 'pending': 1, 'overdue': 0}
+    
+    @patch('databricks_client.WorkspaceClient')
+    @patch('databricks_client.DATABRICKS_WAREHOUSE_ID', 'test_warehouse')
+    def test_execute_statement_not_succeeded(self, mock_workspace_client):
+        """Test a statement that does not succeed is reported as a department error"""
+        statement_execution = mock_workspace_client.return_value.statement_execution
+        statement_execution.execute_statement.return_value = self._statement_response(
+            StatementState.FAILED, ['part_number', 'status'], None
+        )
+        
+        result = DatabricksClient()._execute_query(databricks_client._BOM_QUERY, "BOM")
+        
+        assert result['status'] == 'error'
+        assert 'FAILED' in result['error']
+        assert result['data'] == []
+        assert result['summary']['total_items'] == 0
+    
     @patch('databricks_client.WorkspaceClient')
     @patch('databricks_client.DATABRICKS_HOST', 'https://test.databricks.com')
     @patch('databricks_client.DATABRICKS_TOKEN', 'test_token')
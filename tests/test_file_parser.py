@@ -1,10 +1,11 @@
 import pytest
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import sys
 import os
 import pandas as pd
 import io
+import json
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -24,20 +25,22 @@ class TestFileParser:
     @patch('file_parser.GOOGLE_SHEETS_SCOPES', ['https://www.googleapis.com/auth/spreadsheets'])
     def test_initialization_with_credentials(self):
         """Test FileParser initialization with Google credentials"""
-        with patch('file_parser.Credentials') as mock_credentials:
+        with patch('file_parser.load_credentials') as mock_load_credentials:
             mock_creds = Mock()
-            mock_credentials.from_service_account_file.return_value = mock_creds
+            mock_load_credentials.return_value = mock_creds
             
             parser = FileParser()
             
             assert parser.google_creds == mock_creds
-            mock_credentials.from_service_account_file.assert_called_once()
+            mock_load_credentials.assert_called_once_with(
+                '/path/to/credentials.json', ('https://www.googleapis.com/auth/spreadsheets',)
+            )
     
     @patch('file_parser.GOOGLE_SHEETS_CREDENTIALS_FILE', '/path/to/credentials.json')
     def test_initialization_credentials_error(self):
         """Test FileParser initialization with credentials error"""
-        with patch('file_parser.Credentials') as mock_credentials:
-            mock_credentials.from_service_account_file.side_effect = Exception("File not found")
+        with patch('file_parser.load_credentials') as mock_load_credentials:
+            mock_load_credentials.side_effect = Exception("File not found")
             
             # Should not raise exception, just log error
             parser = FileParser()
@@ -73,8 +76,7 @@ class TestFileParser:
         for filename in invalid_files:
             assert parser.validate_file_type(filename) is False
     
-    @patch('file_parser.pd.read_excel')
-    def test_parse_excel_file_success(self, mock_read_excel):
+    def test_parse_excel_file_success(self):
         """Test successful Excel file parsing"""
         parser = FileParser()
         
@@ -90,14 +92,14 @@ class TestFileParser:
                 'description': ['Part A', 'Part B']
             })
         }
-        mock_read_excel.return_value = mock_data
         
         # Mock file content
         file_content = b"fake excel content"
         filename = "test_data.xlsx"
         
-        # Mock the sheet parsing methods
-        with patch.object(parser, '_parse_excel_sheet') as mock_parse_sheet:
+        # Mock the workbook reader and sheet parsing methods
+        with patch.object(parser, '_read_workbook', return_value=mock_data) as mock_read_workbook, \
+             patch.object(parser, '_parse_excel_sheet') as mock_parse_sheet:
             with patch.object(parser, '_generate_summary') as mock_summary:
                 mock_parse_sheet.return_value = {'status': 'parsed'}
                 mock_summary.return_value = {'total_sheets': 2}
@@ -111,17 +113,18 @@ class TestFileParser:
                 assert 'summary' in result
                 
                 # Verify Excel was read
-                mock_read_excel.assert_called_once()
+                mock_read_workbook.assert_called_once_with(file_content, filename)
                 
                 # Verify parsing was called for each sheet
                 assert mock_parse_sheet.call_count == 2
     
-    @patch('file_parser.pd.read_excel')
-    def test_parse_excel_file_error(self, mock_read_excel):
+    @patch('file_parser.CalamineWorkbook', None)
+    @patch('file_parser.openpyxl.load_workbook')
+    def test_parse_excel_file_error(self, mock_load_workbook):
         """Test Excel file parsing with error"""
         parser = FileParser()
         
-        mock_read_excel.side_effect = Exception("Invalid Excel file")
+        mock_load_workbook.side_effect = Exception("Invalid Excel file")
         
         file_content = b"invalid content"
         filename = "invalid.xlsx"
@@ -129,33 +132,105 @@ class TestFileParser:
         with pytest.raises(Exception, match="Invalid Excel file"):
             parser.parse_excel_file(file_content, filename)
     
-    @patch('file_parser.gspread.authorize')
-    def test_parse_google_sheets_success(self, mock_authorize):
+    def test_parse_excel_file_uses_calamine(self):
+        """Test Excel parsing reads sheets through calamine when it is installed"""
+        parser = FileParser()
+        
+        mock_workbook = Mock()
+        mock_workbook.sheet_names = ['BOM_Data']
+        mock_workbook.get_sheet_by_name.return_value.to_python.return_value = [
+            ['part_number', 'status'],
+            ['P001', 'complete'],
+            ['P002', 'pending']
+        ]
+        
+        with patch('file_parser.CalamineWorkbook') as mock_calamine, \
+             patch('file_parser.pd.read_excel') as mock_read_excel:
+            mock_calamine.from_filelike.return_value = mock_workbook
+            
+            result = parser.parse_excel_file(b"fake excel content", "test_data.xlsx")
+            
+            mock_read_excel.assert_not_called()
+            assert result['sheets']['BOM_Data']['total_rows'] == 2
+            assert result['sheets']['BOM_Data']['columns'] == ['part_number', 'status']
+    
+    def test_read_workbook_spools_large_uploads(self):
+        """Test large workbooks are opened by path instead of copied into calamine"""
+        parser = FileParser()
+        
+        mock_workbook = Mock()
+        mock_workbook.sheet_names = []
+        
+        with patch('file_parser.CalamineWorkbook') as mock_calamine, \
+             patch('file_parser.WORKBOOK_SPOOL_THRESHOLD', 4):
+            mock_calamine.from_path.return_value = mock_workbook
+            
+            assert parser._read_workbook(b"large excel content", "test_data.xlsx") == {}
+            
+            mock_calamine.from_filelike.assert_not_called()
+            assert mock_calamine.from_path.call_args[0][0].endswith('.xlsx')
+    
+    def test_rows_to_dataframe_specializes_template_sheets(self):
+        """Test template sheets keep only template columns with their known dtypes"""
+        rows = [
+            ['part_number', 'notes', 'part_name', 'status', 'completion'],
+            ['P001', 'x', 'Part A', 'complete', 100],
+            ['P002', 'y', 'Part B', 'pending', 25]
+        ]
+        
+        df = FileParser._rows_to_dataframe(rows, 'BOM_Data')
+        
+        assert list(df.columns) == ['part_number', 'part_name', 'status', 'completion']
+        assert str(df['status'].dtype) == 'category'
+        assert str(df['completion'].dtype) == 'float32'
+        
+        # Sheets without a matching template keep every column
+        assert list(FileParser._rows_to_dataframe(rows, 'Notes').columns) == rows[0]
+    
+    def test_rows_to_dataframe_treats_empty_calamine_cells_as_missing(self):
+        """Test calamine's '' for empty cells and blank headers reads like pandas would"""
+        rows = [
+            ['part_number', '', 'part_name', 'status', 'completion'],
+            ['P001', 'x', 'Part A', 'complete', 100],
+            ['P002', '', 'Part B', '', '']
+        ]
+        
+        df = FileParser._rows_to_dataframe(rows, 'BOM_Data')
+        
+        assert str(df['completion'].dtype) == 'float32'
+        assert pd.isna(df['completion'][1])
+        assert list(df['status'].cat.categories) == ['complete']
+        
+        raw = FileParser._rows_to_dataframe(rows, 'Notes')
+        assert list(raw.columns) == ['part_number', 'Unnamed: 1', 'part_name', 'status', 'completion']
+        assert raw['Unnamed: 1'].isna().tolist() == [False, True]
+    
+    @patch('file_parser.get_gspread_client')
+    def test_parse_google_sheets_success(self, mock_get_client):
         """Test successful Google Sheets parsing"""
         parser = FileParser()
         parser.google_creds = Mock()
         
         # Mock gspread objects
         mock_gc = Mock()
-        mock_authorize.return_value = mock_gc
+        mock_get_client.return_value = mock_gc
         
         mock_spreadsheet = Mock()
         mock_gc.open_by_key.return_value = mock_spreadsheet
         
         mock_worksheet1 = Mock()
         mock_worksheet1.title = "Sheet1"
-        mock_worksheet1.get_all_records.return_value = [
-            {'part_number': 'P001', 'status': 'complete'},
-            {'part_number': 'P002', 'status': 'pending'}
-        ]
         
         mock_worksheet2 = Mock()
         mock_worksheet2.title = "Sheet2"
-        mock_worksheet2.get_all_records.return_value = [
-            {'part_id': 'ID001', 'description': 'Part A'}
-        ]
         
         mock_spreadsheet.worksheets.return_value = [mock_worksheet1, mock_worksheet2]
+        mock_spreadsheet.values_batch_get.return_value = {
+            'valueRanges': [
+                {'values': [['part_number', 'status'], ['P001', 'complete'], ['P002']]},
+                {'values': [['part_id', 'description'], ['ID001', 'Part A']]}
+            ]
+        }
         
         # Mock the sheet parsing methods
         with patch.object(parser, '_parse_google_sheet') as mock_parse_sheet:
@@ -172,11 +247,17 @@ class TestFileParser:
                 assert 'summary' in result
                 
                 # Verify gspread was called
-                mock_authorize.assert_called_once_with(parser.google_creds)
+                mock_get_client.assert_called_once_with(parser.google_creds)
                 mock_gc.open_by_key.assert_called_once_with("test_spreadsheet_id")
                 
-                # Verify parsing was called for each worksheet
+                # Verify all worksheets were fetched in one batch request
+                mock_spreadsheet.values_batch_get.assert_called_once()
+                assert mock_spreadsheet.values_batch_get.call_args[0][0] == ["'Sheet1'", "'Sheet2'"]
+                
+                # Verify parsing was called for each worksheet, with trimmed rows padded
                 assert mock_parse_sheet.call_count == 2
+                first_df = mock_parse_sheet.call_args_list[0][0][0]
+                assert first_df['status'].tolist() == ['complete', '']
     
     def test_parse_google_sheets_no_credentials(self):
         """Test Google Sheets parsing without credentials"""
@@ -194,7 +275,7 @@ class TestFileParser:
         # Mock requests response
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             'sheets': [
                 {
                     'id': 123,
@@ -209,8 +290,9 @@ class TestFileParser:
                     ]
                 }
             ]
-        }
-        mock_get.return_value = mock_response
+        }).encode()
+        mock_response.raw = io.BytesIO(mock_response.content)
+        mock_get.return_value.__enter__.return_value = mock_response
         
         # Mock the data parsing method
         with patch.object(parser, '_parse_smartsheet_data') as mock_parse_data:
@@ -231,6 +313,44 @@ class TestFileParser:
                 call_args = mock_get.call_args
                 assert 'test_sheet_id' in call_args[0][0]
     
+    def test_stream_smartsheet(self):
+        """Test Smartsheet JSON is converted row by row while streaming"""
+        pytest.importorskip('ijson')
+        parser = FileParser()
+        
+        payload = json.dumps({
+            'id': 123,
+            'name': 'BOM Tracker',
+            'columns': [{'id': 1, 'title': 'part_number'}, {'id': 2, 'title': 'qty'}],
+            'rows': [
+                {'id': 10, 'cells': [{'columnId': 1, 'value': 'P001'}, {'columnId': 2, 'value': 4}]},
+                {'id': 11, 'cells': [{'columnId': 1, 'value': 'P002'}, {'columnId': 2}]}
+            ]
+        }).encode()
+        
+        sheet_data, rows = parser._stream_smartsheet(io.BytesIO(payload))
+        
+        assert sheet_data['name'] == 'BOM Tracker'
+        assert [col['title'] for col in sheet_data['columns']] == ['part_number', 'qty']
+        assert rows == [{'col_1': 'P001', 'col_2': 4}, {'col_1': 'P002', 'col_2': ''}]
+    
+    def test_parse_smartsheets_concurrent(self):
+        """Test parsing several Smartsheets fetched in one async batch"""
+        parser = FileParser()
+        
+        sheets = [
+            {'name': 'BOM', 'columns': [], 'rows': []},
+            {'name': 'PPAP', 'columns': [], 'rows': []}
+        ]
+        
+        with patch.object(parser, '_fetch_smartsheets', new=AsyncMock(return_value=sheets)) as mock_fetch:
+            result = parser.parse_smartsheets(['111', '222'])
+            
+            mock_fetch.assert_awaited_once_with(['111', '222'])
+            assert list(result) == ['111', '222']
+            assert result['111']['data']['sheet_name'] == 'BOM'
+            assert result['222']['sheet_id'] == '222'
+    
     @patch('file_parser.requests.get')
     def test_parse_smartsheet_error(self, mock_get):
         """Test Smartsheet parsing with error"""
@@ -285,6 +405,24 @@ class TestFileParser:
         assert result['data'].shape[0] == 2
         assert 'part_id' in result['data'].columns
     
+    def test_parse_excel_sheet_compacts_dtypes(self):
+        """Test repetitive text becomes categorical and integers are downcast"""
+        parser = FileParser()
+        
+        df = pd.DataFrame({
+            'part_number': ['P001', 'P002', 'P003', 'P004', 'P005'],
+            'status': ['complete', 'pending', 'complete', 'complete', 'complete'],
+            'quantity': [1, 2, 3, 4, 5],
+            'cost': [1.25, 2.5, 3.75, 5.0, 6.25]
+        })
+        
+        result = parser._parse_excel_sheet(df, "Parts")['data']
+        
+        assert result['part_number'].dtype == object
+        assert str(result['status'].dtype) == 'category'
+        assert str(result['quantity'].dtype) == 'int8'
+        assert str(result['cost'].dtype) == 'float64'
+    
     def test_parse_smartsheet_data(self):
         """Test Smartsheet data parsing"""
         parser = FileParser()
@@ -310,6 +448,7 @@ class TestFileParser:
         assert 'summary' in result
         assert 'department_mapping' in result
         assert len(result['data']) == 2
+        assert result['data'][0] == {'col_1': 'P001', 'col_2': 'complete'}
     
     def test_generate_summary(self):
         """Test summary generation"""
@@ -329,6 +468,20 @@ class TestFileParser:
         assert 'departments' in result
         assert result['total_sheets'] == 2
         assert result['total_records'] == 3
+    
+    def test_generate_summary_detects_departments(self):
+        """Test department keywords are found anywhere in sheet names"""
+        parser = FileParser()
+        
+        sheets_data = {
+            'BOM_Data': {'total_rows': 2},
+            'ppap tracker': {'total_rows': 1},
+            'Notes': {'total_rows': 4}
+        }
+        
+        result = parser._generate_summary(sheets_data)
+        
+        assert result['departments_found'] == ['BOM', 'PPAP']
 
 if __name__ == '__main__':
     pytest.main([__file__]) 
\ No newline at end of file
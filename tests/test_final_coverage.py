@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import unittest
 from unittest.mock import Mock, patch, MagicMock
@@ -88,10 +89,8 @@ class TestProductionConfigFinal:
         
         # Test file handler
         file_handler = handlers['file']
-        assert file_handler['class'] == 'logging.handlers.RotatingFileHandler'
+        assert file_handler['()'] == 'production_config._queue_handler'
         assert file_handler['level'] == 'DEBUG'
-        assert 'formatter' in file_handler
-        assert 'filename' in file_handler
     
     def test_logging_config_formatters(self):
         """Test logging configuration formatters"""
@@ -325,7 +324,7 @@ class TestIntegrationFinal:
             assert client.client is None
             
             # Test processing without client
-            result = client.process_vehicle_program_query('2024-03-15', {})
+            result = asyncio.run(client.process_vehicle_program_query('2024-03-15', {}))
             assert "OpenAI client not configured" in result
     
     def test_comprehensive_workflow(self):
@@ -376,7 +375,7 @@ class TestErrorHandlingFinal:
             client = OpenAIClient()
             
             # Test analyze_program_status with no client
-            result = client.analyze_program_status({}, '2024-03-15')
+            result = asyncio.run(client.analyze_program_status({}, '2024-03-15'))
             assert "encountered an error" in result
     
     def test_database_error_handling(self):
@@ -0,0 +1,59 @@
+import pytest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import google_client
+
+class TestGoogleClient:
+    """Test shared Google API clients"""
+
+    @pytest.fixture(autouse=True)
+    def reset_clients(self):
+        """Drop cached clients between tests"""
+        for cached in (google_client.load_credentials, google_client.get_gspread_client, google_client.get_sheets_service):
+            cached.cache_clear()
+        yield
+        for cached in (google_client.load_credentials, google_client.get_gspread_client, google_client.get_sheets_service):
+            cached.cache_clear()
+
+    @patch('google_client.Credentials.from_service_account_file')
+    def test_credentials_loaded_once(self, mock_from_file):
+        """Test the service account key is parsed once per process"""
+        scopes = ('https://www.googleapis.com/auth/spreadsheets',)
+
+        first = google_client.load_credentials('/path/to/credentials.json', scopes)
+        second = google_client.load_credentials('/path/to/credentials.json', scopes)
+
+        assert first is second
+        mock_from_file.assert_called_once_with('/path/to/credentials.json', scopes=scopes)
+
+    @patch('google_client.gspread.Client')
+    @patch('google_client.AuthorizedSession')
+    def test_gspread_client_reused(self, mock_session, mock_client):
+        """Test one pooled gspread client is shared for the same credentials"""
+        creds = Mock()
+
+        first = google_client.get_gspread_client(creds)
+        second = google_client.get_gspread_client(creds)
+
+        assert first is second
+        mock_session.assert_called_once_with(creds)
+        mock_session.return_value.mount.assert_called_once()
+        mock_client.assert_called_once_with(auth=creds, session=mock_session.return_value)
+
+    @patch('google_client.build')
+    def test_sheets_service_built_once(self, mock_build):
+        """Test the Sheets discovery client is only built once"""
+        creds = Mock()
+
+        google_client.get_sheets_service(creds)
+        google_client.get_sheets_service(creds)
+
+        mock_build.assert_called_once_with('sheets', 'v4', credentials=creds)
+
+if __name__ == '__main__':
+    pytest.main([__file__])
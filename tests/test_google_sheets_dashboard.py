@@ -7,7 +7,7 @@ import os
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from google_sheets_dashboard import GoogleSheetsDashboard
+from google_sheets_dashboard import GoogleSheetsDashboard, _SheetBatch
 
 class TestGoogleSheetsDashboard:
     """Test Google Sheets Dashboard functionality"""
@@ -19,7 +19,7 @@ class TestGoogleSheetsDashboard:
         self.mock_spreadsheet = Mock()
         
     @patch('google_sheets_dashboard.service_account.Credentials.from_service_account_file')
-    @patch('google_sheets_dashboard.build')
+    @patch('google_client.build')
     def test_initialization_success(self, mock_build, mock_credentials):
         """Test successful dashboard initialization"""
         mock_credentials.return_value = self.mock_credentials
@@ -40,7 +40,7 @@ class TestGoogleSheetsDashboard:
             GoogleSheetsDashboard()
     
     @patch('google_sheets_dashboard.service_account.Credentials.from_service_account_file')
-    @patch('google_sheets_dashboard.build')
+    @patch('google_client.build')
     def test_create_dashboard_success(self, mock_build, mock_credentials):
         """Test successful dashboard creation"""
         mock_credentials.return_value = self.mock_credentials
@@ -61,7 +61,7 @@ class TestGoogleSheetsDashboard:
         mock_spreadsheet.create.assert_called_once()
     
     @patch('google_sheets_dashboard.service_account.Credentials.from_service_account_file')
-    @patch('google_sheets_dashboard.build')
+    @patch('google_client.build')
     def test_create_dashboard_with_template(self, mock_build, mock_credentials):
         """Test dashboard creation with template"""
         mock_credentials.return_value = self.mock_credentials
@@ -80,7 +80,7 @@ class TestGoogleSheetsDashboard:
         assert result['id'] == 'copied_id'
     
     @patch('google_sheets_dashboard.service_account.Credentials.from_service_account_file')
-    @patch('google_sheets_dashboard.build')
+    @patch('google_client.build')
     def test_create_summary_sheet(self, mock_build, mock_credentials):
         """Test summary sheet creation"""
         mock_credentials.return_value = self.mock_credentials
@@ -100,7 +100,7 @@ class TestGoogleSheetsDashboard:
         mock_spreadsheet.batchUpdate.assert_called_once()
     
     @patch('google_sheets_dashboard.service_account.Credentials.from_service_account_file')
-    @patch('google_sheets_dashboard.build')
+    @patch('google_client.build')
     def test_create_department_sheets(self, mock_build, mock_credentials):
         """Test department sheets creation"""
         mock_credentials.return_value = self.mock_credentials
@@ -121,7 +121,7 @@ class TestGoogleSheetsDashboard:
         mock_spreadsheet.batchUpdate.assert_called_once()
     
     @patch('google_sheets_dashboard.service_account.Credentials.from_service_account_file')
-    @patch('google_sheets_dashboard.build')
+    @patch('google_client.build')
     def test_create_file_data_sheets(self, mock_build, mock_credentials):
         """Test file data sheets creation"""
         mock_credentials.return_value = self.mock_credentials
@@ -142,7 +142,7 @@ class TestGoogleSheetsDashboard:
         mock_spreadsheet.batchUpdate.assert_called_once()
     
     @patch('google_sheets_dashboard.service_account.Credentials.from_service_account_file')
-    @patch('google_sheets_dashboard.build')
+    @patch('google_client.build')
     def test_create_file_data_sheets_no_data(self, mock_build, mock_credentials):
         """Test file data sheets creation with no data"""
         mock_credentials.return_value = self.mock_credentials
@@ -154,7 +154,7 @@ class TestGoogleSheetsDashboard:
         assert result is None
     
     @patch('google_sheets_dashboard.service_account.Credentials.from_service_account_file')
-    @patch('google_sheets_dashboard.build')
+    @patch('google_client.build')
     def test_create_charts_and_visualizations(self, mock_build, mock_credentials):
         """Test charts and visualizations creation"""
         mock_credentials.return_value = self.mock_credentials
@@ -174,7 +174,7 @@ class TestGoogleSheetsDashboard:
         mock_spreadsheet.batchUpdate.assert_called_once()
     
     @patch('google_sheets_dashboard.service_account.Credentials.from_service_account_file')
-    @patch('google_sheets_dashboard.build')
+    @patch('google_client.build')
     def test_format_summary_sheet(self, mock_build, mock_credentials):
         """Test summary sheet formatting"""
         mock_credentials.return_value = self.mock_credentials
@@ -194,7 +194,7 @@ class TestGoogleSheetsDashboard:
         mock_spreadsheet.batchUpdate.assert_called_once()
     
     @patch('google_sheets_dashboard.service_account.Credentials.from_service_account_file')
-    @patch('google_sheets_dashboard.build')
+    @patch('google_client.build')
     def test_format_department_sheet(self, mock_build, mock_credentials):
         """Test department sheet formatting"""
         mock_credentials.return_value = self.mock_credentials
@@ -214,7 +214,7 @@ class TestGoogleSheetsDashboard:
         mock_spreadsheet.batchUpdate.assert_called_once()
     
     @patch('google_sheets_dashboard.service_account.Credentials.from_service_account_file')
-    @patch('google_sheets_dashboard.build')
+    @patch('google_client.build')
     def test_update_dashboard(self, mock_build, mock_credentials):
         """Test dashboard update"""
         mock_credentials.return_value = self.mock_credentials
@@ -235,7 +235,7 @@ class TestGoogleSheetsDashboard:
         mock_spreadsheet.values.return_value.update.assert_called_once()
     
     @patch('google_sheets_dashboard.service_account.Credentials.from_service_account_file')
-    @patch('google_sheets_dashboard.build')
+    @patch('google_client.build')
     def test_get_sheet_data(self, mock_build, mock_credentials):
         """Test getting sheet data"""
         mock_credentials.return_value = self.mock_credentials
@@ -255,7 +255,7 @@ class TestGoogleSheetsDashboard:
         mock_spreadsheet.values.return_value.get.assert_called_once()
     
     @patch('google_sheets_dashboard.service_account.Credentials.from_service_account_file')
-    @patch('google_sheets_dashboard.build')
+    @patch('google_client.build')
     def test_create_dashboard_comprehensive(self, mock_build, mock_credentials):
         """Test comprehensive dashboard creation"""
         mock_credentials.return_value = self.mock_credentials
@@ -289,6 +289,89 @@ class TestGoogleSheetsDashboard:
         data = [['Test', 'Data']]
         update_result = dashboard.update_dashboard("test_id", "Summary!A1", data)
         assert update_result['updatedCells'] == 5
+    
+    @patch('google_sheets_dashboard.DASHBOARD_TEMPLATE_ID', None)
+    @patch('google_sheets_dashboard.get_gspread_client')
+    def test_create_dashboard_uses_create_response(self, mock_get_client):
+        """Test the dashboard is built from the create response without extra metadata fetches"""
+        mock_gc = mock_get_client.return_value
+        mock_gc.request.return_value.json.return_value = {
+            'spreadsheetId': 'dash_id',
+            'spreadsheetUrl': 'https://docs.google.com/spreadsheets/d/dash_id/edit',
+            'sheets': [{'properties': {'sheetId': 0, 'title': 'Sheet1'}}]
+        }
+        
+        dashboard = GoogleSheetsDashboard()
+        dashboard.creds = Mock()
+        url = dashboard.create_dashboard({}, launch_date='2024-06-01')
+        
+        assert url == 'https://docs.google.com/spreadsheets/d/dash_id/edit'
+        create_call, batch_call = mock_gc.request.call_args_list
+        assert create_call[1]['json'] == {'properties': {'title': 'Vehicle Program Dashboard - 2024-06-01'}}
+        assert batch_call[0][1].endswith('/dash_id:batchUpdate')
+        mock_gc.insert_permission.assert_called_once_with('dash_id', None, perm_type='anyone', role='reader')
+        mock_gc.open_by_key.assert_not_called()
+    
+    def test_as_dataframe_restores_split_orientation(self):
+        """Test DataFrames restored from the session store are rebuilt"""
+        import pandas as pd
+        df = pd.DataFrame({'part_number': ['P1', 'P2'], 'status': ['Complete', 'Pending']})
+        
+        assert GoogleSheetsDashboard._as_dataframe(df) is df
+        restored = GoogleSheetsDashboard._as_dataframe(df.to_dict(orient='split'))
+        assert restored.equals(df)
+        assert GoogleSheetsDashboard._as_dataframe(None).empty
+    
+    def test_frame_rows_blanks_missing_values(self):
+        """Test DataFrame rows are materialized with NaN sent as None"""
+        import pandas as pd
+        df = pd.DataFrame({'part_number': ['P1', 'P2'], 'qty': [1.0, float('nan')]})
+        
+        assert GoogleSheetsDashboard._frame_rows(df) == [['P1', 1.0], ['P2', None]]
+    
+    def test_department_summary_rows(self):
+        """Test completion percentages are computed for all departments at once"""
+        databricks_data = {
+            'bom': {'status': 'success', 'summary': {'total_items': 8, 'completed': 6, 'pending': 1, 'overdue': 1}},
+            'mpl': {'status': 'success', 'summary': {}},
+            'ppap': {'status': 'error', 'error': 'timeout'}
+        }
+        
+        assert GoogleSheetsDashboard._department_summary_rows(databricks_data) == [
+            ['BOM', 8, 6, 1, 1, '75.0%'],
+            ['MPL', 0, 0, 0, 0, '0.0%']
+        ]
+        assert GoogleSheetsDashboard._department_summary_rows({}) == []
+    
+    def test_write_records_to_sheet_skips_empty_data(self):
+        """Test upload sheets are only added for non-empty data, sized to fit"""
+        dashboard = GoogleSheetsDashboard()
+        batch = _SheetBatch({'Sheet1': 0})
+        
+        dashboard._write_records_to_sheet(batch, 'Upload_Empty', [])
+        assert batch.requests == []
+        
+        dashboard._write_records_to_sheet(batch, 'Upload_BOM', [{'part': 'P1', 'qty': 2}])
+        grid = batch.requests[0]['addSheet']['properties']['gridProperties']
+        assert grid == {'rowCount': 2, 'columnCount': 2}
+    
+    def test_sheet_batch_adds_and_writes_in_one_request_list(self):
+        """Test sheet adds and cell writes are queued for a single batchUpdate"""
+        batch = _SheetBatch({'Sheet1': 0, 'Summary': 4})
+        sheet_id = batch.sheet_id('BOM_Status', rows=2, cols=1)
+        batch.write_values(sheet_id, [['part', 'qty'], ['P1', 3], ['P2', None]])
+        
+        assert sheet_id == 5
+        assert batch.sheet_id('Summary', rows=50, cols=20) == 4
+        assert batch.sheet_id('BOM_Status', rows=100, cols=20) == 5
+        add_request, write_request = batch.requests
+        assert add_request['addSheet']['properties']['gridProperties'] == {'rowCount': 3, 'columnCount': 2}
+        rows = write_request['updateCells']['rows']
+        assert rows[1]['values'] == [
+            {'userEnteredValue': {'stringValue': 'P1'}},
+            {'userEnteredValue': {'numberValue': 3}}
+        ]
+        assert rows[2]['values'][1] == {}
 
 if __name__ == '__main__':
     pytest.main([__file__]) 
\ No newline at end of file
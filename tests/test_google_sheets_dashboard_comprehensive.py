@@ -9,21 +9,22 @@ from datetime import datetime
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from google_sheets_dashboard import GoogleSheetsDashboard
+import google_client
+from google_sheets_dashboard import GoogleSheetsDashboard, _SheetBatch
 
 class TestGoogleSheetsDashboardComprehensive:
     """Comprehensive tests for GoogleSheetsDashboard"""
     
     def setup_method(self):
         """Set up test fixtures"""
+        self._clear_google_clients()
         with patch('google_sheets_dashboard.GOOGLE_SHEETS_CREDENTIALS_FILE', '/path/to/credentials.json'), \
              patch('google_sheets_dashboard.GOOGLE_SHEETS_SCOPES', ['https://www.googleapis.com/auth/spreadsheets']), \
              patch('google_sheets_dashboard.DASHBOARD_TEMPLATE_ID', 'template_id_123'):
             
             # Mock external dependencies
-            with patch('google_sheets_dashboard.Credentials') as mock_credentials, \
-                 patch('google_sheets_dashboard.build') as mock_build, \
-                 patch('google_sheets_dashboard.gspread') as mock_gspread:
+            with patch('google_client.Credentials') as mock_credentials, \
+                 patch('google_client.build') as mock_build:
                 
                 # Configure mocks
                 mock_creds = Mock()
@@ -32,11 +33,17 @@ class TestGoogleSheetsDashboardComprehensive:
                 mock_service = Mock()
                 mock_build.return_value = mock_service
                 
-                mock_gc = Mock()
-                mock_gspread.authorize.return_value = mock_gc
-                
                 self.dashboard = GoogleSheetsDashboard()
     
+    def teardown_method(self):
+        """Drop the shared Google clients built by the test"""
+        self._clear_google_clients()
+    
+    @staticmethod
+    def _clear_google_clients():
+        for cached in (google_client.load_credentials, google_client.get_gspread_client, google_client.get_sheets_service):
+            cached.cache_clear()
+    
     def test_initialization_success(self):
         """Test successful dashboard initialization"""
         assert self.dashboard.creds is not None
@@ -53,7 +60,7 @@ class TestGoogleSheetsDashboardComprehensive:
     def test_initialization_credentials_error(self):
         """Test initialization with credentials error"""
         with patch('google_sheets_dashboard.GOOGLE_SHEETS_CREDENTIALS_FILE', '/invalid/path.json'):
-            with patch('google_sheets_dashboard.Credentials') as mock_credentials:
+            with patch('google_client.Credentials') as mock_credentials:
                 mock_credentials.from_service_account_file.side_effect = Exception("Credentials error")
                 
                 dashboard = GoogleSheetsDashboard()
@@ -67,10 +74,10 @@ class TestGoogleSheetsDashboardComprehensive:
         mock_dashboard = Mock()
         mock_dashboard.url = "https://sheets.google.com/dashboard"
         
-        with patch('google_sheets_dashboard.gspread') as mock_gspread:
+        with patch('google_client.gspread') as mock_gspread, patch('google_client.AuthorizedSession'):
             mock_gc = Mock()
-            mock_gspread.authorize.return_value = mock_gc
-            mock_gc.create.return_value = mock_dashboard
+            mock_gspread.Client.return_value = mock_gc
+            mock_gc.request.return_value.json.return_value = {'spreadsheetId': 'dashboard_id', 'spreadsheetUrl': mock_dashboard.url}
             
             # Mock sheet creation methods
             with patch.object(self.dashboard, '_create_summary_sheet') as mock_summary, \
@@ -100,9 +107,9 @@ class TestGoogleSheetsDashboardComprehensive:
         mock_dashboard.url = "https://sheets.google.com/dashboard"
         mock_template.copy.return_value = mock_dashboard
         
-        with patch('google_sheets_dashboard.gspread') as mock_gspread:
+        with patch('google_client.gspread') as mock_gspread, patch('google_client.AuthorizedSession'):
             mock_gc = Mock()
-            mock_gspread.authorize.return_value = mock_gc
+            mock_gspread.Client.return_value = mock_gc
             mock_gc.open_by_key.return_value = mock_template
             
             with patch.object(self.dashboard, '_create_summary_sheet') as mock_summary, \
@@ -127,20 +134,17 @@ class TestGoogleSheetsDashboardComprehensive:
     
     def test_create_dashboard_creation_error(self):
         """Test dashboard creation with error"""
-        with patch('google_sheets_dashboard.gspread') as mock_gspread:
+        with patch('google_client.gspread') as mock_gspread, patch('google_client.AuthorizedSession'):
             mock_gc = Mock()
-            mock_gspread.authorize.return_value = mock_gc
-            mock_gc.create.side_effect = Exception("Creation error")
+            mock_gspread.Client.return_value = mock_gc
+            mock_gc.request.side_effect = Exception("Creation error")
             
             with pytest.raises(Exception, match="Creation error"):
                 self.dashboard.create_dashboard({}, None, '2024-03-15')
     
     def test_create_summary_sheet_success(self):
         """Test successful summary sheet creation"""
-        mock_dashboard = Mock()
-        mock_summary_sheet = Mock()
-        mock_dashboard.worksheet.return_value = mock_summary_sheet
-        mock_dashboard.worksheets.return_value = [Mock(title='Summary')]
+        batch = _SheetBatch({'Sheet1': 0, 'Summary': 3})
         
         databricks_data = {
             'BOM': {
@@ -166,29 +170,29 @@ class TestGoogleSheetsDashboardComprehensive:
         launch_date = '2024-03-15'
         
         with patch.object(self.dashboard, '_format_summary_sheet') as mock_format:
-            self.dashboard._create_summary_sheet(mock_dashboard, databricks_data, file_data, launch_date)
+            self.dashboard._create_summary_sheet(batch, databricks_data, file_data, launch_date)
             
-            # Verify data was written
-            mock_summary_sheet.update.assert_called()
-            mock_format.assert_called_once_with(mock_summary_sheet)
+            # Verify data was written to the existing sheet without adding one
+            (write_request,) = batch.requests
+            assert write_request['updateCells']['range'] == {'sheetId': 3}
+            assert len(write_request['updateCells']['rows']) == 13
+            mock_format.assert_called_once_with(3)
     
     def test_create_summary_sheet_new_sheet(self):
         """Test summary sheet creation with new sheet"""
-        mock_dashboard = Mock()
-        mock_summary_sheet = Mock()
-        mock_dashboard.worksheet.side_effect = Exception("Sheet not found")
-        mock_dashboard.worksheets.return_value = []
-        mock_dashboard.add_worksheet.return_value = mock_summary_sheet
+        batch = _SheetBatch({'Sheet1': 0})
         
         databricks_data = {'BOM': {'status': 'success', 'summary': {}}}
         launch_date = '2024-03-15'
         
         with patch.object(self.dashboard, '_format_summary_sheet') as mock_format:
-            self.dashboard._create_summary_sheet(mock_dashboard, databricks_data, None, launch_date)
+            self.dashboard._create_summary_sheet(batch, databricks_data, None, launch_date)
             
-            # Verify new sheet was created
-            mock_dashboard.add_worksheet.assert_called_once_with(title='Summary', rows=50, cols=20)
-            mock_format.assert_called_once_with(mock_summary_sheet)
+            # Verify new sheet was queued
+            properties = batch.requests[0]['addSheet']['properties']
+            assert properties['title'] == 'Summary'
+            assert properties['gridProperties'] == {'rowCount': 50, 'columnCount': 20}
+            mock_format.assert_called_once_with(properties['sheetId'])
     
     def test_create_department_sheets_success(self):
         """Test successful department sheets creation"""
@@ -315,9 +319,9 @@ class TestGoogleSheetsDashboardComprehensive:
         dashboard_url = "https://sheets.google.com/dashboard"
         new_data = {'BOM': {'status': 'success', 'data': []}}
         
-        with patch('google_sheets_dashboard.gspread') as mock_gspread:
+        with patch('google_client.gspread') as mock_gspread, patch('google_client.AuthorizedSession'):
             mock_gc = Mock()
-            mock_gspread.authorize.return_value = mock_gc
+            mock_gspread.Client.return_value = mock_gc
             mock_dashboard = Mock()
             mock_gc.open_by_url.return_value = mock_dashboard
             
@@ -336,9 +340,9 @@ class TestGoogleSheetsDashboardComprehensive:
         dashboard_url = "https://sheets.google.com/dashboard"
         new_data = {'BOM': {'status': 'success', 'data': []}}
         
-        with patch('google_sheets_dashboard.gspread') as mock_gspread:
+        with patch('google_client.gspread') as mock_gspread, patch('google_client.AuthorizedSession'):
             mock_gc = Mock()
-            mock_gspread.authorize.return_value = mock_gc
+            mock_gspread.Client.return_value = mock_gc
             mock_gc.open_by_url.side_effect = Exception("Update error")
             
             with pytest.raises(Exception, match="Update error"):
@@ -348,9 +352,9 @@ class TestGoogleSheetsDashboardComprehensive:
         """Test successful sheet data retrieval"""
         sheet_url = "https://sheets.google.com/dashboard"
         
-        with patch('google_sheets_dashboard.gspread') as mock_gspread:
+        with patch('google_client.gspread') as mock_gspread, patch('google_client.AuthorizedSession'):
             mock_gc = Mock()
-            mock_gspread.authorize.return_value = mock_gc
+            mock_gspread.Client.return_value = mock_gc
             mock_dashboard = Mock()
             mock_gc.open_by_url.return_value = mock_dashboard
             mock_sheet = Mock()
@@ -370,9 +374,9 @@ class TestGoogleSheetsDashboardComprehensive:
         """Test sheet data retrieval with error"""
         sheet_url = "https://sheets.google.com/dashboard"
         
-        with patch('google_sheets_dashboard.gspread') as mock_gspread:
+        with patch('google_client.gspread') as mock_gspread, patch('google_client.AuthorizedSession'):
             mock_gc = Mock()
-            mock_gspread.authorize.return_value = mock_gc
+            mock_gspread.Client.return_value = mock_gc
             mock_gc.open_by_url.side_effect = Exception("Data retrieval error")
             
             with pytest.raises(Exception, match="Data retrieval error"):
@@ -389,10 +393,10 @@ class TestGoogleSheetsDashboardComprehensive:
         ]
         
         for exception, error_type in error_scenarios:
-            with patch('google_sheets_dashboard.gspread') as mock_gspread:
+            with patch('google_client.gspread') as mock_gspread, patch('google_client.AuthorizedSession'):
                 mock_gc = Mock()
-                mock_gspread.authorize.return_value = mock_gc
-                mock_gc.create.side_effect = exception
+                mock_gspread.Client.return_value = mock_gc
+                mock_gc.request.side_effect = exception
                 
                 with pytest.raises(Exception):
                     self.dashboard.create_dashboard({}, None, '2024-03-15')
@@ -404,10 +408,10 @@ class TestGoogleSheetsDashboardComprehensive:
         mock_dashboard = Mock()
         mock_dashboard.url = "https://sheets.google.com/dashboard"
         
-        with patch('google_sheets_dashboard.gspread') as mock_gspread:
+        with patch('google_client.gspread') as mock_gspread, patch('google_client.AuthorizedSession'):
             mock_gc = Mock()
-            mock_gspread.authorize.return_value = mock_gc
-            mock_gc.create.return_value = mock_dashboard
+            mock_gspread.Client.return_value = mock_gc
+            mock_gc.request.return_value.json.return_value = {'spreadsheetId': 'dashboard_id', 'spreadsheetUrl': mock_dashboard.url}
             
             with patch.object(self.dashboard, '_create_summary_sheet'), \
                  patch.object(self.dashboard, '_create_department_sheets'), \
@@ -449,10 +453,10 @@ class TestGoogleSheetsDashboardComprehensive:
         mock_dashboard = Mock()
         mock_dashboard.url = "https://sheets.google.com/dashboard"
         
-        with patch('google_sheets_dashboard.gspread') as mock_gspread:
+        with patch('google_client.gspread') as mock_gspread, patch('google_client.AuthorizedSession'):
             mock_gc = Mock()
-            mock_gspread.authorize.return_value = mock_gc
-            mock_gc.create.return_value = mock_dashboard
+            mock_gspread.Client.return_value = mock_gc
+            mock_gc.request.return_value.json.return_value = {'spreadsheetId': 'dashboard_id', 'spreadsheetUrl': mock_dashboard.url}
             
             with patch.object(self.dashboard, '_create_summary_sheet') as mock_summary, \
                  patch.object(self.dashboard, '_create_department_sheets') as mock_dept, \
@@ -476,10 +480,10 @@ class TestGoogleSheetsDashboardComprehensive:
         mock_dashboard = Mock()
         mock_dashboard.url = "https://sheets.google.com/dashboard"
         
-        with patch('google_sheets_dashboard.gspread') as mock_gspread:
+        with patch('google_client.gspread') as mock_gspread, patch('google_client.AuthorizedSession'):
             mock_gc = Mock()
-            mock_gspread.authorize.return_value = mock_gc
-            mock_gc.create.return_value = mock_dashboard
+            mock_gspread.Client.return_value = mock_gc
+            mock_gc.request.return_value.json.return_value = {'spreadsheetId': 'dashboard_id', 'spreadsheetUrl': mock_dashboard.url}
             
             with patch.object(self.dashboard, '_create_summary_sheet') as mock_summary, \
                  patch.object(self.dashboard, '_create_department_sheets') as mock_dept, \
@@ -495,10 +499,10 @@ class TestGoogleSheetsDashboardComprehensive:
                 mock_charts.assert_called_once()
         
         # Test with None values
-        with patch('google_sheets_dashboard.gspread') as mock_gspread:
+        with patch('google_client.gspread') as mock_gspread, patch('google_client.AuthorizedSession'):
             mock_gc = Mock()
-            mock_gspread.authorize.return_value = mock_gc
-            mock_gc.create.return_value = mock_dashboard
+            mock_gspread.Client.return_value = mock_gc
+            mock_gc.request.return_value.json.return_value = {'spreadsheetId': 'dashboard_id', 'spreadsheetUrl': mock_dashboard.url}
             
             with patch.object(self.dashboard, '_create_summary_sheet') as mock_summary, \
                  patch.object(self.dashboard, '_create_department_sheets') as mock_dept, \
@@ -4,6 +4,7 @@ from unittest.mock import Mock, patch, MagicMock
 import sys
 import os
 import time
+import threading
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -36,6 +37,92 @@ class TestMonitoringManager:
         assert 'test_command' in monitoring_manager.command_counter
         assert monitoring_manager.command_counter['test_command']['failure'] > 0
     
+    def test_track_command_binds_label_children_once(self):
+        """Test labelled metric children are looked up once per command and status"""
+        with patch('monitoring.COMMAND_COUNTER') as mock_counter, \
+             patch('monitoring.COMMAND_DURATION') as mock_duration:
+            monitoring_manager._command_children.clear()
+            monitoring_manager._duration_children.clear()
+            
+            monitoring_manager.track_command('bound_command', True, 0.5)
+            monitoring_manager.track_command('bound_command', True, 0.7)
+            
+            mock_counter.labels.assert_called_once_with(command='bound_command', status='success')
+            mock_duration.labels.assert_called_once_with(command='bound_command')
+            assert mock_counter.labels.return_value.inc.call_count == 2
+        
+        monitoring_manager._command_children.clear()
+        monitoring_manager._duration_children.clear()
+    
+    def test_active_users_counts_unique_users(self):
+        """Test the active user gauge reflects unique users, not command volume"""
+        from monitoring import ACTIVE_USERS, _HyperLogLog
+        
+        monitoring_manager._active_users = _HyperLogLog()
+        monitoring_manager._previous_active_users = _HyperLogLog()
+        
+        for _ in range(3):
+            for user_id in ('U1', 'U2', 'U3'):
+                monitoring_manager.track_command('status', True, 0.1, user_id=user_id)
+        
+        monitoring_manager._refresh_active_users()
+        assert ACTIVE_USERS._value.get() == 3
+    
+    def test_monitor_command_tracks_slack_users(self):
+        """Test decorated Slack handlers feed the requesting user into the active user gauge"""
+        from monitoring import ACTIVE_USERS, _HyperLogLog
+        
+        monitoring_manager._active_users = _HyperLogLog()
+        monitoring_manager._previous_active_users = _HyperLogLog()
+        
+        @monitor_command("status_request")
+        def handle_status_command(message, say, ack):
+            return "ok"
+        
+        @monitor_command("file_upload")
+        def handle_file_upload(event, say):
+            return "ok"
+        
+        handle_status_command(message={'user': 'U1', 'text': 'status'}, say=Mock(), ack=Mock())
+        handle_status_command({'user': 'U1', 'text': 'status'}, Mock(), Mock())
+        handle_file_upload(event={'user_id': 'U2', 'file_id': 'F1'}, say=Mock())
+        
+        monitoring_manager._refresh_active_users()
+        assert ACTIVE_USERS._value.get() == 2
+    
+    def test_hyperloglog_estimate(self):
+        """Test the unique-count sketch stays within a few percent"""
+        from monitoring import _HyperLogLog
+        
+        sketch = _HyperLogLog()
+        for i in range(10000):
+            sketch.add(f"U{i}")
+        
+        assert abs(len(sketch) - 10000) < 500
+    
+    def test_get_metrics_summary_uses_running_totals(self):
+        """Test the summary reflects tracked commands and errors without re-summing"""
+        monitoring_manager.reset_metrics()
+        
+        monitoring_manager.track_command('status', True, 1.0)
+        monitoring_manager.track_command('status', True, 2.0)
+        monitoring_manager.track_command('upload', False, 3.0)
+        monitoring_manager.track_error('file_upload', 'Bad file')
+        
+        with patch.object(monitoring_manager, 'get_metrics') as mock_get_metrics:
+            summary = monitoring_manager.get_metrics_summary()
+            mock_get_metrics.assert_not_called()
+        
+        assert summary['total_commands'] == 3
+        assert summary['total_errors'] == 1
+        assert summary['success_rate'] == pytest.approx(200 / 3)
+        assert summary['avg_response_time'] == pytest.approx(2.0)
+        assert summary['active_commands'] == 2
+        assert summary['error_types'] == 1
+        
+        monitoring_manager.reset_metrics()
+        assert monitoring_manager.get_metrics_summary()['total_commands'] == 0
+    
     def test_track_error(self):
         """Test tracking error"""
         monitoring_manager.track_error('test_error', 'Test error message')
@@ -44,6 +131,48 @@ class TestMonitoringManager:
         assert 'test_error' in monitoring_manager.error_counter
         assert monitoring_manager.error_counter['test_error']['count'] > 0
     
+    def test_track_error_keeps_user_out_of_labels(self):
+        """Test errors are counted per type only, whatever the user"""
+        from monitoring import ERROR_COUNTER
+        
+        # The counter is process-global, so compare against its value before this test
+        before = ERROR_COUNTER.labels(error_type='label_test_error')._value.get()
+        monitoring_manager.track_error('label_test_error', 'Test error message', user_id='U123')
+        monitoring_manager.track_error('label_test_error', 'Test error message', user_id='U456')
+        
+        assert ERROR_COUNTER._labelnames == ('error_type',)
+        assert ERROR_COUNTER.labels(error_type='label_test_error')._value.get() == before + 2
+    
+    def test_track_error_throttles_sentry_reports(self):
+        """Test an error storm is counted fully but only a bounded burst is sent to Sentry"""
+        from monitoring import MonitoringManager, SENTRY_ERROR_BURST, _drop_throttled_events
+        
+        manager = MonitoringManager()
+        manager._sentry = Mock()
+        
+        with patch('monitoring.logger') as mock_logger:
+            for _ in range(SENTRY_ERROR_BURST + 5):
+                manager.track_error('storm_error', 'Repeated failure')
+        
+        throttled = [call.kwargs['extra']['sentry_throttled'] for call in mock_logger.error.call_args_list]
+        assert throttled.count(False) == SENTRY_ERROR_BURST
+        assert manager.error_counter['storm_error']['count'] == SENTRY_ERROR_BURST + 5
+        
+        assert _drop_throttled_events({'extra': {'sentry_throttled': True}}, {}) is None
+        assert _drop_throttled_events({'extra': {'sentry_throttled': False}}, {}) is not None
+    
+    def test_render_metrics_reuses_recent_payload(self):
+        """Test scrapes within the TTL share one rendered payload"""
+        monitoring_manager._last_render = (float('-inf'), b'')
+        
+        with patch('monitoring.generate_latest', side_effect=[b'first', b'second']) as mock_generate, \
+             patch('monitoring.METRICS_CACHE_TTL', 60):
+            assert monitoring_manager.render_metrics() == b'first'
+            assert monitoring_manager.render_metrics() == b'first'
+            mock_generate.assert_called_once()
+        
+        monitoring_manager._last_render = (float('-inf'), b'')
+    
     def test_get_metrics(self):
         """Test getting monitoring metrics"""
         # Track some test data
@@ -73,6 +202,62 @@ class TestMonitoringManager:
         assert len(monitoring_manager.command_counter) == 0
         assert len(monitoring_manager.error_counter) == 0
     
+    def test_export_metrics_json(self):
+        """Test JSON export produces a parseable metrics document"""
+        import json
+        
+        monitoring_manager.track_command('export_command', True, 0.5)
+        
+        exported = monitoring_manager.export_metrics('json')
+        
+        assert isinstance(exported, bytes)
+        exported = json.loads(exported)
+        
+        assert exported['commands']['export_command']['total_calls'] >= 1
+    
+    def test_metrics_server_not_started_on_import(self):
+        """Test importing monitoring does not bind the metrics port"""
+        from monitoring import MonitoringManager
+        
+        with patch('monitoring.threading.Thread') as mock_thread:
+            manager = MonitoringManager()
+            
+            assert manager.metrics_thread is None
+            mock_thread.assert_not_called()
+    
+    @patch.dict(os.environ, {'DISABLE_METRICS_SERVER': '1'})
+    def test_start_metrics_server_disabled(self):
+        """Test the metrics server can be disabled for tests and tooling"""
+        from monitoring import MonitoringManager
+        
+        with patch('monitoring.threading.Thread') as mock_thread:
+            manager = MonitoringManager()
+            manager.start_metrics_server()
+            
+            mock_thread.assert_not_called()
+    
+    def test_health_server_serves_health_status(self):
+        """Test the dedicated health server answers without touching the registry"""
+        import json
+        import urllib.request
+        from http.server import ThreadingHTTPServer
+        from monitoring import _HealthHandler
+        
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _HealthHandler)
+        server.monitoring_manager = monitoring_manager
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with patch('monitoring.generate_latest') as mock_generate:
+                with urllib.request.urlopen(f'http://127.0.0.1:{server.server_port}/health') as response:
+                    payload = json.loads(response.read())
+                
+                assert payload['status'] == 'healthy'
+                mock_generate.assert_not_called()
+        finally:
+            server.shutdown()
+            server.server_close()
+    
     @patch('monitoring.flask.Flask')
     def test_start_metrics_server(self, mock_flask):
         """Test starting metrics server"""
@@ -172,6 +357,31 @@ class TestMonitoringDecorators:
             assert call_args[0][1] is False  # failure
             assert call_args[0][2] > 0  # response time
     
+    def test_monitor_command_preserves_handler_signature(self):
+        """Test the wrapper keeps the handler's name and arguments for Slack's argument injection"""
+        import inspect
+        
+        @monitor_command("test_command")
+        def handle_command(message, say, ack):
+            """Handle a command"""
+            return message
+        
+        assert handle_command.__name__ == 'handle_command'
+        assert handle_command.__doc__ == 'Handle a command'
+        assert list(inspect.signature(handle_command).parameters) == ['message', 'say', 'ack']
+    
+    def test_monitor_command_on_method(self):
+        """Test the decorator binds self when applied to a method"""
+        class Handler:
+            @monitor_command("test_command")
+            def handle(self, message):
+                return (self, message)
+        
+        handler = Handler()
+        with patch('monitoring.monitoring_manager') as mock_manager:
+            assert handler.handle('hello') == (handler, 'hello')
+            assert mock_manager.track_command.call_args[0][:2] == ("test_command", True)
+    
     def test_monitor_error_decorator(self):
         """Test monitor_error decorator"""
         @monitor_error("test_error")
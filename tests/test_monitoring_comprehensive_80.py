@@ -197,7 +197,9 @@ class TestMonitoringManagerComprehensive:
     def test_start_metrics_server_success(self):
         """Test metrics server start"""
         with patch('monitoring.Flask') as mock_flask, \
-             patch('monitoring.threading') as mock_threading:
+             patch('monitoring.threading') as mock_threading, \
+             patch('monitoring._listening_socket') as mock_socket, \
+             patch('monitoring.ThreadingHTTPServer') as mock_health_server:
             
             mock_app = Mock()
             mock_flask.return_value = mock_app
@@ -213,9 +215,13 @@ class TestMonitoringManagerComprehensive:
             # Verify route was added
             mock_app.route.assert_called()
             
-            # Verify thread was started
-            mock_threading.Thread.assert_called_once()
-            mock_thread.start.assert_called_once()
+            # Verify the metrics listener and health server were bound
+            mock_socket.assert_called_once()
+            mock_health_server.assert_called_once()
+            
+            # Verify the metrics, health and active-user threads were started
+            assert mock_threading.Thread.call_count == 3
+            assert mock_thread.start.call_count == 3
     
     def test_start_metrics_server_error(self):
         """Test metrics server start with error"""
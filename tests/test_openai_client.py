@@ -1,20 +1,52 @@
+import asyncio
+import json
 import pytest
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import sys
 import os
+import time
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from openai_client import OpenAIClient
+from openai_client import _load_encodings, CircuitOpenError, OpenAIClient, _format_department_data, _format_department_rows, ParallelChatRunner, ResponseCache, OPENAI_TIMEOUT, SYSTEM_MSG, iter_sync, run_sync
+
+class FakeStream:
+    """Async chunk stream shaped like openai.AsyncStream; a chunk of ... stalls the read"""
+    
+    def __init__(self, contents):
+        self.contents = list(contents)
+        self.closed = False
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        if not self.contents:
+            raise StopAsyncIteration
+        content = self.contents.pop(0)
+        if content is ...:
+            await asyncio.sleep(1)
+        chunk = Mock()
+        chunk.choices = [Mock()]
+        chunk.choices[0].delta.content = content
+        return chunk
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
 
 class TestOpenAIClient:
     """Test OpenAIClient class"""
     
-    @patch('openai_client.openai.OpenAI')
+    @patch('openai_client.openai.DefaultAsyncHttpxClient')
+    @patch('openai_client.openai.AsyncOpenAI')
     @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
-    def test_initialization(self, mock_openai):
+    def test_initialization(self, mock_openai, mock_http_client):
         """Test OpenAI client initialization"""
         mock_client = Mock()
         mock_openai.return_value = mock_client
@@ -22,9 +54,21 @@ class TestOpenAIClient:
         client = OpenAIClient()
         
         assert client.client == mock_client
-        mock_openai.assert_called_once_with(api_key='test_api_key')
+        mock_openai.assert_called_once_with(
+            api_key='test_api_key', timeout=OPENAI_TIMEOUT, max_retries=0, http_client=mock_http_client.return_value
+        )
     
-    @patch('openai_client.openai.OpenAI')
+    @patch('openai_client.openai.AsyncOpenAI')
+    @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
+    def test_instances_share_one_client(self, mock_openai):
+        """Test every OpenAIClient reuses the process-wide async client and its connection pool"""
+        first = OpenAIClient()
+        second = OpenAIClient()
+        
+        assert first.client is second.client
+        mock_openai.assert_called_once()
+    
+    @patch('openai_client.openai.AsyncOpenAI')
     @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
     def test_analyze_program_status_success(self, mock_openai):
         """Test successful program status analysis"""
@@ -35,7 +79,7 @@ class TestOpenAIClient:
         mock_response = Mock()
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = "Analysis: Program is on track with 75% completion"
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
         
         client = OpenAIClient()
         
@@ -46,7 +90,7 @@ class TestOpenAIClient:
             'material_flow_engineering': {'status': 'pending', 'count': 3}
         }
         
-        result = client.analyze_program_status(program_data, '2024-03-15')
+        result = asyncio.run(client.analyze_program_status(program_data, '2024-03-15'))
         
         # Verify OpenAI was called
         mock_client.chat.completions.create.assert_called_once()
@@ -55,7 +99,7 @@ class TestOpenAIClient:
         assert "Analysis:" in result
         assert "Program is on track" in result
     
-    @patch('openai_client.openai.OpenAI')
+    @patch('openai_client.openai.AsyncOpenAI')
     @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
     def test_analyze_program_status_exception(self, mock_openai):
         """Test program status analysis with exception"""
@@ -63,16 +107,16 @@ class TestOpenAIClient:
         mock_openai.return_value = mock_client
         
         # Mock an exception
-        mock_client.chat.completions.create.side_effect = Exception("API error")
+        mock_client.chat.completions.create = AsyncMock(side_effect=Exception("API error"))
         
         client = OpenAIClient()
         
         program_data = {'test': {'status': 'complete'}}
         
         with pytest.raises(Exception, match="API error"):
-            client.analyze_program_status(program_data, '2024-03-15')
+            asyncio.run(client.analyze_program_status(program_data, '2024-03-15'))
     
-    @patch('openai_client.openai.OpenAI')
+    @patch('openai_client.openai.AsyncOpenAI')
     @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
     def test_generate_recommendations_success(self, mock_openai):
         """Test successful recommendation generation"""
@@ -83,7 +127,7 @@ class TestOpenAIClient:
         mock_response = Mock()
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = "Recommendations:\n1. Accelerate MPL completion\n2. Review MFE bottlenecks"
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
         
         client = OpenAIClient()
         
@@ -94,7 +138,7 @@ class TestOpenAIClient:
             'bottlenecks': ['MPL', 'MFE']
         }
         
-        result = client.generate_recommendations(analysis_data)
+        result = asyncio.run(client.generate_recommendations(analysis_data))
         
         # Verify OpenAI was called
         mock_client.chat.completions.create.assert_called_once()
@@ -103,7 +147,7 @@ class TestOpenAIClient:
         assert "Recommendations:" in result
         assert "Accelerate" in result
     
-    @patch('openai_client.openai.OpenAI')
+    @patch('openai_client.openai.AsyncOpenAI')
     @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
     def test_analyze_file_data_success(self, mock_openai):
         """Test successful file data analysis"""
@@ -114,7 +158,7 @@ class TestOpenAIClient:
         mock_response = Mock()
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = "File Analysis:\n- 3 sheets processed\n- 15 total records\n- Data quality: Good"
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
         
         client = OpenAIClient()
         
@@ -128,7 +172,7 @@ class TestOpenAIClient:
             }
         }
         
-        result = client.analyze_file_data(file_data)
+        result = asyncio.run(client.analyze_file_data(file_data))
         
         # Verify OpenAI was called
         mock_client.chat.completions.create.assert_called_once()
@@ -137,7 +181,7 @@ class TestOpenAIClient:
         assert "File Analysis:" in result
         assert "sheets processed" in result
     
-    @patch('openai_client.openai.OpenAI')
+    @patch('openai_client.openai.AsyncOpenAI')
     @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
     def test_get_system_prompt(self, mock_openai):
         """Test system prompt generation"""
@@ -153,7 +197,7 @@ class TestOpenAIClient:
         assert "analysis" in prompt.lower()
         assert "recommendations" in prompt.lower()
     
-    @patch('openai_client.openai.OpenAI')
+    @patch('openai_client.openai.AsyncOpenAI')
     @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
     def test_create_analysis_prompt(self, mock_openai):
         """Test analysis prompt creation"""
@@ -167,7 +211,7 @@ class TestOpenAIClient:
             'master_parts_list': {'status': 'in_progress', 'count': 5}
         }
         
-        prompt = client._create_analysis_prompt(program_data, '2024-03-15')
+        prompt = client._create_analysis_prompt('2024-03-15', program_data)
         
         # Verify prompt structure
         assert "2024-03-15" in prompt
@@ -176,7 +220,73 @@ class TestOpenAIClient:
         assert "complete" in prompt
         assert "in_progress" in prompt
     
-    @patch('openai_client.openai.OpenAI')
+    def test_format_department_data_reuses_formatted_block(self):
+        """Test department summaries are formatted once and shared by prompts over the same data"""
+        _format_department_rows.cache_clear()
+        databricks_data = {
+            'bill_of_material': {'status': 'success', 'summary': {'total_items': 10, 'completed': 7, 'pending': 2, 'overdue': 1}},
+            'ppap': {'status': 'error', 'error': 'timeout', 'summary': {'total_items': 0, 'completed': 0, 'pending': 0, 'overdue': 0}}
+        }
+        client = OpenAIClient.__new__(OpenAIClient)
+        
+        analysis_prompt = client._create_analysis_prompt('2024-03-15', databricks_data)
+        combined_prompt = client._create_combined_analysis_prompt(databricks_data, {})
+        
+        block = _format_department_data(databricks_data)
+        assert block == (
+            "dept\tstatus\ttotal\tdone\tpend\tover\n"
+            "bill_of_material\tsuccess\t10\t7\t2\t1\n"
+            "ppap\terror: timeout\t0\t0\t0\t0"
+        )
+        assert block in analysis_prompt and block in combined_prompt
+        assert _format_department_rows.cache_info().misses == 1
+    
+    def test_format_department_data_passes_other_data_through(self):
+        """Test data that isn't per-department query results is dumped as JSON"""
+        assert _format_department_data({'test': 'data'}) == '{"test":"data"}'
+    
+    def test_prompt_data_serialized_deterministically(self):
+        """Test equal data in any key order produces the same compact prompt"""
+        client = OpenAIClient.__new__(OpenAIClient)
+        
+        first = client._create_file_analysis_prompt({'sheets': {'BOM': 10, 'PPAP': 2}, 'filename': 'launch.xlsx'})
+        second = client._create_file_analysis_prompt({'filename': 'launch.xlsx', 'sheets': {'PPAP': 2, 'BOM': 10}})
+        
+        assert first == second
+        assert first.endswith('{"filename":"launch.xlsx","sheets":{"BOM":10,"PPAP":2}}')
+        assert client._create_upload_prompt('excel').endswith('\nexcel')
+    
+    def test_prompt_data_encodes_parsed_values_and_rejects_unknown_types(self):
+        """Test numpy and timestamp values are encoded as plain JSON, and unknown objects are not stringified"""
+        import numpy as np
+        import pandas as pd
+        client = OpenAIClient.__new__(OpenAIClient)
+        
+        prompt = client._create_file_analysis_prompt({'count': np.int64(3), 'due': pd.Timestamp('2024-03-15'), 'closed': pd.NaT})
+        
+        assert prompt.endswith('{"closed":null,"count":3,"due":"2024-03-15T00:00:00"}')
+        with pytest.raises(TypeError):
+            client._create_file_analysis_prompt({'client': object()})
+    
+    def test_prompts_keep_instructions_in_shared_prefix(self):
+        """Test user prompts carry only a task name and data, and every task is described in the system prompt"""
+        client = OpenAIClient.__new__(OpenAIClient)
+        
+        prompts = [
+            client._create_analysis_prompt('2024-03-15', {}),
+            client._create_recommendation_prompt({}),
+            client._create_file_analysis_prompt({}),
+            client._create_upload_prompt({}),
+            client._create_combined_analysis_prompt({}, {}),
+        ]
+        
+        for prompt in prompts:
+            task_line = prompt.split('\n')[0]
+            assert task_line.startswith('Task: ')
+            assert task_line in SYSTEM_MSG['content']
+            assert 'Please provide' not in prompt
+    
+    @patch('openai_client.openai.AsyncOpenAI')
     @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
     def test_create_recommendation_prompt(self, mock_openai):
         """Test recommendation prompt creation"""
@@ -201,7 +311,7 @@ class TestOpenAIClient:
         assert "MFE" in prompt
         assert "critical_path" in prompt
     
-    @patch('openai_client.openai.OpenAI')
+    @patch('openai_client.openai.AsyncOpenAI')
     @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
     def test_create_file_analysis_prompt(self, mock_openai):
         """Test file analysis prompt creation"""
@@ -229,9 +339,32 @@ class TestOpenAIClient:
         assert "10" in prompt
         assert "5" in prompt
     
-    @patch('openai_client.openai.OpenAI')
+    def test_file_analysis_prompt_includes_every_parsed_row(self):
+        """Test every row of an uploaded workbook reaches the prompt, not a truncated DataFrame repr"""
+        import io
+        import pandas as pd
+        from file_parser import FileParser
+        
+        workbook = io.BytesIO()
+        pd.DataFrame({
+            'part_id': [f"P{i:03d}" for i in range(200)],
+            'status': ['complete', 'pending'] * 100,
+            'completion': list(range(200)),
+            'department': ['BOM'] * 200
+        }).to_excel(workbook, sheet_name='BOM', index=False)
+        file_data = FileParser().parse_excel_file(workbook.getvalue(), 'launch.xlsx')
+        
+        prompt = OpenAIClient()._create_file_analysis_prompt(file_data)
+        
+        rows = json.loads(prompt.split("File data:\n", 1)[1])['sheets']['BOM']['data']
+        assert rows['columns'] == ['part_id', 'status', 'completion', 'department']
+        assert len(rows['data']) == 200
+        assert rows['data'][199] == ['P199', 'pending', 199, 'BOM']
+        assert "rows x" not in prompt
+    
+    @patch('openai_client.openai.AsyncOpenAI')
     @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
-    def test_call_openai_api_success(self, mock_openai):
+    def test_acall_openai_api_success(self, mock_openai):
         """Test successful OpenAI API call"""
         mock_client = Mock()
         mock_openai.return_value = mock_client
@@ -240,16 +373,11 @@ class TestOpenAIClient:
         mock_response = Mock()
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = "Test response"
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
         
         client = OpenAIClient()
         
-        messages = [
-            {"role": "system", "content": "You are a helpful assistant"},
-            {"role": "user", "content": "Analyze this data"}
-        ]
-        
-        result = client._call_openai_api(messages)
+        result = asyncio.run(client._acall_openai_api("Analyze this data"))
         
         # Verify API call
         mock_client.chat.completions.create.assert_called_once()
@@ -257,31 +385,326 @@ class TestOpenAIClient:
         
         # Verify parameters
         assert call_args[1]['model'] == 'gpt-3.5-turbo'
-        assert call_args[1]['messages'] == messages
+        assert call_args[1]['messages'] == [SYSTEM_MSG, {"role": "user", "content": "Analyze this data"}]
         assert call_args[1]['max_tokens'] == 1000
         assert call_args[1]['temperature'] == 0.7
         
         # Verify response
         assert result == "Test response"
     
-    @patch('openai_client.openai.OpenAI')
+    @patch('openai_client.openai.AsyncOpenAI')
     @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
-    def test_call_openai_api_exception(self, mock_openai):
+    def test_acall_openai_api_exception(self, mock_openai):
         """Test OpenAI API call with exception"""
         mock_client = Mock()
         mock_openai.return_value = mock_client
         
         # Mock an exception
-        mock_client.chat.completions.create.side_effect = Exception("API error")
+        mock_client.chat.completions.create = AsyncMock(side_effect=Exception("API error"))
         
         client = OpenAIClient()
         
-        messages = [{"role": "user", "content": "Test"}]
-        
         with pytest.raises(Exception, match="API error"):
-            client._call_openai_api(messages)
+            asyncio.run(client._acall_openai_api("Test"))
+    
+    @patch('openai_client.openai.AsyncOpenAI')
+    @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
+    def test_process_many_runs_queries_concurrently(self, mock_openai):
+        """Test independent launch-date queries are issued together and answered in order"""
+        mock_client = Mock()
+        mock_openai.return_value = mock_client
+        
+        in_flight = 0
+        peak = 0
+        
+        async def create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            response = Mock()
+            response.choices = [Mock()]
+            response.choices[0].message.content = kwargs['messages'][1]['content']
+            return response
+        
+        mock_client.chat.completions.create = AsyncMock(side_effect=create)
+        
+        client = OpenAIClient()
+        jobs = [('2024-03-15', {}), ('2024-06-01', {}), ('2024-09-30', {})]
+        
+        results = asyncio.run(client.process_many(jobs))
+        
+        assert peak == len(jobs)
+        assert [launch_date in result for result, (launch_date, _) in zip(results, jobs)] == [True, True, True]
+    
+    @patch('openai_client.openai.AsyncOpenAI')
+    @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
+    def test_stream_vehicle_program_query(self, mock_openai):
+        """Test the analysis is yielded delta by delta from a streamed completion"""
+        mock_client = Mock()
+        mock_openai.return_value = mock_client
+        
+        mock_client.chat.completions.create = AsyncMock(return_value=FakeStream(["Program ", None, "on track"]))
+        
+        client = OpenAIClient()
+        
+        deltas = list(iter_sync(client.stream_vehicle_program_query('2024-03-15', {})))
+        
+        assert deltas == ["Program ", "", "on track"]
+        assert mock_client.chat.completions.create.call_args[1]['stream'] is True
+    
+    @patch('openai_client.openai.AsyncOpenAI')
+    @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
+    def test_cached_response_skips_openai(self, mock_openai):
+        """Test an exact response cache hit is returned without calling the API"""
+        mock_client = Mock()
+        mock_openai.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock()
+        
+        client = OpenAIClient()
+        client.cache = Mock()
+        client.cache.get = AsyncMock(return_value="Cached analysis")
+        
+        result = asyncio.run(client.process_vehicle_program_query('2024-03-15', {}))
+        
+        assert result == "Cached analysis"
+        mock_client.chat.completions.create.assert_not_called()
+        assert '2024-03-15' in client.cache.get.call_args[0][0]
+    
+    def test_response_cache_exact_match(self):
+        """Test the response cache only hits on the identical prompt for the same model"""
+        store = {}
+        mock_redis = Mock()
+        mock_redis.get = AsyncMock(side_effect=lambda key: store.get(key))
+        mock_redis.setex = AsyncMock(side_effect=lambda key, ttl, value: store.__setitem__(key, value.encode('utf-8')))
+        
+        cache = ResponseCache(mock_redis, 'gpt-4', ttl=60)
+        asyncio.run(cache.set("prompt", "Cached answer"))
+        
+        assert asyncio.run(cache.get("prompt")) == "Cached answer"
+        assert asyncio.run(cache.get("prompt ")) is None
+        assert asyncio.run(ResponseCache(mock_redis, 'gpt-4o', ttl=60).get("prompt")) is None
+        assert mock_redis.setex.call_args[0][1] == 60
+    
+    @patch('openai_client.openai.AsyncOpenAI')
+    @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
+    def test_analysis_cache_miss_stores_response(self, mock_openai):
+        """Test a cache miss calls the API and stores the answer under the prompt"""
+        mock_client = Mock()
+        mock_openai.return_value = mock_client
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Fresh analysis"
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_redis = Mock()
+        mock_redis.get = AsyncMock(return_value=None)
+        
+        client = OpenAIClient()
+        client.cache = ResponseCache(mock_redis, 'gpt-4')
+        client.cache.set = AsyncMock()
+        
+        result = asyncio.run(client.process_vehicle_program_query('2024-03-15', {}))
+        
+        assert result == "Fresh analysis"
+        client.cache.set.assert_awaited_once()
+        assert client.cache.set.call_args[0][1] == "Fresh analysis"
+    
+    def test_response_cache_errors_are_misses(self):
+        """Test a Redis failure degrades to a cache miss instead of failing the request"""
+        mock_redis = Mock()
+        mock_redis.get = AsyncMock(side_effect=Exception("connection refused"))
+        
+        cache = ResponseCache(mock_redis, 'gpt-4')
+        
+        assert asyncio.run(cache.get("prompt")) is None
+    
+    @patch('openai_client.openai.AsyncOpenAI')
+    @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
+    def test_submit_batch_uploads_jsonl(self, mock_openai):
+        """Test queued queries are uploaded as one JSONL request per job and submitted as a batch"""
+        mock_client = Mock()
+        mock_openai.return_value = mock_client
+        mock_client.files.create = AsyncMock(return_value=Mock(id='file-1'))
+        mock_client.batches.create = AsyncMock(return_value=Mock(id='batch-1'))
+        
+        client = OpenAIClient()
+        
+        batch_id = asyncio.run(client.submit_batch([('2024-03-15', {}), ('2024-06-01', {})]))
+        
+        assert batch_id == 'batch-1'
+        filename, content = mock_client.files.create.call_args[1]['file']
+        requests = [json.loads(line) for line in content.decode('utf-8').split('\n')]
+        assert [request['custom_id'] for request in requests] == ['0:2024-03-15', '1:2024-06-01']
+        assert requests[0]['body']['messages'][0] == SYSTEM_MSG
+        mock_client.batches.create.assert_called_once_with(
+            input_file_id='file-1', endpoint='/v1/chat/completions', completion_window='24h'
+        )
+    
+    @patch('openai_client.openai.AsyncOpenAI')
+    @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
+    def test_retrieve_batch_results_skips_failures(self, mock_openai):
+        """Test batch output is streamed line by line and failed requests are skipped"""
+        mock_client = Mock()
+        mock_openai.return_value = mock_client
+        mock_client.batches.retrieve = AsyncMock(return_value=Mock(status='completed', output_file_id='file-2'))
+        
+        lines = [
+            json.dumps({"custom_id": "0:2024-03-15", "error": None, "response": {
+                "status_code": 200, "body": {"choices": [{"message": {"content": "On track"}}]}
+            }}),
+            json.dumps({"custom_id": "1:2024-06-01", "error": None, "response": {
+                "status_code": 500, "body": {"error": {"message": "server error"}}
+            }}),
+        ]
+        
+        async def iter_lines():
+            for line in lines:
+                yield line
+        
+        response = Mock()
+        response.iter_lines = iter_lines
+        mock_client.files.with_streaming_response.content.return_value.__aenter__ = AsyncMock(return_value=response)
+        mock_client.files.with_streaming_response.content.return_value.__aexit__ = AsyncMock(return_value=False)
+        
+        client = OpenAIClient()
+        
+        results = list(iter_sync(client.retrieve_batch_results('batch-1')))
+        
+        assert results == [("0:2024-03-15", "On track")]
+        mock_client.files.with_streaming_response.content.assert_called_once_with('file-2')
+    
+    def test_runner_retries_rate_limited_requests(self):
+        """Test a rate-limited request is retried with backoff and then succeeds"""
+        class FakeRateLimitError(Exception):
+            pass
+        
+        mock_client = Mock()
+        mock_response = Mock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=[FakeRateLimitError("429"), mock_response])
+        runner = ParallelChatRunner(mock_client, 'gpt-4', max_attempts=3)
+        
+        with patch('openai_client.openai.RateLimitError', FakeRateLimitError), \
+             patch('openai_client.OPENAI_RETRY_BASE_DELAY', 0):
+            result = asyncio.run(runner.create([{"role": "user", "content": "Test"}], max_tokens=10))
+        
+        assert result is mock_response
+        assert mock_client.chat.completions.create.await_count == 2
+    
+    def test_runner_opens_circuit_after_repeated_timeouts(self):
+        """Test hung requests are cut off and, once most recent attempts fail, calls fail fast"""
+        async def hang(**kwargs):
+            await asyncio.sleep(1)
+        
+        mock_client = Mock()
+        mock_client.chat.completions.create = Mock(side_effect=hang)
+        runner = ParallelChatRunner(mock_client, 'gpt-4', max_attempts=2)
+        
+        async def run():
+            for _ in range(2):
+                with pytest.raises(asyncio.TimeoutError):
+                    await runner.create([{"role": "user", "content": "Test"}], max_tokens=10)
+            with pytest.raises(CircuitOpenError):
+                await runner.create([{"role": "user", "content": "Test"}], max_tokens=10)
+        
+        with patch('openai_client.OPENAI_TIMEOUT', 0.01), \
+             patch('openai_client.OPENAI_RETRY_BASE_DELAY', 0), \
+             patch('openai_client.OPENAI_CIRCUIT_MIN_ATTEMPTS', 4), \
+             patch('openai_client.openai.RateLimitError', type('RateLimitError', (Exception,), {}), create=True), \
+             patch('openai_client.openai.APIConnectionError', type('APIConnectionError', (Exception,), {}), create=True), \
+             patch('openai_client.openai.InternalServerError', type('InternalServerError', (Exception,), {}), create=True):
+            asyncio.run(run())
+        
+        # Two calls of two attempts each; the third call never reached the API
+        assert mock_client.chat.completions.create.call_count == 4
+    
+    def test_runner_stream_holds_slot_until_drained(self):
+        """Test a streamed completion keeps its concurrency slot until the last chunk is read"""
+        mock_client = Mock()
+        mock_client.chat.completions.create = AsyncMock(return_value=FakeStream(["a", "b"]))
+        runner = ParallelChatRunner(mock_client, 'gpt-4', max_concurrent=1)
+        
+        async def run():
+            held = []
+            async for chunk in runner.stream([{"role": "user", "content": "Test"}], max_tokens=10):
+                held.append(runner._semaphore.locked())
+            return held
+        
+        assert asyncio.run(run()) == [True, True]
+        assert not runner._semaphore.locked()
+        assert mock_client.chat.completions.create.call_args[1]['stream'] is True
+        assert mock_client.chat.completions.create.return_value.closed
+        assert list(runner._outcomes)[-1][1] is False
+    
+    def test_runner_stream_times_out_stalled_chunk(self):
+        """Test a stream that stalls mid-answer is cut off, recorded as a failure, and not retried"""
+        stream = FakeStream(["Program ", ...])
+        mock_client = Mock()
+        mock_client.chat.completions.create = AsyncMock(return_value=stream)
+        runner = ParallelChatRunner(mock_client, 'gpt-4', max_attempts=3)
+        
+        async def run():
+            deltas = []
+            with pytest.raises(asyncio.TimeoutError):
+                async for chunk in runner.stream([{"role": "user", "content": "Test"}], max_tokens=10):
+                    deltas.append(chunk.choices[0].delta.content)
+            return deltas
+        
+        with patch('openai_client.OPENAI_TIMEOUT', 0.01):
+            assert asyncio.run(run()) == ["Program "]
+        
+        assert mock_client.chat.completions.create.await_count == 1
+        assert stream.closed
+        assert not runner._semaphore.locked()
+        assert [failed for _, failed in runner._outcomes] == [True]
+    
+    def test_token_estimate_survives_encoding_download_failure(self):
+        """Test a failed tiktoken download falls back to the length-based estimate"""
+        mock_tiktoken = Mock()
+        mock_tiktoken.encoding_for_model.side_effect = ConnectionError("no egress")
+        runner = ParallelChatRunner(Mock(), 'offline-model')
+        
+        with patch('openai_client.tiktoken', mock_tiktoken):
+            _load_encodings(('offline-model',))
+        
+        assert runner._estimate_tokens([{"role": "user", "content": "x" * 40}], 'offline-model') == 11
+    
+    def test_runner_waits_for_request_budget(self):
+        """Test a request waits for the per-minute budget to refill instead of being sent"""
+        runner = ParallelChatRunner(Mock(), 'gpt-4', max_requests_per_minute=600)
+        runner._available_requests = 0
+        
+        start = time.monotonic()
+        asyncio.run(runner._reserve(1))
+        elapsed = time.monotonic() - start
+        
+        # 600 requests per minute refills one request every 0.1s
+        assert 0.05 <= elapsed < 1
+        assert runner._available_requests < 1
+    
+    @patch('openai_client.openai.AsyncOpenAI')
+    @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
+    def test_run_sync_from_synchronous_caller(self, mock_openai):
+        """Test synchronous callers can drive the async client on the shared loop"""
+        mock_client = Mock()
+        mock_openai.return_value = mock_client
+        
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Upload an Excel workbook"
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        
+        client = OpenAIClient()
+        
+        first = run_sync(client.generate_file_upload_instructions('excel'))
+        second = run_sync(client.generate_file_upload_instructions('smartsheet'))
+        
+        assert first == second == "Upload an Excel workbook"
+        assert mock_client.chat.completions.create.await_count == 2
+        assert mock_client.chat.completions.create.call_args[1]['max_tokens'] == 400
+        assert mock_client.chat.completions.create.call_args[1]['model'] == 'gpt-4o-mini'
     
-    @patch('openai_client.openai.OpenAI')
+    @patch('openai_client.openai.AsyncOpenAI')
     @patch('openai_client.OPENAI_API_KEY', 'test_api_key')
     def test_validate_response(self, mock_openai):
         """Test response validation"""
@@ -48,6 +48,100 @@ class TestProductionConfigCoverage:
             assert validation['valid'] is False
             assert len(validation['errors']) > 0
     
+    def test_bot_settings_resolved_at_import(self):
+        """Test settings the bot reads are plain class attributes, converted once at import"""
+        import production_config
+        
+        assert ProductionConfig.MAX_FILE_SIZE == production_config.MAX_FILE_SIZE_MB * 1024 * 1024
+        assert ProductionConfig.SLACK_BOT_TOKEN == production_config.SLACK_BOT_TOKEN
+        assert ProductionConfig.SLACK_SIGNING_SECRET == production_config.SLACK_SIGNING_SECRET
+        assert ProductionConfig.SLACK_APP_TOKEN == production_config.SLACK_APP_TOKEN
+    
+    def test_validation_cached(self):
+        """Test settings fixed at import are validated once and the result reused"""
+        import production_config
+        
+        production_config._validate_config.cache_clear()
+        first = ProductionConfig.validate_config()
+        second = ProductionConfig.validate_config()
+        
+        assert first is second
+        assert production_config._validate_config.cache_info().misses == 1
+    
+    def test_main_exit_status(self, capsys):
+        """Test the deploy-time check exits non-zero and lists errors for an invalid configuration"""
+        import production_config
+        
+        with patch('production_config._validate_config', return_value={
+            'valid': False, 'errors': ['Missing required configuration: SLACK_BOT_TOKEN'],
+            'warnings': [], 'environment': 'production', 'debug': False
+        }):
+            assert production_config.main() == 1
+        assert 'SLACK_BOT_TOKEN' in capsys.readouterr().out
+        
+        with patch('production_config._validate_config', return_value={
+            'valid': True, 'errors': [], 'warnings': [], 'environment': 'production', 'debug': False
+        }):
+            assert production_config.main() == 0
+    
+    def test_buffered_file_handler_flushes_on_warning(self, tmp_path):
+        """Test info records stay buffered until a warning forces a flush, and the file still rotates"""
+        import logging
+        from production_config import BufferedRotatingFileHandler
+        
+        log_file = tmp_path / 'bot.log'
+        handler = BufferedRotatingFileHandler(str(log_file), flush_interval=60, maxBytes=200, backupCount=1)
+        logger = logging.getLogger('test_buffered_file_handler')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        try:
+            logger.info("buffered")
+            assert log_file.read_text() == ""
+            
+            logger.warning("flushed")
+            assert log_file.read_text() == "buffered\nflushed\n"
+            
+            for _ in range(20):
+                logger.warning("x" * 20)
+            assert (tmp_path / 'bot.log.1').exists()
+            assert len(log_file.read_text()) < 200
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+    
+    def test_log_listener_writes_queued_records(self, tmp_path):
+        """Test records put on the log queue are written to the file by the listener thread"""
+        import logging
+        import production_config
+        
+        log_file = tmp_path / 'bot.log'
+        handler = logging.handlers.QueueHandler(production_config._log_queue)
+        logger = logging.getLogger('test_log_listener')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        
+        # Importing production_slack_bot starts the listener on the real log file
+        was_running = production_config._log_listener is not None
+        production_config.stop_log_listener()
+        try:
+            with patch('production_config.LOG_FILE', str(log_file)):
+                production_config.start_log_listener()
+                logger.info("queued record")
+                production_config.stop_log_listener()
+        finally:
+            logger.removeHandler(handler)
+            if was_running:
+                production_config.start_log_listener()
+        
+        assert "[INFO] test_log_listener" in log_file.read_text()
+        assert "queued record" in log_file.read_text()
+    
+    def test_logging_config_built_once(self):
+        """Test the logging configuration is shared rather than rebuilt on every call"""
+        assert ProductionConfig.get_logging_config() is ProductionConfig.get_logging_config()
+    
     def test_logging_config(self):
         """Test logging configuration generation"""
         config = ProductionConfig.get_logging_config()
@@ -82,10 +176,8 @@ class TestProductionConfigCoverage:
         
         # Test file handler
         file_handler = handlers['file']
-        assert file_handler['class'] == 'logging.handlers.RotatingFileHandler'
+        assert file_handler['()'] == 'production_config._queue_handler'
         assert file_handler['level'] == 'DEBUG'
-        assert 'formatter' in file_handler
-        assert 'filename' in file_handler
     
     def test_logging_config_formatters(self):
         """Test logging configuration formatters"""
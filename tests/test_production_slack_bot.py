@@ -1,6 +1,6 @@
 import pytest
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import sys
 import os
 import re
@@ -52,6 +52,52 @@ class TestProductionSlackBot:
         with pytest.raises(ValueError, match="Invalid configuration"):
             ProductionSlackBot()
     
+    @patch('production_slack_bot.OpenAIClient')
+    def test_clients_created_on_first_use(self, mock_openai):
+        """Test clients are only constructed when a handler first needs them"""
+        bot = ProductionSlackBot.__new__(ProductionSlackBot)
+        mock_openai.assert_not_called()
+
+        assert bot.openai_client is mock_openai.return_value
+        assert bot.openai_client is mock_openai.return_value
+        mock_openai.assert_called_once_with()
+
+    def test_stream_into_message_coalesces_updates(self):
+        """Test streamed deltas are accumulated and the message is edited with the text so far"""
+        bot = ProductionSlackBot.__new__(ProductionSlackBot)
+        bot.app = Mock()
+        posted = {'channel': 'C123', 'ts': '1700000000.000100'}
+        
+        async def deltas():
+            for delta in ("Program ", "is ", "on track"):
+                yield delta
+        
+        with patch('production_slack_bot.STREAM_MIN_UPDATE_INTERVAL', 0), \
+             patch('production_slack_bot.STREAM_MAX_UPDATE_INTERVAL', 0):
+            analysis = bot._stream_into_message(posted, "Header\n", deltas())
+        
+        assert analysis == "Program is on track"
+        last_update = bot.app.client.chat_update.call_args
+        assert last_update[1] == {'channel': 'C123', 'ts': '1700000000.000100', 'text': "Header\nProgram is on track"}
+    
+    def test_stream_into_message_waits_for_sentence_boundary(self):
+        """Test the message is only edited once a sentence is complete"""
+        bot = ProductionSlackBot.__new__(ProductionSlackBot)
+        bot.app = Mock()
+        posted = {'channel': 'C123', 'ts': '1700000000.000100'}
+        
+        async def deltas():
+            for delta in ("Program ", "is ", "on track. ", "BOM is ", "late"):
+                yield delta
+        
+        with patch('production_slack_bot.STREAM_MIN_UPDATE_INTERVAL', 0), \
+             patch('production_slack_bot.STREAM_MAX_UPDATE_INTERVAL', 60):
+            bot._stream_into_message(posted, "", deltas())
+        
+        bot.app.client.chat_update.assert_called_once_with(
+            channel='C123', ts='1700000000.000100', text="Program is on track. "
+        )
+    
     def test_extract_launch_date_valid(self):
         """Test launch date extraction with valid dates"""
         bot = ProductionSlackBot.__new__(ProductionSlackBot)
@@ -170,7 +216,7 @@ class TestSlackBotHandlers:
             
             # Mock OpenAI response
             mock_openai_instance = Mock()
-            mock_openai_instance.analyze_program_status.return_value = "Analysis complete"
+            mock_openai_instance.analyze_program_status = AsyncMock(return_value="Analysis complete")
             bot.openai_client = mock_openai_instance
             
             # Test the handler
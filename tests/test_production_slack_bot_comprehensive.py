@@ -1,6 +1,6 @@
 import pytest
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import sys
 import os
 
@@ -97,7 +97,7 @@ class TestProductionSlackBotComprehensive:
         
         # Mock dependencies
         bot.openai_client = Mock()
-        bot.openai_client.process_vehicle_program_query.return_value = "Analysis complete"
+        bot.openai_client.process_vehicle_program_query = AsyncMock(return_value="Analysis complete")
         
         bot.databricks_client = Mock()
         bot.databricks_client.execute_query.return_value = {'data': 'test'}
@@ -392,7 +392,7 @@ class TestProductionSlackBotComprehensive:
         
         # Mock dependencies
         bot.openai_client = Mock()
-        bot.openai_client.process_vehicle_program_query.return_value = "Analysis complete"
+        bot.openai_client.process_vehicle_program_query = AsyncMock(return_value="Analysis complete")
         
         bot.databricks_client = Mock()
         bot.databricks_client.execute_query.return_value = {'data': 'test'}
@@ -414,7 +414,7 @@ class TestProductionSlackBotComprehensive:
         
         # Mock all dependencies
         bot.openai_client = Mock()
-        bot.openai_client.process_vehicle_program_query.return_value = "Analysis complete"
+        bot.openai_client.process_vehicle_program_query = AsyncMock(return_value="Analysis complete")
         
         bot.databricks_client = Mock()
         bot.databricks_client.execute_query.return_value = {'data': 'test'}
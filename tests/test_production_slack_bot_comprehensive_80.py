@@ -1,6 +1,6 @@
 import pytest
 import unittest
-from unittest.mock import Mock, patch, MagicMock, call
+from unittest.mock import Mock, patch, MagicMock, call, AsyncMock
 import sys
 import os
 import json
@@ -116,10 +116,10 @@ class TestProductionSlackBotComprehensive:
             'BOM': {'status': 'success', 'data': [{'part': 'P001', 'status': 'complete'}]},
             'MP': {'status': 'success', 'data': [{'part': 'P002', 'status': 'pending'}]}
         }
-        self.bot.openai_client.process_vehicle_program_query.return_value = {
+        self.bot.openai_client.process_vehicle_program_query = AsyncMock(return_value={
             'summary': 'Program is 75% complete',
             'recommendations': ['Expedite MP department']
-        }
+        })
         
         self.bot._handle_vehicle_program_query(message, say)
         
@@ -173,7 +173,7 @@ class TestProductionSlackBotComprehensive:
         self.bot.databricks_client.query_vehicle_program_status.return_value = {
             'BOM': {'status': 'success', 'data': []}
         }
-        self.bot.openai_client.process_vehicle_program_query.side_effect = Exception("OpenAI error")
+        self.bot.openai_client.process_vehicle_program_query = AsyncMock(side_effect=Exception("OpenAI error"))
         
         self.bot._handle_vehicle_program_query(message, say)
         
@@ -432,7 +432,7 @@ class TestProductionSlackBotComprehensive:
             
             # Mock successful operation
             self.bot.databricks_client.query_vehicle_program_status.return_value = {}
-            self.bot.openai_client.process_vehicle_program_query.return_value = {}
+            self.bot.openai_client.process_vehicle_program_query = AsyncMock(return_value={})
             
             self.bot._handle_vehicle_program_query(message, say)
             
@@ -449,7 +449,7 @@ class TestProductionSlackBotComprehensive:
         
         # Mock successful operation
         self.bot.databricks_client.query_vehicle_program_status.return_value = {}
-        self.bot.openai_client.process_vehicle_program_query.return_value = {}
+        self.bot.openai_client.process_vehicle_program_query = AsyncMock(return_value={})
         
         start_time = datetime.now()
         self.bot._handle_vehicle_program_query(message, say)
@@ -477,7 +477,7 @@ class TestProductionSlackBotComprehensive:
                 
                 # Mock successful operation
                 self.bot.databricks_client.query_vehicle_program_status.return_value = {}
-                self.bot.openai_client.process_vehicle_program_query.return_value = {}
+                self.bot.openai_client.process_vehicle_program_query = AsyncMock(return_value={})
                 
                 self.bot._handle_vehicle_program_query(message, say)
                 results.append(True)
@@ -512,9 +512,9 @@ class TestProductionSlackBotComprehensive:
         self.bot.databricks_client.query_vehicle_program_status.return_value = {
             'BOM': {'status': 'success', 'data': []}
         }
-        self.bot.openai_client.process_vehicle_program_query.return_value = {
+        self.bot.openai_client.process_vehicle_program_query = AsyncMock(return_value={
             'summary': 'Test summary'
-        }
+        })
         
         self.bot._handle_vehicle_program_query(valid_message, say)
         
@@ -558,7 +558,7 @@ class TestProductionSlackBotComprehensive:
         
         # Mock successful operation
         self.bot.databricks_client.query_vehicle_program_status.return_value = {}
-        self.bot.openai_client.process_vehicle_program_query.return_value = {}
+        self.bot.openai_client.process_vehicle_program_query = AsyncMock(return_value={})
         
         self.bot._handle_vehicle_program_query(malicious_message, say)
         
@@ -576,7 +576,7 @@ class TestProductionSlackBotComprehensive:
         
         # Mock successful operation
         self.bot.databricks_client.query_vehicle_program_status.return_value = {}
-        self.bot.openai_client.process_vehicle_program_query.return_value = {}
+        self.bot.openai_client.process_vehicle_program_query = AsyncMock(return_value={})
         
         # Make multiple rapid requests
         for i in range(10):
@@ -598,9 +598,9 @@ class TestProductionSlackBotComprehensive:
         self.bot.databricks_client.query_vehicle_program_status.return_value = {
             'BOM': {'status': 'success', 'data': [{'part': f'P{i}', 'status': 'complete'} for i in range(1000)]}
         }
-        self.bot.openai_client.process_vehicle_program_query.return_value = {
+        self.bot.openai_client.process_vehicle_program_query = AsyncMock(return_value={
             'summary': 'Large summary' * 1000
-        }
+        })
         
         self.bot._handle_vehicle_program_query(large_message, say)
         
@@ -620,9 +620,9 @@ class TestProductionSlackBotComprehensive:
             Exception("First error"),
             {'BOM': {'status': 'success', 'data': []}}
         ]
-        self.bot.openai_client.process_vehicle_program_query.return_value = {
+        self.bot.openai_client.process_vehicle_program_query = AsyncMock(return_value={
             'summary': 'Recovery successful'
-        }
+        })
         
         # First call should fail
         self.bot._handle_vehicle_program_query(message, say)
@@ -1,6 +1,6 @@
 import pytest
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import sys
 import os
 
@@ -126,7 +126,7 @@ class TestProductionSlackBotCoverage:
         mock_app.return_value = mock_app_instance
         
         mock_openai_instance = Mock()
-        mock_openai_instance.analyze_program_status.return_value = "Analysis complete"
+        mock_openai_instance.analyze_program_status = AsyncMock(return_value="Analysis complete")
         mock_openai.return_value = mock_openai_instance
         
         mock_databricks_instance = Mock()
@@ -227,7 +227,7 @@ class TestProductionSlackBotCoverage:
         mock_app.return_value = mock_app_instance
         
         mock_openai_instance = Mock()
-        mock_openai_instance.analyze_program_status.side_effect = Exception("Test error")
+        mock_openai_instance.analyze_program_status = AsyncMock(side_effect=Exception("Test error"))
         mock_openai.return_value = mock_openai_instance
         
         mock_databricks_instance = Mock()
@@ -273,7 +273,7 @@ class TestProductionSlackBotCoverage:
         mock_app.return_value = mock_app_instance
         
         mock_openai_instance = Mock()
-        mock_openai_instance.analyze_uploaded_data.return_value = "File analysis complete"
+        mock_openai_instance.analyze_uploaded_data = AsyncMock(return_value="File analysis complete")
         mock_openai.return_value = mock_openai_instance
         
         mock_databricks_instance = Mock()
@@ -594,7 +594,7 @@ class TestProductionSlackBotCoverage:
         mock_app.return_value = mock_app_instance
         
         mock_openai_instance = Mock()
-        mock_openai_instance.analyze_program_status.side_effect = Exception("Test error")
+        mock_openai_instance.analyze_program_status = AsyncMock(side_effect=Exception("Test error"))
         mock_openai.return_value = mock_openai_instance
         
         mock_databricks_instance = Mock()
@@ -679,8 +679,8 @@ class TestProductionSlackBotCoverage:
         mock_app.return_value = mock_app_instance
         
         mock_openai_instance = Mock()
-        mock_openai_instance.analyze_program_status.return_value = "Analysis complete"
-        mock_openai_instance.analyze_uploaded_data.return_value = "File analysis complete"
+        mock_openai_instance.analyze_program_status = AsyncMock(return_value="Analysis complete")
+        mock_openai_instance.analyze_uploaded_data = AsyncMock(return_value="File analysis complete")
         mock_openai.return_value = mock_openai_instance
         
         mock_databricks_instance = Mock()
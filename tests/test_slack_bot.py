@@ -1,6 +1,6 @@
 import pytest
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import sys
 import os
 
@@ -103,7 +103,7 @@ class TestVehicleProgramSlackBot:
             
             # Mock OpenAI response
             mock_openai_instance = Mock()
-            mock_openai_instance.process_vehicle_program_query.return_value = "Analysis complete"
+            mock_openai_instance.process_vehicle_program_query = AsyncMock(return_value="Analysis complete")
             bot.openai_client = mock_openai_instance
             
             # Test the handler
@@ -222,7 +222,7 @@ class TestVehicleProgramSlackBot:
             
             # Mock OpenAI
             mock_openai_instance = Mock()
-            mock_openai_instance.analyze_file_data.return_value = "File analysis complete"
+            mock_openai_instance.analyze_file_data = AsyncMock(return_value="File analysis complete")
             bot.openai_client = mock_openai_instance
             
             # Test the handler
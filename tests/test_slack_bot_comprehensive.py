@@ -1,6 +1,6 @@
 import pytest
 import unittest
-from unittest.mock import Mock, patch, MagicMock, call
+from unittest.mock import Mock, patch, MagicMock, call, AsyncMock
 import sys
 import os
 import re
@@ -19,8 +19,7 @@ class TestSlackBotComprehensive:
         with patch('slack_bot.SLACK_BOT_TOKEN', 'xoxb-test'), \
              patch('slack_bot.SLACK_SIGNING_SECRET', 'test-secret'), \
              patch('slack_bot.SLACK_APP_TOKEN', 'xapp-test'), \
-             patch('slack_bot.DEBUG_MODE', True), \
-             patch('slack_bot.LOG_LEVEL', 'DEBUG'):
+             patch('slack_bot.DEBUG_MODE', True):
             
             # Mock all external dependencies
             with patch('slack_bot.DatabricksClient') as mock_databricks, \
@@ -115,10 +114,10 @@ class TestSlackBotComprehensive:
             'BOM': {'status': 'success', 'data': [{'part': 'P001', 'status': 'complete'}]},
             'MP': {'status': 'success', 'data': [{'part': 'P002', 'status': 'pending'}]}
         }
-        self.bot.openai_client.process_vehicle_program_query.return_value = {
+        self.bot.openai_client.process_vehicle_program_query = AsyncMock(return_value={
             'summary': 'Program is 75% complete',
             'recommendations': ['Expedite MP department']
-        }
+        })
         
         self.bot._handle_vehicle_program_query(message, say)
         
@@ -172,7 +171,7 @@ class TestSlackBotComprehensive:
         self.bot.databricks_client.query_vehicle_program_status.return_value = {
             'BOM': {'status': 'success', 'data': []}
         }
-        self.bot.openai_client.process_vehicle_program_query.side_effect = Exception("OpenAI error")
+        self.bot.openai_client.process_vehicle_program_query = AsyncMock(side_effect=Exception("OpenAI error"))
         
         self.bot._handle_vehicle_program_query(message, say)
         
@@ -421,7 +420,7 @@ class TestSlackBotComprehensive:
             
             # Mock successful operation
             self.bot.databricks_client.query_vehicle_program_status.return_value = {}
-            self.bot.openai_client.process_vehicle_program_query.return_value = {}
+            self.bot.openai_client.process_vehicle_program_query = AsyncMock(return_value={})
             
             self.bot._handle_vehicle_program_query(message, say)
             
@@ -438,7 +437,7 @@ class TestSlackBotComprehensive:
         
         # Mock successful operation
         self.bot.databricks_client.query_vehicle_program_status.return_value = {}
-        self.bot.openai_client.process_vehicle_program_query.return_value = {}
+        self.bot.openai_client.process_vehicle_program_query = AsyncMock(return_value={})
         
         start_time = datetime.now()
         self.bot._handle_vehicle_program_query(message, say)
@@ -466,7 +465,7 @@ class TestSlackBotComprehensive:
                 
                 # Mock successful operation
                 self.bot.databricks_client.query_vehicle_program_status.return_value = {}
-                self.bot.openai_client.process_vehicle_program_query.return_value = {}
+                self.bot.openai_client.process_vehicle_program_query = AsyncMock(return_value={})
                 
                 self.bot._handle_vehicle_program_query(message, say)
                 results.append(True)